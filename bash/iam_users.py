@@ -22,12 +22,17 @@ except Exception:
     print('unable to import configParser library. Exit')
     sys.exit(1)
 
+try:
+    from keyup.credentials import snapshot
+except ImportError:
+    snapshot = None
+
 
 # --- declarations  --------------------------------------------------------------------------------
 
 
 def print_array(content, args):
-    for x in content.sections():
+    for x in content:
         if x in args:
             continue
         else:
@@ -48,15 +53,20 @@ def shared_credentials_location():
 
 def awscli_profiles():
     """Returns IAM usernames from local awscli configuration"""
-    if os.path.isfile(config_file):
-        config.read(config_file)
-    else:
+    if not os.path.isfile(config_file):
         sys.exit(1)
 
+    if snapshot is not None:
+        # parsed credentials snapshot shared with keyup
+        return snapshot(config_file).iam_profiles
+
+    config = ConfigParser()
+    config.read(config_file)
+
     for profile in config.sections():
         if 'role_arn' in config[profile].keys() or 'aws_security_token' in config[profile].keys():
             config.pop(profile)
-    return config
+    return config.sections()
 
 
 def print_profiles(config, args):
@@ -75,7 +85,6 @@ def print_profiles(config, args):
 # globals
 home = os.environ.get('HOME')
 config_file = shared_credentials_location() or home + '/.aws/credentials'
-config = ConfigParser()
 
 modified_config = awscli_profiles()
 sys.exit(print_profiles(modified_config, sys.argv[1:]))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | boto3 client construction during a single key rotation
+
+    Replays the client requests made by one ``keyup --operation up`` run
+    (authenticate, map identity, list keys, delete key, create key, list
+    keys) against moto, once building a new session per request as
+    pyaws.session.boto3_session does, and once through the keyup client
+    pool.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_client_pool.py [--rounds N]
+
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import boto3
+import moto
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# (service) sequence of client requests made by a single key rotation
+ROTATION_CLIENTS = ('sts', 'sts', 'iam', 'iam', 'iam', 'iam')
+
+
+def seed_profile(profile='developer1'):
+    """ moto iam user with a single access key; awscli credentials file """
+    client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+    client.create_user(UserName=profile)
+    keys = client.create_access_key(UserName=profile)['AccessKey']
+    path = os.path.join(tempfile.mkdtemp(), 'credentials')
+    with open(path, 'w') as f1:
+        f1.write('[{}]\naws_access_key_id = {}\naws_secret_access_key = {}\n'.format(
+            profile, keys['AccessKeyId'], keys['SecretAccessKey']))
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = path
+    return profile
+
+
+def rotation(factory, profile):
+    """ client construction + first api call for each rotation step """
+    start = time.perf_counter()
+    for service in ROTATION_CLIENTS:
+        client = factory(service=service, profile=profile)
+        if service == 'sts':
+            client.get_caller_identity()
+        else:
+            client.list_access_keys()
+    return time.perf_counter() - start
+
+
+def main(rounds):
+    from pyaws.session import boto3_session as unpooled
+    from keyup import sessions
+
+    for var in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ.pop(var, None)
+
+    with moto.mock_iam(), moto.mock_sts():
+        profile = seed_profile()
+        before = [rotation(unpooled, profile) for _ in range(rounds)]
+
+        after = []
+        for _ in range(rounds):
+            sessions.invalidate()       # each round starts with an empty pool
+            after.append(rotation(sessions.boto3_session, profile))
+
+    print('\n  Client construction per rotation ({} client requests, {} rounds)\n'.format(
+        len(ROTATION_CLIENTS), rounds))
+    print('  {:<28}{:>12}{:>12}'.format('', 'mean (ms)', 'min (ms)'))
+    for label, timings in (('per-request sessions', before), ('keyup client pool', after)):
+        print('  {:<28}{:>12.1f}{:>12.1f}'.format(
+            label, 1000 * sum(timings) / len(timings), 1000 * min(timings)))
+    print('\n  speedup: {:.1f}x\n'.format(sum(before) / sum(after)))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--rounds', type=int, default=10)
+    sys.exit(main(parser.parse_args().rounds))
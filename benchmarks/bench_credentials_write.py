@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | rewrite of a large awscli credentials file
+
+    Replaces the keyset of one profile in a credentials file containing
+    thousands of role profiles; ConfigParser parse + full re-serialization
+    versus the keyup offset-indexed credentials engine.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_credentials_write.py [--profiles N] [--rounds N]
+
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from configparser import ConfigParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_file(profiles):
+    """ credentials file: one static profile, many temporary role profiles """
+    path = os.path.join(tempfile.mkdtemp(), 'credentials')
+    with open(path, 'w') as f1:
+        f1.write('[developer1]\naws_access_key_id = AKIA0000\naws_secret_access_key = SECRET0000\n\n')
+        for i in range(profiles):
+            f1.write('# role credentials {0}\n[role-{0}]\naws_access_key_id = ASIA{0}\n'
+                     'aws_secret_access_key = SECRET{0}\naws_session_token = {1}\n\n'.format(i, 'T' * 400))
+    return path
+
+
+def configparser_write(path, key):
+    start = time.perf_counter()
+    parsed = ConfigParser()
+    parsed.read(path)
+    parsed['developer1']['aws_access_key_id'] = key
+    with open(path, 'w') as f1:
+        parsed.write(f1)
+    return time.perf_counter() - start
+
+
+def engine_write(path, key):
+    from keyup.credentials import CredentialsFile
+    start = time.perf_counter()
+    keyfile = CredentialsFile(path)
+    keyfile.set('developer1', 'aws_access_key_id', key)
+    keyfile.write()
+    return time.perf_counter() - start
+
+
+def main(profiles, rounds):
+    before = [configparser_write(seed_file(profiles), 'AKIA{}'.format(i)) for i in range(rounds)]
+    after = [engine_write(seed_file(profiles), 'AKIA{}'.format(i)) for i in range(rounds)]
+
+    print('\n  Keyset write, 1 of {} profiles ({} rounds)\n'.format(profiles + 1, rounds))
+    print('  {:<28}{:>12}{:>12}'.format('', 'mean (ms)', 'min (ms)'))
+    for label, timings in (('configparser rewrite', before), ('keyup credentials engine', after)):
+        print('  {:<28}{:>12.1f}{:>12.1f}'.format(
+            label, 1000 * sum(timings) / len(timings), 1000 * min(timings)))
+    print('\n  speedup: {:.1f}x\n'.format(sum(before) / sum(after)))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--profiles', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(main(args.profiles, args.rounds))
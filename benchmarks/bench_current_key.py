@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | current access key lookup (KEY_DEPRECATION = AWSCLI)
+
+    When an iam user has two access keys and KEY_DEPRECATION is AWSCLI,
+    rotation replaces the key present in the local awscli config.  Times
+    the previous ``aws configure get`` subprocess lookup against the
+    in-process credentials snapshot lookup, then runs the two-key
+    deprecated key selection with process creation instrumented to show
+    no subprocess is spawned.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_current_key.py [--rounds N]
+
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_file():
+    path = os.path.join(tempfile.mkdtemp(), 'credentials')
+    with open(path, 'w') as f1:
+        f1.write('[developer1]\naws_access_key_id = AKIA0000CURRENT\naws_secret_access_key = SECRET\n')
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = path
+    return path
+
+
+def subprocess_lookup(profile):
+    start = time.perf_counter()
+    subprocess.getoutput('aws configure get ' + profile + '.aws_access_key_id')
+    return time.perf_counter() - start
+
+
+def inprocess_lookup(profile):
+    from keyup.cli import get_current_key
+    start = time.perf_counter()
+    get_current_key(profile)
+    return time.perf_counter() - start
+
+
+def spawned_processes(profile):
+    """ deprecated key selection with two keys; counts child processes created """
+    from keyup import cli
+    spawned = []
+    popen_init = subprocess.Popen.__init__
+
+    def _counting_init(self, *args, **kwargs):
+        spawned.append(args[0] if args else kwargs.get('args'))
+        popen_init(self, *args, **kwargs)
+
+    now = datetime.datetime.now()
+    key_metadata = [
+        {'AccessKeyId': 'AKIA0000CURRENT', 'Status': 'Active', 'CreateDate': now},
+        {'AccessKeyId': 'AKIA0000OTHER', 'Status': 'Active', 'CreateDate': now}
+    ]
+    cli.local_config['KEY_METADATA']['KEY_DEPRECATION'] = 'AWSCLI'
+    subprocess.Popen.__init__ = _counting_init
+    try:
+        selected = cli.select_deprecated_key(key_metadata, profile)
+    finally:
+        subprocess.Popen.__init__ = popen_init
+    return selected, spawned
+
+
+def main(rounds):
+    profile = 'developer1'
+    seed_file()
+
+    after = [inprocess_lookup(profile) for _ in range(rounds)]
+    rows = [('in-process snapshot', after)]
+
+    if shutil.which('aws'):
+        before = [subprocess_lookup(profile) for _ in range(rounds)]
+        rows.insert(0, ('aws configure get', before))
+
+    print('\n  Current AccessKeyId lookup ({} rounds)\n'.format(rounds))
+    print('  {:<28}{:>12}{:>12}'.format('', 'mean (ms)', 'min (ms)'))
+    for label, timings in rows:
+        print('  {:<28}{:>12.2f}{:>12.2f}'.format(
+            label, 1000 * sum(timings) / len(timings), 1000 * min(timings)))
+    if len(rows) > 1:
+        print('\n  speedup: {:.0f}x'.format(sum(rows[0][1]) / sum(after)))
+    else:
+        print('\n  awscli not installed; subprocess lookup not timed')
+
+    selected, spawned = spawned_processes(profile)
+    print('\n  two-key rotation, KEY_DEPRECATION=AWSCLI: selected {}, subprocesses spawned: {}\n'.format(
+        selected, len(spawned)))
+    return 0 if selected == 'AKIA0000CURRENT' and not spawned else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--rounds', type=int, default=10)
+    sys.exit(main(parser.parse_args().rounds))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | host environment detection in keyup.common
+
+    Compares, in fresh interpreters, the cost of importing keyup.common
+    when libtools.js was imported and the linux distribution probed as an
+    import-time default argument (legacy, emulated) against the on-demand
+    probe in keyup.hostenv: import only, first probe with a cold disk
+    cache, and first probe with a warm disk cache.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_environment.py [--rounds N]
+
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module-level libtools import and distrotype() as evaluated by the legacy
+# syslog_enabled default argument
+LEGACY_PROBE = (
+    "import libtools.js, re, distro; "
+    "[re.search(x, distro.like()) for x in ['amzn', 'debian', 'rhel', 'ubuntu']]"
+)
+
+# (label, timed statement, clear disk cache before each round)
+CASES = (
+    ('legacy: import (probe at import)', 'import keyup.common; ' + LEGACY_PROBE, False),
+    ('import keyup.common', 'import keyup.common', False),
+    ('import + syslog_enabled() (cold cache)', 'import keyup.common; keyup.common.syslog_enabled()', True),
+    ('import + syslog_enabled() (warm cache)', 'import keyup.common; keyup.common.syslog_enabled()', False),
+)
+
+TIMER = "import time; _t = time.perf_counter(); {}; print(time.perf_counter() - _t)"
+
+
+def run(statement, home):
+    """ elapsed seconds of statement in a fresh interpreter """
+    env = dict(os.environ, PYTHONPATH=ROOT, HOME=home)
+    env.pop('AWS_DEFAULT_REGION', None)
+    r = subprocess.run(
+        [sys.executable, '-c', TIMER.format(statement)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, universal_newlines=True, check=True
+    )
+    return float(r.stdout.strip().splitlines()[-1])
+
+
+def main(rounds):
+    home = tempfile.mkdtemp(prefix='keyup-bench-')
+    cache = os.path.join(home, '.config', 'keyup', 'cache', 'environment.json')
+    results = []
+
+    print('\n  Host environment detection ({} rounds, fresh interpreter per round)\n'.format(rounds))
+    print('  {:<42}{:>10}{:>10}'.format('', 'mean (ms)', 'min (ms)'))
+
+    for label, statement, cold in CASES:
+        times = []
+        for _ in range(rounds):
+            if cold and os.path.exists(cache):
+                os.remove(cache)
+            times.append(1000 * run(statement, home))
+        results.append(min(times))
+        print('  {:<42}{:>10.1f}{:>10.1f}'.format(label, sum(times) / len(times), min(times)))
+
+    print('\n  import-time saving: {:.1f} ms ({:.1f}x)\n'.format(
+        results[0] - results[1], results[0] / results[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(main(args.rounds))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | logging overhead in the key report
+
+    Generates the access key report (cauth.prepare_reportdata) for many
+    profiles against moto with FILE logging enabled, once with a logger
+    which formats function names via inspect.stack() and formats messages
+    eagerly (legacy, emulated), once with the keyup logger, which takes
+    the function name from the log record and formats lazily, and once in
+    QUEUE mode (background writer).  Also reports the cost of a single log
+    call at an enabled and a disabled level, and with MAX_WORKERS threads
+    logging concurrently.  Rate limits are turned off so logging overhead
+    is measured rather than the rate limiter.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_logging.py [--profiles N] [--rounds N]
+
+"""
+import os
+import sys
+import time
+import queue
+import inspect
+import logging
+import argparse
+import tempfile
+import threading
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['HOME'] = tempfile.mkdtemp(prefix='keyup-bench-')     # isolated caches
+
+import boto3
+import moto
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# modules logging on the report path
+REPORT_MODULES = ('keyup.cauth', 'keyup.map', 'keyup.cache', 'keyup.sessions', 'keyup.credentials')
+
+
+class LegacyLogger():
+    """ logger calls as written before keyup.logd carried function names """
+    def __init__(self, logger):
+        self.logger = logger
+
+    def _log(self, level, msg, args, kwargs):
+        # '%s: message' % (inspect.stack()[0][3], *args) at the call site
+        msg = '%s: %s' % (inspect.stack()[2][3], (msg % args) if args else msg)
+        getattr(self.logger, level)(msg, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self._log('debug', msg, args, kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log('info', msg, args, kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log('warning', msg, args, kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        self._log('exception', msg, args, kwargs)
+
+
+def seed_profiles(count):
+    """ moto iam users with one access key each; awscli credentials file """
+    client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+    lines = []
+    for i in range(count):
+        user = 'developer{}'.format(i)
+        client.create_user(UserName=user)
+        keys = client.create_access_key(UserName=user)['AccessKey']
+        lines.append('[{}]\naws_access_key_id = {}\naws_secret_access_key = {}\n'.format(
+            user, keys['AccessKeyId'], keys['SecretAccessKey']))
+    path = os.path.join(tempfile.mkdtemp(), 'credentials')
+    with open(path, 'w') as f1:
+        f1.write('\n'.join(lines))
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = path
+
+
+def enable_logging(logger, mode='FILE'):
+    """ FILE or QUEUE mode logging to a temporary log file """
+    from keyup import logd
+    from keyup.statics import local_config
+
+    logd.shutdown()
+    local_config['LOGGING'].update(
+        LOG_MODE=mode, LOG_FORMAT='TEXT', LOG_PATH=os.path.join(tempfile.mkdtemp(), 'keyup.log'))
+    logger.handlers = []
+    logd.getLogger(logger.name)
+    logger.disabled = False
+
+
+def report(rounds):
+    """ seconds per report """
+    from keyup import cauth
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        cauth.prepare_reportdata(output=queue.Queue())
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def per_call(log, level, calls=2000, threads=1):
+    """ microseconds per log call; wall time when threads log concurrently """
+    def profile_keydata(profile):
+        for _ in range(calls):
+            getattr(log, level)('IAM User %s key info found for AWS account %s', profile, '123456789012')
+
+    workers = [threading.Thread(target=profile_keydata, args=('developer{}'.format(i),)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return 1e6 * (time.perf_counter() - start) / (calls * threads)
+
+
+def main(profiles, rounds):
+    import importlib
+    from keyup import logger
+    from keyup.workers import max_workers
+    from keyup.statics import local_config
+
+    for var in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ.pop(var, None)
+
+    # moto profiles share one account; rate limits off so logging overhead,
+    # not the limiter, is measured
+    local_config['CONCURRENCY'].update(STS_RATE=0, IAM_READ_RATE=0, IAM_WRITE_RATE=0)
+
+    enable_logging(logger)
+    modules = [importlib.import_module(x) for x in REPORT_MODULES]
+    legacy = LegacyLogger(logger)
+
+    with moto.mock_iam(), moto.mock_sts():
+        seed_profiles(profiles)
+        report(1)           # warm identity and alias caches, client pool
+
+        results = {}
+        for label, log, mode in (
+                ('legacy (inspect.stack)', legacy, 'FILE'),
+                ('keyup.logd (funcName)', logger, 'FILE'),
+                ('keyup.logd QUEUE mode', logger, 'QUEUE')):
+            enable_logging(logger, mode)
+            for module in modules:
+                module.logger = log
+            results[label] = report(rounds)
+        enable_logging(logger)
+
+    print('\n  Key report, {} profiles, FILE logging enabled ({} rounds)\n'.format(profiles, rounds))
+    print('  {:<28}{:>12}{:>12}{:>16}'.format('', 'mean (ms)', 'min (ms)', 'profiles/s'))
+    for label, timings in results.items():
+        print('  {:<28}{:>12.1f}{:>12.1f}{:>16.0f}'.format(
+            label, 1000 * sum(timings) / len(timings), 1000 * min(timings), profiles / min(timings)))
+    before = list(results.values())[0]
+    print('\n  speedup: {}\n'.format(', '.join(
+        '{} {:.2f}x'.format(k, sum(before) / sum(v)) for k, v in list(results.items())[1:])))
+
+    workers = max_workers()
+    print('  Single log call (us)\n')
+    print('  {:<28}{:>12}{:>12}{:>20}'.format('', 'enabled', 'disabled', '{} threads'.format(workers)))
+    for label, log, mode in (
+            ('legacy (inspect.stack)', legacy, 'FILE'),
+            ('keyup.logd (funcName)', logger, 'FILE'),
+            ('keyup.logd QUEUE mode', logger, 'QUEUE')):
+        enable_logging(logger, mode)
+        logger.setLevel(logging.DEBUG)
+        enabled = per_call(log, 'info')
+        concurrent = per_call(log, 'info', threads=workers)
+        logger.setLevel(logging.WARNING)
+        disabled = per_call(log, 'info')
+        print('  {:<28}{:>12.1f}{:>12.1f}{:>20.1f}'.format(label, enabled, disabled, concurrent))
+    enable_logging(logger)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(main(args.profiles, args.rounds))
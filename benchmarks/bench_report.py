@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | time to first row of the key report
+
+    Generates the access key report for many profiles against moto, with a
+    fixed per-profile delay standing in for AWS round trips.  Compares the
+    time until the first row is rendered and until the report is complete:
+    report data merged and queued once all profiles finish (legacy) versus
+    per-profile records streamed through the queue and rendered row by row.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_report.py [--profiles N] [--latency MS]
+
+"""
+import os
+import io
+import sys
+import time
+import queue
+import argparse
+import tempfile
+import threading
+import contextlib
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['HOME'] = tempfile.mkdtemp(prefix='keyup-bench-')     # isolated caches
+
+import boto3
+import moto
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_profiles(count):
+    """ moto iam users with one access key each; awscli credentials file """
+    client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+    lines = []
+    for i in range(count):
+        user = 'developer{}'.format(i)
+        client.create_user(UserName=user)
+        keys = client.create_access_key(UserName=user)['AccessKey']
+        lines.append('[{}]\naws_access_key_id = {}\naws_secret_access_key = {}\n'.format(
+            user, keys['AccessKeyId'], keys['SecretAccessKey']))
+    path = os.path.join(tempfile.mkdtemp(), 'credentials')
+    with open(path, 'w') as f1:
+        f1.write('\n'.join(lines))
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = path
+
+
+def legacy_report():
+    """ all profiles merged, then queued and rendered at once """
+    from keyup import cauth
+    from keyup.iam_operations import local_profilenames
+    from keyup.workers import fan_out
+
+    output = queue.Queue()
+
+    def prepare():
+        cauth.source_globals()
+        data, exceptions = {}, []
+        for profile, record, e in fan_out(cauth.profile_keydata, local_profilenames()):
+            if e is not None:
+                exceptions.append(profile)
+            elif record is not None:
+                data[profile] = record
+        output.put((data, exceptions))
+
+    start = time.perf_counter()
+    threading.Thread(target=prepare, daemon=True).start()
+    data, exceptions = output.get()
+    first = time.perf_counter() - start
+    cauth.setup_table(data, exceptions)
+    return first, time.perf_counter() - start
+
+
+def streaming_report():
+    """ records rendered as each profile completes """
+    from keyup import cauth
+
+    output = queue.Queue()
+    first = []
+
+    def records():
+        for record in cauth.report_records(output):
+            yield record
+            if not first:
+                first.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threading.Thread(target=cauth.prepare_reportdata, args=(output,), daemon=True).start()
+    cauth.render_report(records())
+    return first[0], time.perf_counter() - start
+
+
+def main(profiles, latency):
+    from keyup import cauth, logger
+    from keyup.statics import local_config
+
+    logger.disabled = True
+    # moto profiles share one account; rate limits off so the report, not
+    # the limiter, is measured
+    local_config['CONCURRENCY'].update(STS_RATE=0, IAM_READ_RATE=0, IAM_WRITE_RATE=0)
+    for var in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ.pop(var, None)
+
+    profile_keydata = cauth.profile_keydata
+
+    def delayed_keydata(profile):
+        time.sleep(latency / 1000)
+        return profile_keydata(profile)
+
+    with moto.mock_iam(), moto.mock_sts():
+        seed_profiles(profiles)
+        with contextlib.redirect_stdout(io.StringIO()):
+            streaming_report()                      # warm identity and alias caches, client pool
+            cauth.profile_keydata = delayed_keydata
+            results = {
+                'legacy (merged report)': legacy_report(),
+                'streamed rows': streaming_report()
+            }
+        cauth.profile_keydata = profile_keydata
+
+    print('\n  Key report, {} profiles, {} ms per profile\n'.format(profiles, latency))
+    print('  {:<28}{:>16}{:>16}'.format('', 'first row (ms)', 'complete (ms)'))
+    for label, (first, total) in results.items():
+        print('  {:<28}{:>16.1f}{:>16.1f}'.format(label, 1000 * first, 1000 * total))
+    before, after = results.values()
+    print('\n  time to first row: {:.1f}x sooner\n'.format(before[0] / after[0]))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--latency', type=int, default=100)
+    args = parser.parse_args()
+    sys.exit(main(args.profiles, args.latency))
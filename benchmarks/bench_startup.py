@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Summary:
+    Benchmark | cold start import time of keyup entry points
+
+    Runs each entry point in a fresh interpreter under ``python -X
+    importtime`` and reports import time, wall time, and the heaviest
+    top-level imports.  Modules the interpreter imports at startup
+    (site, encodings) are excluded from import time.  Exits non-zero
+    when cold startup of ``keyup --help`` or ``keyup --version``
+    exceeds the budget.
+
+Usage:
+
+    .. code:: bash
+
+        $ python3 benchmarks/bench_startup.py [--budget MS] [--rounds N]
+
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, python statement, budgeted)
+ENTRY_POINTS = (
+    ('keyup --help', "import sys; sys.argv = ['keyup', '--help']; from keyup.cli import init; init()", True),
+    ('keyup --version', "import sys; sys.argv = ['keyup', '--version']; from keyup.cli import init; init()", True),
+    ('keyconfig (import)', 'import keyup.keyconfig', False),
+    ('keyup --operation (import)', 'import keyup.cli, keyup.map, keyup.list_ops, keyup.sessions', False),
+)
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run(statement):
+    """ import time (us) per top-level module, wall time (s) of one cold start """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('AWS_DEFAULT_REGION', None)
+    start = time.perf_counter()
+    r = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env, universal_newlines=True
+    )
+    wall = time.perf_counter() - start
+
+    toplevel = {}
+    for line in r.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            toplevel[match.group(4)] = int(match.group(2))
+    return toplevel, wall
+
+
+def main(budget, rounds):
+    interpreter = set(run('pass')[0])
+    failed = []
+    print('\n  Cold start ({} rounds, budget {} ms for --help/--version imports)\n'.format(rounds, budget))
+    print('  {:<28}{:>14}{:>12}   {}'.format('', 'imports (ms)', 'wall (ms)', 'heaviest imports'))
+
+    for label, statement, budgeted in ENTRY_POINTS:
+        runs = []
+        for _ in range(rounds):
+            toplevel, wall = run(statement)
+            runs.append(({k: v for k, v in toplevel.items() if k not in interpreter}, wall))
+
+        imports = min(sum(x[0].values()) for x in runs) / 1000
+        wall = 1000 * min(x[1] for x in runs)
+        heaviest = sorted(runs[-1][0].items(), key=lambda x: -x[1])[:3]
+
+        print('  {:<28}{:>14.1f}{:>12.1f}   {}'.format(
+            label, imports, wall, ', '.join('{} {:.0f}'.format(k, v / 1000) for k, v in heaviest)))
+        if budgeted and imports > budget:
+            failed.append(label)
+
+    if failed:
+        print('\n  FAIL: import budget exceeded: {}\n'.format(', '.join(failed)))
+        return 1
+    print('\n  OK\n')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--budget', type=int, default=150, help='milliseconds')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(main(args.budget, args.rounds))
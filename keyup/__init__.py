@@ -12,14 +12,26 @@ container = queue.Queue()
 # ---  ancillary modules below line -------------------------------------------
 
 
-try:
-
-    from keyup import logd
-    logger = logd.getLogger(__version__)
-
-    # set pyaws log function to keyup global logger
-    import pyaws
-    pyaws.logger = logger
-
-except Exception:
-    pass
+def __getattr__(name):
+    """
+    Summary:
+        Creates the package logger on first use (PEP 562) so code paths
+        which never log (--help, --version) do not import logging modules
+    """
+    if name != 'logger':
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    global logger
+    try:
+        from keyup import logd
+        logger = logd.getLogger(__version__)
+
+        # set pyaws log function to keyup global logger
+        import sys
+        if 'pyaws' in sys.modules:
+            sys.modules['pyaws'].logger = logger
+
+    except Exception:
+        import logging
+        logger = logging.getLogger(__version__)
+    return logger
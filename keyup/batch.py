@@ -0,0 +1,556 @@
+"""
+Summary:
+    Multi-profile (batch) key rotation module.
+
+    - IAM key operations for each profile execute concurrently
+    - A single readiness wait is shared by every profile in the batch
+    - The awscli credentials file is rewritten once with all new keysets
+    - Profiles sharing an access key: the key is rotated once and the new
+      keyset written to every profile which uses it
+    - New keysets which cannot be installed are saved to the backup location
+    - Per-profile outcome table displayed when the batch completes
+    - Surrogate mode: one admin profile rotates the keys of many iam users;
+      key create and delete calls are held to IAM_WRITE_RATE once IAM
+      throttles the account (ratelimit)
+    - ROTATION_MODE CREATE_FIRST:  where a key slot is free, deprecated keys
+      are retired only after the new keysets are written and confirmed usable
+    - KEY_RETIREMENT DEFERRED:  deprecated keys are deactivated and queued;
+      deleted in one batch after the grace period (retirement)
+
+Module Functions:
+    - rotate_profile:
+        delete deprecated, create new access key for a single profile
+    - rotate_profiles:
+        rotates access keys for a list of profiles in one process
+    - install_keysets:
+        writes new keysets to the local awscli credentials file
+    - backup_keysets:
+        saves new keysets which could not be installed to the backup location
+    - rotate_surrogate:
+        delete deprecated, create new access key of an iam user on
+        behalf of an admin profile
+    - rotate_surrogates:
+        rotates access keys of many iam users from one admin profile
+    - read_usernames:
+        iam usernames from a file, one per line
+    - retire_deprecated:
+        deactivates and deletes deprecated keys of rotations created first
+    - display_outcomes:
+        renders per-profile outcome table to cli stdout
+
+"""
+import sys
+import functools
+from veryprettytable import VeryPrettyTable
+from libtools import stdout_message
+from keyup.cli import awscli_credentials_file, clean_config, create_first, create_keyset, delete_keyset
+from keyup.cli import retire_keyset, select_deprecated_key, wait_keyset_enabled, write_keyset
+from keyup.cli import write_keyset_backup
+from keyup.credentials import CredentialsFile
+from keyup.list_ops import query_keyinfo
+from keyup.logd import ProfileAdapter
+from keyup.map import forget_identity, map_identity
+from keyup.retirement import defer_keyset, deferred, release_slot
+from keyup.sessions import invalidate
+from keyup.statics import local_config
+from keyup.workers import fan_out
+from keyup.variables import bd, bdwt, frame, gn, rd, rst
+from keyup import logger
+
+
+try:
+    from keyup.oscodes_unix import exit_codes
+except Exception:
+    from keyup.oscodes_win import exit_codes    # non-specific os-safe codes
+
+
+IAM_KEYS = ('aws_access_key_id', 'aws_secret_access_key')
+
+
+def _outcome(profile, **kwargs):
+    """ per-profile rotation outcome record """
+    outcome = {
+        'profile': profile,
+        'iam_user': '',
+        'account': '',
+        'deprecated_key': '',
+        'new_key': '',
+        'keyset': None,
+        'destination': '',
+        'retire': False,
+        'shared': (),
+        'success': False,
+        'reason': ''
+    }
+    outcome.update(kwargs)
+    return outcome
+
+
+def _local_keyset(keyfile, profile):
+    """ profile holds a static keyset in the local awscli credentials file """
+    return profile in keyfile and set(IAM_KEYS).issubset(keyfile.keys(profile))
+
+
+def rotate_profile(profile, keyfile=None):
+    """
+    Summary:
+        IAM portion of a key rotation for a single profile; deletes the
+        deprecated access key and creates its replacement.  The local
+        awscli configuration is not modified
+
+    Args:
+        :profile (str): profile name from the local awscli configuration
+        :keyfile (CredentialsFile): local awscli credentials file; read
+            when not provided
+
+    Returns:
+        rotation outcome, TYPE: dict
+    """
+    log = ProfileAdapter(logger, profile)
+    keyfile = keyfile or CredentialsFile(awscli_credentials_file())
+
+    # new keyset must have a destination before any key is deleted or created
+    if not _local_keyset(keyfile, profile):
+        return _outcome(profile, reason='Profile keyset not found in local awscli config')
+
+    try:
+        iam_user, account = map_identity(profile)
+
+        if iam_user is None:
+            return _outcome(profile, reason='Expired or invalid credentials')
+
+        key_metadata, statuscode = query_keyinfo(account, profile, quiet=True)
+
+        if deferred() and len(key_metadata) > 1:
+            key_metadata = release_slot(key_metadata, profile)
+
+        deprecated_key = select_deprecated_key(key_metadata, profile)
+
+        if not deprecated_key:
+            return _outcome(
+                profile, iam_user=iam_user, account=account,
+                reason='Unable to identify access key for replacement'
+            )
+
+        # create first: deprecated key retired once the new keyset is in use
+        retire = create_first(key_metadata)
+
+        if retire:
+            removed = True
+        elif deferred() and len(key_metadata) < 2:
+            # deactivated; deleted after grace period (keyup --retire)
+            removed = defer_keyset(deprecated_key, profile)
+        else:
+            removed = delete_keyset(access_key=deprecated_key, profile=profile)
+
+        if not removed:
+            return _outcome(
+                profile, iam_user=iam_user, account=account, deprecated_key=deprecated_key,
+                reason=exit_codes['EX_DELETE_FAIL']['Reason']
+            )
+
+        success, keyset = create_keyset(iam_user=iam_user, profile=profile)
+
+        if not success:
+            return _outcome(
+                profile, iam_user=iam_user, account=account, deprecated_key=deprecated_key,
+                reason=exit_codes['EX_CREATE_FAIL']['Reason']
+            )
+
+    except SystemExit as e:
+        # key operations exit when permissions are inadequate
+        log.warning('Rotation aborted (Code: %s)', e.code)
+        return _outcome(profile, reason='Inadequate permissions (Code: {})'.format(e.code))
+
+    log.info('Create request successful. AccessKeyId (%s) created for iam user %s',
+             keyset['AccessKey']['AccessKeyId'], iam_user)
+
+    return _outcome(
+        profile, iam_user=iam_user, account=account, deprecated_key=deprecated_key,
+        new_key=keyset['AccessKey']['AccessKeyId'], keyset=keyset, retire=retire, success=True
+    )
+
+
+def install_keysets(outcomes, debug=False):
+    """
+    Summary:
+        Writes all newly created keysets to the local awscli credentials
+        file in a single write; each keyset is written to its profile and
+        to the profiles sharing its access key.  Keysets of profiles no
+        longer found in the credentials file are saved to the backup location
+
+    Args:
+        :outcomes (list): rotation outcome records
+
+    Returns:
+        TYPE: bool, Success | Failure
+
+    Raises:
+        OSError when the credentials file cannot be written
+    """
+    keyfile = CredentialsFile(awscli_credentials_file())
+    missing = []
+
+    for outcome in outcomes:
+        names = (outcome['profile'],) + tuple(outcome['shared'])
+
+        if not outcome['success']:
+            continue
+
+        if not all(_local_keyset(keyfile, x) for x in names):
+            missing.append(outcome)
+            continue
+
+        forget_identity(keyfile.get(outcome['profile'], 'aws_access_key_id'))
+
+        for profile in names:
+            invalidate(profile)
+            keyfile.set(profile, 'aws_access_key_id', outcome['keyset']['AccessKey']['AccessKeyId'])
+            keyfile.set(profile, 'aws_secret_access_key', outcome['keyset']['AccessKey']['SecretAccessKey'])
+
+    backup_keysets(missing, 'Profile keyset not found in local awscli config')
+    return write_keyset(keyfile, keyfile.path, debug)
+
+
+def backup_keysets(outcomes, reason):
+    """
+    Summary:
+        Saves new keysets which could not be installed to the backup
+        location, whatever the BACKUP_ENABLE setting; once the deprecated
+        key is deleted, the backup holds the only copy.  Each rotation is
+        marked failed with the reason given
+
+    Args:
+        :outcomes (list): rotation outcome records of keysets not installed
+        :reason (str): failure reason recorded in each outcome
+
+    Returns:
+        TYPE: bool, every keyset saved
+    """
+    saved = True
+
+    for outcome in outcomes:
+        if write_keyset_backup(keys=dict(outcome['keyset']['AccessKey']), user=outcome['profile'], quiet=True):
+            logger.warning('New keyset %s of %s saved to backup location', outcome['new_key'], outcome['profile'])
+            outcome.update(success=False, reason=reason + '; keyset saved to backup location')
+        else:
+            logger.critical('New keyset %s of %s could not be written', outcome['new_key'], outcome['profile'])
+            outcome.update(success=False, reason=reason)
+            saved = False
+    return saved
+
+
+def retire_deprecated(outcomes, ready, profile=None):
+    """
+    Summary:
+        Deactivates and deletes the deprecated keys of rotations which
+        created the new keyset first.  When the new keysets were not
+        confirmed usable, the deprecated keys are left in service
+
+    Args:
+        :outcomes (list): rotation outcome records
+        :ready (bool): new keysets confirmed usable
+        :profile (str): admin profile conducting surrogate rotations;
+            None when each profile rotates its own keys
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    pending = [x for x in outcomes if x['success'] and x['retire']]
+
+    if pending and not ready:
+        for outcome in pending:
+            logger.warning('New AccessKeyId %s not confirmed active; deprecated access key %s retained',
+                           outcome['new_key'], outcome['deprecated_key'])
+            outcome.update(success=False, reason='New keyset not confirmed; deprecated key retained')
+        return False
+
+    def _retire(outcome):
+        if profile is None:
+            return retire_keyset(outcome['deprecated_key'], outcome['profile'])
+        return retire_keyset(outcome['deprecated_key'], profile, surrogate=outcome['iam_user'])
+
+    for outcome, retired, e in fan_out(_retire, pending):
+        if not retired or e is not None:
+            logger.warning('Deprecated access key %s of %s may not have been deleted properly',
+                           outcome['deprecated_key'], outcome['profile'])
+            outcome.update(success=False, reason=exit_codes['EX_DELETE_FAIL']['Reason'])
+    return all(x['success'] for x in pending)
+
+
+def display_outcomes(outcomes):
+    """
+    Renders per-profile rotation outcome table
+    """
+    x = VeryPrettyTable(border=True, header=True, padding_width=2)
+    x.field_names = [
+        bdwt + 'ProfileName' + frame,
+        bdwt + 'IAM User' + frame,
+        bdwt + 'Deprecated AccessKeyId' + frame,
+        bdwt + 'New AccessKeyId' + frame,
+        bdwt + 'Result' + frame
+    ]
+    for field in x.field_names:
+        x.align[field] = 'l'
+
+    for outcome in outcomes:
+        if outcome['success']:
+            result = gn + 'rotated' + rst + (' (backup location)' if outcome['destination'] == 'backup' else '')
+        else:
+            result = rd + outcome['reason'] + rst
+        x.add_row([
+            rst + outcome['profile'] + frame,
+            rst + outcome['iam_user'] + frame,
+            rst + outcome['deprecated_key'] + frame,
+            rst + outcome['new_key'] + frame,
+            rst + result + frame
+        ])
+
+    print('\n')
+    for line in x.get_string().split('\n'):
+        print('\t'.expandtabs(4) + frame + line)
+    sys.stdout.write(rst + '\n\n')
+    return True
+
+
+def rotate_profiles(profiles, quiet=False, debug=False):
+    """
+    Summary:
+        Rotates access keys for many profiles in one process
+
+    Args:
+        :profiles (list): profile names from the local awscli configuration
+        :quiet (bool): suppress stdout output
+        :debug (bool): write credentials to debug location instead of awscli config
+
+    Returns:
+        profile names for which rotation failed, TYPE: list
+    """
+    # unique profile names, order preserved
+    profiles = list(dict.fromkeys(profiles))
+
+    # check local awscli config for active temporary sts credentials
+    clean_config(quiet=quiet)
+
+    if not quiet:
+        stdout_message('Rotating access keys for {} profiles'.format(bd + str(len(profiles)) + rst))
+
+    # profiles sharing an access key: key rotated once by the first of them
+    keyfile = CredentialsFile(awscli_credentials_file())
+    owners, shared = {}, {}
+
+    for profile in profiles:
+        access_key = keyfile.get(profile, 'aws_access_key_id') if _local_keyset(keyfile, profile) else None
+        if access_key in owners:
+            shared[owners[access_key]].append(profile)
+            logger.info('Profile %s shares access key %s with profile %s', profile, access_key, owners[access_key])
+            continue
+        if access_key:
+            owners[access_key] = profile
+        shared[profile] = []
+
+    outcomes = []
+    for profile, outcome, e in fan_out(functools.partial(rotate_profile, keyfile=keyfile), list(shared)):
+        if e is not None:
+            logger.exception('Unknown error rotating profile %s: %s', profile, e)
+            outcome = _outcome(profile, reason='Unknown error: {}'.format(e))
+        outcome['shared'] = tuple(shared[profile])
+        outcomes.append(outcome)
+
+    rotated = [x for x in outcomes if x['success']]
+
+    if rotated:
+        try:
+            install_keysets(rotated, debug)
+        except OSError as e:
+            logger.exception('Unable to write new keysets: %s', e)
+            backup_keysets([x for x in rotated if x['success']], 'Credentials file write failed')
+
+        # one readiness wait for all new keysets in the batch
+        keysets = [
+            (x['keyset']['AccessKey']['AccessKeyId'], x['keyset']['AccessKey']['SecretAccessKey'])
+            for x in rotated if x['success']
+        ]
+        ready = wait_keyset_enabled(
+            'Enabling {} new keysets... '.format(len(keysets)), quiet=quiet, keysets=keysets) if keysets else True
+        retire_deprecated(rotated, ready)
+
+        # write copy of new keysets to backup location if config file flag set
+        if local_config['KEY_BACKUP']['BACKUP_ENABLE']:
+            for outcome in rotated:
+                if outcome['success']:
+                    write_keyset_backup(keys=outcome['keyset']['AccessKey'], user=outcome['profile'], quiet=quiet)
+
+    # profiles sharing a rotated access key report the outcome of its rotation
+    outcomes = [dict(x, profile=name) for x in outcomes for name in (x['profile'],) + x['shared']]
+
+    for outcome in outcomes:
+        logger.info('Rotation outcome for profile %s: %s',
+                    outcome['profile'], 'SUCCESS' if outcome['success'] else outcome['reason'])
+
+    if not quiet:
+        display_outcomes(outcomes)
+
+    return [x['profile'] for x in outcomes if not x['success']]
+
+
+def rotate_surrogate(username, profile, account):
+    """
+    Summary:
+        IAM portion of a key rotation for an iam user, conducted with the
+        permissions of an admin profile.  Deletes the deprecated access key
+        (if any) and creates its replacement; the local awscli
+        configuration is not modified
+
+    Args:
+        :username (str): iam username whose keys are rotated
+        :profile (str): admin profile name from the local awscli configuration
+        :account (str): AWS account number of the admin profile
+
+    Returns:
+        rotation outcome, TYPE: dict
+    """
+    log = ProfileAdapter(logger, username)
+
+    try:
+        key_metadata, statuscode = query_keyinfo(account, profile, surrogate=username, quiet=True)
+
+        if deferred() and len(key_metadata) > 1:
+            key_metadata = release_slot(key_metadata, profile, surrogate=username)
+
+        deprecated_key = select_deprecated_key(key_metadata, profile, surrogate=username) if key_metadata else ''
+        retire = bool(deprecated_key) and create_first(key_metadata)
+
+        if deprecated_key and not retire:
+            if deferred() and len(key_metadata) < 2:
+                removed = defer_keyset(deprecated_key, profile, surrogate=username)
+            else:
+                removed = delete_keyset(access_key=deprecated_key, profile=profile, surrogate=username)
+
+            if not removed:
+                return _outcome(
+                    username, iam_user=username, account=account, deprecated_key=deprecated_key,
+                    reason=exit_codes['EX_DELETE_FAIL']['Reason']
+                )
+
+        success, keyset = create_keyset(iam_user=username, profile=profile, surrogate=username)
+
+        if not success:
+            return _outcome(
+                username, iam_user=username, account=account, deprecated_key=deprecated_key,
+                reason=exit_codes['EX_CREATE_FAIL']['Reason']
+            )
+
+    except SystemExit as e:
+        # key operations exit when permissions are inadequate
+        log.warning('Rotation aborted (Code: %s)', e.code)
+        return _outcome(username, iam_user=username, reason='Inadequate permissions (Code: {})'.format(e.code))
+
+    log.info('Create request successful. AccessKeyId (%s) created by profile %s',
+             keyset['AccessKey']['AccessKeyId'], profile)
+
+    return _outcome(
+        username, iam_user=username, account=account, deprecated_key=deprecated_key,
+        new_key=keyset['AccessKey']['AccessKeyId'], keyset=keyset, retire=retire, success=True
+    )
+
+
+def read_usernames(path):
+    """
+    Summary:
+        iam usernames from a file; one per line, blank lines and lines
+        beginning with '#' ignored
+
+    Returns:
+        usernames, TYPE: list
+    """
+    with open(path) as f1:
+        return [x.strip() for x in f1 if x.strip() and not x.strip().startswith('#')]
+
+
+def rotate_surrogates(profile, usernames, quiet=False, debug=False):
+    """
+    Summary:
+        Rotates access keys of many iam users from one admin profile.  All
+        users share the admin profile's pooled iam client, so create and
+        delete calls share the account's IAM_WRITE_RATE limit.  New keysets are
+        written to the local awscli profile of the same name as the iam
+        user, or to the backup location when no such profile exists
+
+    Args:
+        :profile (str): admin profile name from the local awscli configuration
+        :usernames (list): iam usernames whose keys are rotated
+        :quiet (bool): suppress stdout output
+        :debug (bool): write credentials to debug location instead of awscli config
+
+    Returns:
+        iam usernames for which rotation failed, TYPE: list
+    """
+    # unique usernames, order preserved
+    usernames = list(dict.fromkeys(usernames))
+
+    # check local awscli config for active temporary sts credentials
+    clean_config(quiet=quiet)
+
+    iam_user, account = map_identity(profile)
+
+    if iam_user is None:
+        logger.warning('Expired or invalid credentials for admin profile %s', profile)
+        return usernames
+
+    if not quiet:
+        stdout_message('Rotating access keys for {} iam users as {}'.format(
+            bd + str(len(usernames)) + rst, bd + iam_user + rst))
+
+    outcomes = []
+
+    for username, outcome, e in fan_out(functools.partial(
+            rotate_surrogate, profile=profile, account=account), usernames):
+        if e is not None:
+            logger.exception('Unknown error rotating iam user %s: %s', username, e)
+            outcome = _outcome(username, iam_user=username, reason='Unknown error: {}'.format(e))
+        outcomes.append(outcome)
+
+    rotated = [x for x in outcomes if x['success']]
+    keyfile = CredentialsFile(awscli_credentials_file())
+
+    for outcome in rotated:
+        outcome['destination'] = 'awscli' if _local_keyset(keyfile, outcome['profile']) else 'backup'
+
+    local = [x for x in rotated if x['destination'] == 'awscli']
+    if local:
+        try:
+            install_keysets(local, debug)
+        except OSError as e:
+            logger.exception('Unable to write new keysets: %s', e)
+            backup_keysets([x for x in local if x['success']], 'Credentials file write failed')
+
+    # iam users without a local profile: the backup location holds the only copy
+    for outcome in rotated:
+        if outcome['destination'] == 'backup':
+            if not write_keyset_backup(keys=dict(outcome['keyset']['AccessKey']), user=outcome['profile'], quiet=True):
+                logger.critical('New keyset %s of iam user %s could not be written', outcome['new_key'], outcome['profile'])
+                outcome.update(success=False, reason='Backup location write failed')
+
+    keysets = [
+        (x['keyset']['AccessKey']['AccessKeyId'], x['keyset']['AccessKey']['SecretAccessKey'])
+        for x in rotated if x['success']
+    ]
+    ready = wait_keyset_enabled(
+        'Enabling {} new keysets... '.format(len(keysets)), quiet=quiet, keysets=keysets) if keysets else True
+    retire_deprecated(rotated, ready, profile=profile)
+
+    # write copy of new keysets to backup location if config file flag set
+    if local_config['KEY_BACKUP']['BACKUP_ENABLE']:
+        for outcome in local:
+            if outcome['success']:
+                write_keyset_backup(keys=dict(outcome['keyset']['AccessKey']), user=outcome['profile'], quiet=quiet)
+
+    for outcome in outcomes:
+        logger.info('Rotation outcome for iam user %s: %s',
+                    outcome['profile'], 'SUCCESS' if outcome['success'] else outcome['reason'])
+
+    if not quiet:
+        display_outcomes(outcomes)
+
+    return [x['profile'] for x in outcomes if not x['success']]
@@ -0,0 +1,211 @@
+"""
+Summary:
+    Persistent cache module.  Stores small json documents with expiration
+    under the local keyup configuration directory (~/.config/keyup/cache)
+    so that results which rarely change survive between keyup invocations.
+
+Module Functions:
+    - flush_caches:
+        Writes pending entries of every cache to disk; runs at exit
+    - cache_enabled:
+        Determines if persistent caching enabled in local configuration
+    - cache_ttl:
+        Expiration period (seconds) of a cache from local configuration
+    - key_digest:
+        Irreversible digest of an access key for use as a cache key
+
+Module Classes:
+    - DiskCache:
+        Thread-safe, TTL'd json cache persisted to a single file.  Writes
+        are buffered in memory and flushed once per run
+
+"""
+import os
+import json
+import time
+import atexit
+import hashlib
+import tempfile
+import weakref
+import threading
+from keyup.statics import local_config, cache_dir, cache_defaults
+from keyup import logger
+
+
+# caches with writes pending; flushed at exit
+_caches = weakref.WeakSet()
+
+
+def flush_caches():
+    """
+    Summary:
+        Writes pending entries of every cache to disk, one file write per
+        cache.  Registered to run at interpreter exit
+
+    Returns:
+        TYPE: bool, True if every cache was written
+    """
+    return all([cache.flush() for cache in list(_caches)])
+
+
+atexit.register(flush_caches)
+
+
+def cache_enabled():
+    """
+    Returns:
+        True if persistent caching enabled, TYPE: bool
+    """
+    return local_config.get('CACHE', {}).get('ENABLE', cache_defaults['ENABLE'])
+
+
+def cache_ttl(parameter):
+    """
+    Summary:
+        Expiration period of a cache; configuration files written before
+        the CACHE section existed fall back to defaults
+
+    Args:
+        :parameter (str): CACHE section parameter name, eg IDENTITY_TTL
+
+    Returns:
+        seconds, TYPE: int
+    """
+    return int(local_config.get('CACHE', {}).get(parameter, cache_defaults[parameter]))
+
+
+def key_digest(access_key):
+    """
+    Summary:
+        Access key ids are never written to disk; caches are keyed
+        by a digest of the key id instead
+
+    Returns:
+        sha256 hex digest, TYPE: str
+    """
+    return hashlib.sha256(access_key.encode('utf-8')).hexdigest()
+
+
+class DiskCache():
+    """
+        TTL'd key, value cache persisted as json under the keyup cache
+        directory.  Expired entries are discarded when read.  Entries set
+        or deleted are held in memory until flush(), which merges them with
+        entries written by concurrent keyup processes in a single write
+
+    Args:
+        - **name (str)**: cache name; file name of the cache on disk
+        - **ttl (int)**: default entry expiration period (seconds)
+    """
+    def __init__(self, name, ttl, path=None):
+        self.name = name
+        self.ttl = ttl
+        self.path = path or os.path.join(cache_dir, name + '.json')
+        self.lock = threading.Lock()
+        self.entries = None
+        self.pending = {}
+        self.removed = set()
+        _caches.add(self)
+
+    def _load(self):
+        """ read cache file from disk; unreadable caches start empty """
+        try:
+            with open(self.path) as f1:
+                entries = json.load(f1)
+            if not isinstance(entries, dict):
+                entries = {}
+        except (OSError, ValueError):
+            entries = {}
+        return entries
+
+    def _write(self, entries):
+        """ atomic replace of the cache file, readable only by the user """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmpfile = None
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory, mode=0o700)
+            # unique temporary file; concurrent keyup processes never share one
+            fd, tmpfile = tempfile.mkstemp(prefix='.' + self.name + '-', dir=directory)
+            with os.fdopen(fd, 'w') as f1:
+                json.dump(entries, f1, indent=4, sort_keys=True)
+            os.replace(tmpfile, self.path)
+        except OSError as e:
+            logger.warning(
+                'Unable to write %s cache (%s). Error: %s',
+                self.name, self.path, e)
+            if tmpfile and os.path.exists(tmpfile):
+                os.remove(tmpfile)
+            return False
+        return True
+
+    def get(self, key, default=None):
+        """
+        Returns:
+            cached value, or default when missing or expired
+        """
+        if not cache_enabled():
+            return default
+
+        with self.lock:
+            if self.entries is None:
+                self.entries = self._load()
+            entry = self.entries.get(key)
+
+        if entry is None or entry.get('expires', 0) < time.time():
+            return default
+        return entry.get('value', default)
+
+    def set(self, key, value, ttl=None):
+        """ stores value for ttl seconds; written to disk by flush() """
+        if not cache_enabled():
+            return False
+
+        with self.lock:
+            if self.entries is None:
+                self.entries = self._load()
+            entry = {
+                'value': value,
+                'expires': time.time() + (self.ttl if ttl is None else ttl)
+            }
+            self.entries[key] = self.pending[key] = entry
+            self.removed.discard(key)
+        return True
+
+    def delete(self, key):
+        """ removes a single entry; returns True if an entry was removed """
+        with self.lock:
+            if self.entries is None:
+                self.entries = self._load()
+            self.pending.pop(key, None)
+            if self.entries.pop(key, None) is None:
+                return False
+            self.removed.add(key)
+        return True
+
+    def flush(self):
+        """
+        Summary:
+            Writes pending changes to disk, merged with entries written by
+            concurrent keyup processes; expired entries are dropped
+
+        Returns:
+            TYPE: bool, Success | Failure; True when nothing is pending
+        """
+        with self.lock:
+            if not self.pending and not self.removed:
+                return True
+
+            now = time.time()
+            entries = self._load()
+            entries.update(self.pending)
+            entries = {
+                k: v for k, v in entries.items()
+                if k not in self.removed and v.get('expires', 0) >= now
+            }
+            if not self._write(entries):
+                return False
+
+            self.entries = entries
+            self.pending, self.removed = {}, set()
+        return True
@@ -1,13 +1,30 @@
 """
 Key Report Generation Module:
     - Centralized authentication module for producing Key Report
-    - Uses threading for concurrent processing
+    - Uses a bounded pool of worker threads for concurrent processing
 
 Module Functions:
     - convert:
         Converts time units to hours
     - discover_account_affiliations:
         maps awscli profile users to corresponding iam user ids
+    - report_key:
+        status, creation date of the access key reported for an iam user
+    - profile_keydata:
+        identity, key metadata and account alias for one profile
+    - prepare_reportdata:
+        queries all profiles concurrently, queues each profile's record
+        as it completes
+    - report_records:
+        report records read from the queue as they arrive
+    - credential_report:
+        rows of the iam credential report of an account, parsed as a stream
+    - fleet_keydata:
+        key metadata of every iam user in an account
+    - prepare_fleetdata:
+        queues key metadata of every iam user in the account of a profile
+    - render_report:
+        renders the key report to cli stdout row by row
     - expired_keys:
         determines if an access keyset is aged beyond max age value in
         keyup's configuration file
@@ -16,24 +33,30 @@ Module Functions:
 """
 
 import os
+import io
 import sys
+import csv
+import time
 import datetime
-import inspect
 import pytz
 import unicodedata
 from botocore.exceptions import ClientError
+from botocore.utils import parse_timestamp
 
 # 3rd party
 from veryprettytable import VeryPrettyTable
-from pyaws.session import boto3_session
+from keyup.sessions import boto3_session
 from libtools.js import export_iterobject
 from libtools import stdout_message
 from libtools import Colors
 from keyup.iam_operations import local_profilenames
-from keyup.map import map_identity
+from keyup.map import account_alias, map_identity
+from keyup.cache import cache_ttl
 from keyup.vault import KEYAGE_MAX
 from keyup.colormap import ColorMap
 from keyup.statics import local_config
+from keyup.workers import fan_out, stream
+from keyup.logd import ProfileAdapter
 from keyup import keyconfig, logger, container
 
 
@@ -74,6 +97,16 @@ tablespec = {
     'field_max_width': 70
 }
 
+# end of the record stream queued by prepare_reportdata, prepare_fleetdata
+REPORT_END = None
+
+# credential report generation: seconds between polls, max polls
+REPORT_POLL_INTERVAL = 2
+REPORT_POLL_MAX = 30
+
+# access key columns of the iam credential report
+CREDENTIAL_REPORT_KEYS = ('access_key_1', 'access_key_2')
+
 column_widths = {
     'ProfileName': 16,
     'iam_user': 14,
@@ -109,11 +142,14 @@ def convert(dt):
         return (expiration_date - now).seconds / 3600
 
 
-def discover_account_affiliations():
+def discover_account_affiliations(profiles=None):
     """
         Associates each profile name in local awscli configuration
         to an iam username and an AWS Account Number
 
+    Args:
+        :profiles (list): profile names; default all profiles in local awscli config
+
     Returns:
         affiliation info, TYPE: dict
 
@@ -129,15 +165,12 @@ def discover_account_affiliations():
     """
     affiliations = {}
 
-    for profile in local_profilenames():
-        try:
-            iam_user, aws_account = map_identity(profile)
-            affiliations[profile] = {'iam_user': iam_user, 'account': aws_account}
-        except ClientError:
-            fname = inspect.stack()[0][3]
-            logger.info(
-                '{}: Unable to locate aws account for profile {}'.format(fname, profile))
+    for profile, identity, e in fan_out(map_identity, profiles or local_profilenames()):
+        if e is not None:
+            logger.info('Unable to locate aws account for profile %s', profile)
             continue
+        iam_user, aws_account = identity
+        affiliations[profile] = {'iam_user': iam_user, 'account': aws_account}
     return affiliations
 
 
@@ -246,11 +279,11 @@ def _postprocessing():
     return True
 
 
-def setup_table(user_data, exception_list):
+def report_table():
     """
-    Renders Table containing data elements via cli stdout
+    Returns:
+        empty key report table with fixed column widths, TYPE: VeryPrettyTable
     """
-    # setup table
     x = VeryPrettyTable(
             border=tablespec['border'],
             header=tablespec['header'],
@@ -273,7 +306,7 @@ def setup_table(user_data, exception_list):
     x.max_width[bdwt + 'CreateDate' + frame] = column_widths['CreateDate']
     x.max_width[bdwt + 'Time Remaining' + frame] = column_widths['time_remaining']
 
-    # cell min = max width
+    # cell min = max width; column widths independent of row content
     x.min_width[bdwt + 'ProfileName' + frame] = x.max_width[bdwt + 'ProfileName' + frame]
     x.min_width[bdwt + 'IAM User' + frame] = x.max_width[bdwt + 'IAM User' + frame]
     x.min_width[bdwt + 'AWS AccountId' + frame] = x.max_width[bdwt + 'AWS AccountId' + frame]
@@ -287,61 +320,124 @@ def setup_table(user_data, exception_list):
     x.align[bdwt + 'CreateDate' + frame] = 'c'
     x.align[bdwt + 'Time Remaining' + frame] = 'c'
     x.align[bdwt + 'Status' + frame] = 'c'
+    return x
+
+
+def format_row(k, v):
+    """
+    Summary:
+        Table cells for one profile, colored by key age
+
+    Args:
+        :k (str): profile name
+        :v (dict): report record from profile_keydata
+
+    Returns:
+        table row, TYPE: list
+    """
+    dt = v['CreateDate']
+    expired = expired_keys(v['CreateDate'])
+    _days = time_remaining(dt)
+    k = truncate_fields(k)
+    v = truncate_fields(dict(v))
+
+    if not expired and (0 <= _days < KEYAGE_WARNING):
+        # close to expiration, warning
+        profilename = yl + k + rst
+        user = yl + v['iam_user'] + rst
+        accountId = yl + v['account'] + rst
+        createdate = yl + dt.strftime('%b %d, %Y %H:%M UTC') + rst
+        remaining = yl + str(_days) + ' days' + rst if _days > 1 else yl + str(_days) + ' day' + rst
+        status = yl + cmark + rst
+
+        # < 1 day remains; calculate hours remaining
+        if _days == 0:
+            remaining = yl + str(int(round(convert(dt)))) + ' hrs' + spacing(int(round(convert(dt)))) + rst
+
+    else:
+        #  key credentials are either expired (age > KEYAGE_MAX) or valid
+        profilename = cm.brd + k + rst if expired else k
+        user = cm.brd + v['iam_user'] + rst if expired else v['iam_user']
+        accountId = cm.brd + v['account'] + rst if expired else v['account']
+        createdate = cm.brd + dt.strftime('%b %d, %Y %H:%M UTC') + rst if expired else dt.strftime('%b %d, %Y %H:%M UTC')
+        remaining = format_remaining(_days)
+        status = (cm.brd + xmark + rst if expired else gn + bd + cmark + rst)
+
+        if _days == 1:
+            remaining = str(_days) + ' day'
+
+    return [
+        rst + profilename + frame,
+        rst + user + frame,
+        rst + accountId + frame,
+        rst + createdate + frame,
+        rst + remaining + frame,
+        rst + status + frame
+    ]
+
+
+def render_report(records, tabspaces=4):
+    """
+    Summary:
+        Renders the key report via cli stdout one row at a time, as each
+        profile record arrives.  Column widths are fixed, so each row is
+        printed without waiting for the rest of the report
+
+    Args:
+        :records (iterable): (profile, record, exception) tuples in the
+            order they are to be displayed; see report_records
+        :tabspaces (int): left offset of the table
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    source_globals()
+
+    indent = ('\t').expandtabs(tabspaces)
+    x = report_table()
+    x.add_row([''] * len(x.field_names))           # min widths apply to tables with rows
+    border = x.get_string().split('\n')           # top, header, separator, row, bottom
+    del border[-2]
+    exceptions = []
 
-    # populate table
-    for k, v in user_data.items():
-
-            dt = v['CreateDate']
-            expired = expired_keys(v['CreateDate'])
-            _days = time_remaining(dt)
-            k = truncate_fields(k)
-            v = truncate_fields(v)
-
-            if not expired and (0 <= _days < KEYAGE_WARNING):
-                # close to expiration, warning
-                profilename = yl + k + rst
-                user = yl + v['iam_user'] + rst
-                accountId = yl + v['account'] + rst
-                createdate = yl + dt.strftime('%b %d, %Y %H:%M UTC') + rst
-                remaining = yl + str(_days) + ' days' + rst if _days > 1 else yl + str(_days) + ' day' + rst
-                status = yl + cmark + rst
-
-                # < 1 day remains; calculate hours remaining
-                if _days == 0:
-                    remaining = yl + str(int(round(convert(dt)))) + ' hrs' + spacing(int(round(convert(dt)))) + rst
-
-            else:
-                #  key credentials are either expired (age > KEYAGE_MAX) or valid
-                profilename = cm.brd + k + rst if expired else k
-                user = cm.brd + v['iam_user'] + rst if expired else v['iam_user']
-                accountId = cm.brd + v['account'] + rst if expired else v['account']
-                createdate = cm.brd + dt.strftime('%b %d, %Y %H:%M UTC') + rst if expired else dt.strftime('%b %d, %Y %H:%M UTC')
-                remaining = format_remaining(_days)
-                status = (cm.brd + xmark + rst if expired else gn + bd + cmark + rst)
-
-                if _days == 1:
-                    remaining = str(_days) + ' day'
-
-            x.add_row(
-                [
-                    rst + profilename + frame,
-                    rst + user + frame,
-                    rst + accountId + frame,
-                    rst + createdate + frame,
-                    rst + remaining + frame,
-                    rst + status + frame
-                ]
-            )
-
-    # Table
     vtab_int = 9
     vtab = '\t'.expandtabs(vtab_int)
     msg = '{}AWS Identity Access Key Expiration Report{}{}|{}'.format(btext, rst + frame, vtab, rst)
     print_header(title=msg, indent=10, spacing=vtab_int)
-    display_table(x, exception_list, tabspaces=4)
+
+    for e in border[:-1]:
+        print(indent + frame + e)
+    sys.stdout.flush()
+
+    for profile, record, e in records:
+        if e is not None:
+            exceptions.append(profile)
+            continue
+        elif record is None:
+            continue
+
+        x.clear_rows()
+        x.add_row(format_row(profile, record))
+        for line in x.get_string().split('\n')[len(border) - 1:-1]:
+            print(indent + frame + line)
+        sys.stdout.flush()
+
+    print(indent + frame + border[-1])
+    sys.stdout.write(Colors.RESET + '\n')
+    display_skipped(exceptions) if exceptions else print('')
+    sys.stdout.write(Colors.RESET + '\n\n')
     return _postprocessing()
 
 
+def setup_table(user_data, exception_list):
+    """
+    Renders Table containing data elements via cli stdout
+    """
+    records = [(k, v, None) for k, v in user_data.items()]
+    records.extend((x, None, Exception(x)) for x in exception_list)
+    return render_report(records)
+
+
 def source_globals():
     """
     global environment variable definitions
@@ -366,83 +462,284 @@ def truncate_fields(element):
     return element[:column_widths['ProfileName']]
 
 
-def prepare_reportdata(debug=False):
+def report_key(keys):
+    """
+    Summary:
+        Access key which determines the report row of an iam user: the
+        oldest active key; users without an active key are reported with
+        their oldest inactive key
+
+    Args:
+        :keys (list): (active, CreateDate) of each access key of the user
+
+    Returns:
+        (status, CreateDate), TYPE: tuple
+    """
+    active = [dt for status, dt in keys if status]
+    return ('Active' if active else 'Inactive'), min(active or [dt for status, dt in keys])
+
+
+def profile_keydata(profile):
+    """
+        Collects identity, access key metadata and account alias for a
+        single profile.  Executed concurrently by prepare_reportdata
+
+    Args:
+        :profile (str): profile name from the local awscli configuration
+
+    Returns:
+        report record, TYPE: dict | None when the account cannot be located
+
+    Raises:
+        ClientError when key metadata cannot be listed for the profile
+    """
+    log = ProfileAdapter(logger, profile)
+
+    try:
+        iam_user, account = map_identity(profile)
+    except ClientError:
+        log.info('Unable to locate aws account')
+        return None
+
+    client = boto3_session(service='iam', profile=profile)
+    key_metadata = client.list_access_keys()['AccessKeyMetadata']
+
+    # human readable name of the account
+    alias = account_alias(account, client=client)
+    accountId = alias or account
+
+    log.info('IAM User %s key info found for AWS account %s', key_metadata[0]['UserName'], accountId)
+
+    status, created = report_key([(x['Status'] == 'Active', x['CreateDate']) for x in key_metadata])
+
+    return {
+        'account': accountId,
+        'account_id': account,
+        'alias': alias,
+        'iam_user': key_metadata[0]['UserName'],
+        'access_key_ids': [x['AccessKeyId'] for x in key_metadata],
+        'status': status,
+        'CreateDate': created
+    }
+
+
+def report_records(source):
     """
-        Prints out key expiration info for all profilenames associated with
-        the primary profilename given to access the account information
+    Summary:
+        Report records from the queue filled by prepare_reportdata, yielded
+        as they arrive until the end of the report
+
+    Args:
+        :source (queue.Queue): output queue given to prepare_reportdata
 
+    Yields:
+        (profile, record, exception), TYPE: tuple
+    """
+    while True:
+        item = source.get()
+        if item is REPORT_END:
+            return
+        yield item
+
+
+def prepare_reportdata(output=container, debug=False):
+    """
+        Queries key expiration info for all profilenames in the local awscli
+        configuration.  Profiles are queried concurrently by a bounded pool
+        of workers; each profile's record is queued as soon as it completes
+
+    Args:
+        :output (queue.Queue): receives one (profile, record, exception)
+            tuple per profile in order of completion, then REPORT_END
+        :debug (bool): debug flag
+
+    Returns:
+        TYPE: bool, Success | Failure
     """
-    debug = False
     try:
 
         source_globals()
 
     except KeyError:
         # remove offending configuration file, then recreate
+        output.put(REPORT_END)
         if os.path.exists(local_config['PROJECT']['CONFIG_PATH']):
             os.remove(local_config['PROJECT']['CONFIG_PATH'])
         return keyconfig.option_configure(False, local_config['PROJECT']['CONFIG_PATH'])
 
-    data, aliases = {}, {}
-    exceptions = []
-    affiliations = discover_account_affiliations()
+    try:
+        for profile, record, e in stream(profile_keydata, local_profilenames()):
+            if e is not None:
+                logger.info('Unable to list key info for profile %s. Error %s', profile, e)
+            elif record is not None and debug:
+                stdout_message(
+                    message='Key information received for profile {}'.format(bd + profile + rst),
+                    prefix='OK'
+                )
+
+            # Queue Operations
+            output.put((profile, record, e))
+    finally:
+        output.put(REPORT_END)
+    return True
 
-    if debug:
-        export_iterobject(affiliations)
 
-    for k, v in affiliations.items():
+def credential_report(client):
+    """
+    Summary:
+        Rows of the iam credential report of an account.  A report younger
+        than CREDENTIAL_REPORT_TTL is reused; otherwise a new report is
+        generated.  The report is decoded and parsed one row at a time
 
-        account = v['account']
+    Args:
+        :client (boto3 client): iam client of a profile permitted to
+            generate and get credential reports
 
-        try:
-            r = None
-            client = boto3_session(service='iam', profile=k)
-            r = client.list_access_keys()
-            key_metadata = r['AccessKeyMetadata']
+    Returns:
+        credential report rows, TYPE: csv.DictReader
 
-            if debug:
-                stdout_message(
-                    message='Key information received for profile {}'.format(bd + k + rst),
-                    prefix='OK'
-                )
+    Raises:
+        ClientError when the profile is not permitted to generate or get
+        credential reports; TimeoutError when generation does not complete
+    """
+    report = None
+
+    try:
+        report = client.get_credential_report()
+        generated = report['GeneratedTime'].astimezone(pytz.UTC)
+        age = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC) - generated
+
+        if age.total_seconds() > cache_ttl('CREDENTIAL_REPORT_TTL'):
+            logger.info('Credential report generated %s is stale; regenerating', generated)
+            report = None
+
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('ReportNotPresent', 'ReportExpired', 'ReportInProgress'):
+            raise
+
+    if report is None:
+        for _ in range(REPORT_POLL_MAX):
+            if client.generate_credential_report()['State'] == 'COMPLETE':
+                break
+            time.sleep(REPORT_POLL_INTERVAL)
+        else:
+            raise TimeoutError('Credential report generation did not complete')
+        report = client.get_credential_report()
 
-        except ClientError as e:
-            fname = inspect.stack()[0][3]
-            logger.info('{}: Unable to list key info for profile {}. Error {}'.format(fname, k, e))
-            exceptions.append(k)
+    return csv.DictReader(io.TextIOWrapper(io.BytesIO(report['Content']), encoding='utf-8', newline=''))
+
+
+def _report_keys(row):
+    """
+    Returns:
+        (active, last rotated) of each access key in a credential report
+        row, TYPE: list
+    """
+    keys = []
+    for prefix in CREDENTIAL_REPORT_KEYS:
+        rotated = row.get(prefix + '_last_rotated', 'N/A')
+        if rotated in ('N/A', 'not_supported', ''):
             continue
+        keys.append((row[prefix + '_active'] == 'true', parse_timestamp(rotated)))
+    return keys
 
-        try:
 
-            if aliases.get(account):
-                alias = aliases[account]
-            else:
-                # human readable name of the account
-                alias = client.list_account_aliases()['AccountAliases'][0]
+def _fleet_record(user, keys, account, alias, key_ids=()):
+    """
+    Summary:
+        Report record of one iam user in the format of profile_keydata
 
-                # store identified aliases
-                aliases[account] = alias
+    Args:
+        :keys (list): (active, CreateDate) of each access key of the user
+    """
+    status, created = report_key(keys)
+    return {
+        'account': alias or account,
+        'account_id': account,
+        'alias': alias,
+        'iam_user': user,
+        'access_key_ids': list(key_ids),
+        'status': status,
+        'CreateDate': created
+    }
 
-        except ClientError:
-            alias = ''
-        except IndexError:
-            alias = account
 
-        accountId = alias or account
-        iam_user = key_metadata[0]['UserName']
-        status = key_metadata[0]['Status']
-        metadata = key_metadata[0]['CreateDate']
+def _user_keys(client, user):
+    """ (active, CreateDate) and AccessKeyId of each access key of an iam user """
+    metadata = client.list_access_keys(UserName=user)['AccessKeyMetadata']
+    return [(x['Status'] == 'Active', x['CreateDate']) for x in metadata], [x['AccessKeyId'] for x in metadata]
 
-        data[k] = {
-            'account': accountId,
-            'iam_user': iam_user,
-            'status': status,
-            'CreateDate': metadata
-        }
 
-        logger.info('IAM User {} key info found for AWS account {}'.format(iam_user, accountId))
+def fleet_keydata(profile):
+    """
+    Summary:
+        Key metadata of every iam user in the account of a profile, from a
+        single iam credential report.  Falls back to listing users and
+        their access keys when the profile is not permitted to use
+        credential reports
+
+    Args:
+        :profile (str): profile name of an iam user with account-wide
+            iam read permissions
+
+    Yields:
+        (iam user, record, exception), TYPE: tuple; users without
+        access keys are omitted
+    """
+    iam_user, account = map_identity(profile)
+    client = boto3_session(service='iam', profile=profile)
+    alias = account_alias(account, client=client)
+
+    try:
+        rows = credential_report(client)
+    except (ClientError, TimeoutError) as e:
+        logger.info('Credential report unavailable for profile %s (%s); listing users', profile, e)
+        rows = None
+
+    if rows is not None:
+        for row in rows:
+            keys = _report_keys(row)
+            if keys and row['user'] != '<root_account>':
+                yield row['user'], _fleet_record(row['user'], keys, account, alias), None
+        return
+
+    def _keydata(user):
+        keys, key_ids = _user_keys(client, user)
+        return _fleet_record(user, keys, account, alias, key_ids) if keys else None
+
+    users = [x['UserName'] for page in client.get_paginator('list_users').paginate() for x in page['Users']]
+    for user, record, e in stream(_keydata, users):
+        if record is not None or e is not None:
+            yield user, record, e
+
+
+def prepare_fleetdata(profile, output=container):
+    """
+        Queries key expiration info for every iam user in the account of a
+        profile.  Records are queued in the format of prepare_reportdata,
+        keyed by iam user name, so the same renderers apply
+
+    Args:
+        :profile (str): profile name of an iam user with account-wide
+            iam read permissions
+        :output (queue.Queue): receives one (iam user, record, exception)
+            tuple per iam user, then REPORT_END
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    try:
+        source_globals()
+        for user, record, e in fleet_keydata(profile):
+            if e is not None:
+                logger.info('Unable to list key info for iam user %s. Error %s', user, e)
+            output.put((user, record, e))
+
+    except ClientError as e:
+        logger.warning('Unable to list iam users of account for profile %s. Error %s', profile, e)
+        output.put((profile, None, e))
+        return False
 
-        # Queue Operations
-        container.put((data, exceptions))
+    finally:
+        output.put(REPORT_END)
     return True
-    #return data, exceptions
@@ -26,36 +26,25 @@ Dependencies:
 
 import os
 import sys
-import pdb
 import platform
 import datetime
 from time import sleep
-from configparser import ConfigParser
 import argparse
-import inspect
-import subprocess
+import queue
 import time
+import functools
 import threading
-import boto3
-from prompt_toolkit.shortcuts import ProgressBar
-from botocore.exceptions import ClientError
-from libtools import Colors
-from libtools import stdout_message
-from libtools.js import export_iterobject
-from pyaws.session import authenticated, boto3_session
-from keyup.statics import PACKAGE, local_config
+from keyup.colors import Colors
+from keyup.statics import PACKAGE, ensure_directory, local_config
 from keyup.help_menu import menu_body
-from keyup.map import map_identity, map_iam_username
-from keyup.list_ops import list_keys
-from keyup.iam_operations import local_profilenames
-from keyup.cauth import prepare_reportdata, setup_table
-from keyup.progress_main import ProgressBarMain
-from keyup.thread_progress import custom_formatters, style
-from keyup import about, container, logger, keyconfig, __version__
+from keyup.credentials import CredentialsFile, snapshot
+from keyup import container, logger, __version__
+
+# boto3, botocore, prompt_toolkit, libtools and modules built on them are
+# imported by the functions which use them; --help, --version start without them
 
 
 # global objects
-config = ConfigParser()
 c = Colors()
 
 
@@ -63,7 +52,7 @@ try:
     from keyup.oscodes_unix import exit_codes
     os_type = 'Linux'
     splitchar = '/'                             # character for splitting paths (linux)
-    text = c.BRIGHT_CYAN
+    text = c.BRIGHTCYAN
 except Exception:
     from keyup.oscodes_win import exit_codes    # non-specific os-safe codes
     os_type = 'Windows'
@@ -76,7 +65,7 @@ def help_menu():
     Displays help menu contents
     """
     print(
-        c.BOLD + c.BRIGHT_WHITE +
+        c.BOLD + c.BRIGHTWHITE +
         '\n\t'.expandtabs(27) + PACKAGE + c.RESET + ' command help'
         )
     print(menu_body)
@@ -86,28 +75,31 @@ def help_menu():
 def get_current_key(profile_name, surrogate=''):
     """
         Extracts the STS AccessKeyId currently utilised in user's
-        profile in the local awscli configuration
+        profile in the local awscli configuration.  Resolved in-process
+        from the parsed credentials snapshot; the awscli config file is
+        consulted when the credentials file holds no key for the profile
 
     Args:
         profile_name:  a username in local awscli profile
     Returns:
-        key_id (str): Amazon STS AccessKeyId
-    Raises:
-        Exception if profile_name not found in config
+        key_id (str): Amazon STS AccessKeyId; empty str if not found
     """
     if surrogate:
         profile_name = surrogate
-    #
-    awscli = 'aws'
-    cmd = 'type ' + awscli + ' 2>/dev/null'
-    if subprocess.getoutput(cmd):
-        cmd = awscli + ' configure get ' + profile_name + '.aws_access_key_id'
-    try:
-        key_id = subprocess.getoutput(cmd)
-    except Exception as e:
-        logger.exception(
-            '%s: Failed to identify AccessKeyId used in %s profile. Error: %s' %
-            (inspect.stack()[0][3], profile_name, str(e)))
+
+    parsed, credentials_file = parse_awscli()
+    key_id = parsed.get(profile_name, 'aws_access_key_id')
+
+    if not key_id:
+        config_file = os.environ.get('AWS_CONFIG_FILE') or os.path.join(
+            os.path.dirname(credentials_file), 'config')
+        section = profile_name if profile_name == 'default' else 'profile ' + profile_name
+        key_id = snapshot(config_file).get(section, 'aws_access_key_id')
+
+    if not key_id:
+        logger.warning(
+            'Failed to identify AccessKeyId used in %s profile',
+            profile_name)
         return ''
     return key_id
 
@@ -142,9 +134,7 @@ def clean_config(quiet):
         Test local awscli config for Active temporary credentails
 
     Args:
-        :credentials_file (str): location of local awscli credentials file
-        :config (configParser obj): GLOBAL object representing parsed awscli
-         credentials file
+        :quiet (bool): suppress stdout output
     Returns:
         TYPE: bool, Success | Failure
 
@@ -156,72 +146,70 @@ def clean_config(quiet):
         If parsed_config contains **inactive credentials**, ``clean_config`` returns
         ``bool True`` and key rotation proceeds
     """
+    from libtools import stdout_message
+    from keyup.temporary import active_profile
+
     parsed_config, credentials_file = parse_awscli()
-    logger.info('Parsing local awscli credentails file: %s' % credentials_file)
-    counter = 0
+    logger.info('Parsing local awscli credentails file: %s', credentials_file)
 
-    for profile in parsed_config.sections():
-        if 'aws_security_token' in parsed_config[profile].keys():
+    temporary = [x for x in parsed_config.temporary_profiles if 'aws_security_token' in parsed_config[x]]
+    logger.info('Temporary credentials found in profiles %s', temporary)
 
-            logger.info('Temporary credentials found in profile %s' % profile)
+    # expired credentials classified offline; remainder probed concurrently
+    profile = active_profile(parsed_config, temporary)
 
-            # test authentication
-            if authenticated(profile):
-                if quiet is False:
-                    msg = ("""Active temporary credentials found in profile %s.
+    if profile:
+        if quiet is False:
+            msg = ("""Active temporary credentials found in profile %s.
              Key refresh prohibited. Exit (Code: %d)
                     """ % (profile, exit_codes['EX_CONFIG']['Code']))
-                    stdout_message(msg, 'WARN')
-                logger.info('Status of temporary credentials is: ACTIVE.')
-                logger.info('Exit (Code: %d)' % exit_codes['EX_CONFIG']['Code'])
-                sys.exit(exit_codes['EX_CONFIG']['Code'])
-            else:
-                counter += 1     # increment for denied auth
-        if counter >= 2:
-            break
+            stdout_message(msg, 'WARN')
+        logger.info('Status of temporary credentials is: ACTIVE.')
+        logger.info('Exit (Code: %d)', exit_codes['EX_CONFIG']['Code'])
+        sys.exit(exit_codes['EX_CONFIG']['Code'])
     logger.info('Config determined clean')
     return True
 
 
-def parse_awscli():
+def awscli_credentials_file():
     """
-        Parse, update local awscli config credentials
+        Location of the local awscli credentials file
 
-    Args:
-        :user (str):  USERNAME, only required when run on windows os
     Returns:
-        TYPE: configparser object, parsed config file
+        TYPE: str, os dependent path to awscli credentials file
     """
     OS = platform.system()
     if OS == 'Linux':
         HOME = os.environ['HOME']
         default_credentials_file = HOME + '/.aws/credentials'
         alt_credentials_file = shared_credentials_location()
-        awscli_file = alt_credentials_file or default_credentials_file
+        return alt_credentials_file or default_credentials_file
     elif OS == 'Windows':
         win_username = os.getenv('username')
         default_credentials_file = 'C:\\Users\\' + win_username + '\\.aws\\credentials'
         alt_credentials_file = shared_credentials_location()
-        awscli_file = alt_credentials_file or default_credentials_file
+        return alt_credentials_file or default_credentials_file
     else:
         logger.warning('Unsupported OS. Exit')
         logger.warning(exit_codes['E_ENVIRONMENT']['Reason'])
         sys.exit(exit_codes['E_ENVIRONMENT']['Code'])
 
-    try:
-        if os.path.isfile(awscli_file):
-            # parse config
-            config.read(awscli_file)
-        else:
-            logger.info(
-                'awscli credentials file [%s] not found. Abort' % awscli_file
-            )
-            raise OSError
-    except Exception as e:
-        logger.exception(
-            '%s: problem parsing local awscli config file %s' %
-            (inspect.stack()[0][3], awscli_file))
-    return config, awscli_file
+
+def parse_awscli():
+    """
+        Parsed local awscli config credentials, shared by all readers
+
+    Returns:
+        :parsed (CredentialsSnapshot): immutable parsed credentials file
+        :awscli_file (str): os dependent path to awscli credentials file
+    """
+    awscli_file = awscli_credentials_file()
+
+    if not os.path.isfile(awscli_file):
+        logger.info(
+            'awscli credentials file [%s] not found. Abort', awscli_file
+        )
+    return snapshot(awscli_file), awscli_file
 
 
 def set_logging(cfg_obj):
@@ -234,8 +222,8 @@ def set_logging(cfg_obj):
         logger.disabled = False
     elif not log_status:
         logger.info(
-            '%s: Logging disabled per local configuration file (%s) parameters.' %
-            (inspect.stack()[0][3], cfg_obj['PROJECT']['CONFIG_PATH'])
+            'Logging disabled per local configuration file (%s) parameters.',
+            cfg_obj['PROJECT']['CONFIG_PATH']
             )
         logger.disabled = True
     return log_status
@@ -250,21 +238,20 @@ def precheck():
     logging = set_logging(local_config)
 
     if os.path.exists(cfg_path):
-        logger.info('%s: config_path parameter: %s' % (inspect.stack()[0][3], cfg_path))
+        logger.info('config_path parameter: %s', cfg_path)
         logger.info(
-            '%s: Existing configuration file found. precheck pass.' %
-            (inspect.stack()[0][3]))
+            'Existing configuration file found. precheck pass.')
         return True
     elif not os.path.exists(cfg_path) and logging is False:
         logger.info(
-            '%s: No pre-existing configuration file found at %s. Using defaults. Logging disabled.' %
-            (inspect.stack()[0][3], cfg_path)
+            'No pre-existing configuration file found at %s. Using defaults. Logging disabled.',
+            cfg_path
             )
         return True
     if logging:
         logger.info(
-            '%s: Logging enabled per config file (%s).' %
-            (inspect.stack()[0][3], cfg_path)
+            'Logging enabled per config file (%s).',
+            cfg_path
             )
         return True
     return False
@@ -282,13 +269,19 @@ def delete_keyset(access_key, profile, surrogate=''):
     Returns:
         TYPE: bool, Success | Failure
     """
+    from botocore.exceptions import ClientError
+    from keyup.map import forget_identity
+    from keyup.retirement import ledger
+    from keyup.sessions import boto3_session
+
     try:
         if os.environ.get('AWS_ACCESS_KEY_ID'):
-            session = boto3.Session(
-                aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-                profile_name=profile)
-            client = session.client('iam')
+            client = boto3_session(
+                service='iam',
+                profile=profile,
+                access_key=os.environ['AWS_ACCESS_KEY_ID'],
+                secret_key=os.environ['AWS_SECRET_ACCESS_KEY']
+            )
         else:
             # use in-memory keys set in environment
             client = boto3_session(service='iam', profile=profile)
@@ -302,31 +295,203 @@ def delete_keyset(access_key, profile, surrogate=''):
             response = client.delete_access_key(AccessKeyId=access_key)
 
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
+            forget_identity(access_key)
+            ledger.remove(access_key)
             return True
         else:
             logger.warning(
-                '%s: Response code %d, deprecated access key %s may not have been deleted properly' %
-                (inspect.stack()[0][3], response['ResponseMetadata']['HTTPStatusCode'], access_key))
+                'Response code %d, deprecated access key %s may not have been deleted properly',
+                response['ResponseMetadata']['HTTPStatusCode'], access_key)
             return False
     except ClientError as e:
         if e.response['Error']['Code'] == 'NoSuchEntity':
             logger.exception(
-                "%s: AccessKeyId %s Not Found. Key not deleted" %
-                (inspect.stack()[0][3], access_key))
+                "AccessKeyId %s Not Found. Key not deleted",
+                access_key)
             return False
         else:
             logger.exception(
-                "%s: Problem deleting AccessKeyId %s (Code: %s Message: %s)" %
-                (inspect.stack()[0][3], access_key, e.response['Error']['Code'],
-                 e.response['Error']['Message']))
+                "Problem deleting AccessKeyId %s (Code: %s Message: %s)",
+                access_key, e.response['Error']['Code'], e.response['Error']['Message'])
             return False
     except Exception as e:
         logger.exception(
-            "%s: Unknown problem deleting AccessKeyId %s (Error: %s)" %
-            (inspect.stack()[0][3], access_key, str(e)))
+            "Unknown problem deleting AccessKeyId %s (Error: %s)",
+            access_key, e)
         return False
 
 
+def deactivate_keyset(access_key, profile, surrogate=''):
+    """
+        Sets an access key Inactive; requests signed with it are refused
+
+    Args:
+        - **access_key (str)**:  AccessKeyId of the keyset to deactivate
+        - **profile (str)**: iam user alias in the local awscli config
+        - **surrogate (str)**: iam username on which access key operations
+            are conducted by another iam user denoted in profile
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    from botocore.exceptions import ClientError
+    from keyup.sessions import boto3_session
+
+    try:
+        client = boto3_session(service='iam', profile=profile)
+        if surrogate:
+            client.update_access_key(AccessKeyId=access_key, Status='Inactive', UserName=surrogate)
+        else:
+            client.update_access_key(AccessKeyId=access_key, Status='Inactive')
+    except ClientError as e:
+        logger.warning(
+            'Problem deactivating AccessKeyId %s (Code: %s Message: %s)',
+            access_key, e.response['Error']['Code'], e.response['Error']['Message'])
+        return False
+    return True
+
+
+def retire_keyset(access_key, profile, surrogate=''):
+    """
+        Deactivates, then deletes a deprecated access key once its
+        replacement is in use.  With KEY_RETIREMENT DEFERRED, deletion is
+        queued in the retirement ledger instead
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    from keyup.retirement import defer_keyset, deferred
+
+    if deferred():
+        return defer_keyset(access_key, profile, surrogate)
+
+    if not deactivate_keyset(access_key, profile, surrogate):
+        return False
+    return delete_keyset(access_key=access_key, profile=profile, surrogate=surrogate)
+
+
+def create_first(key_metadata):
+    """
+    Summary:
+        Determines if a rotation creates the new access key before the
+        deprecated key is removed (ROTATION_MODE CREATE_FIRST).  Requires a
+        free key slot; iam users hold at most 2 access keys
+
+    Returns:
+        TYPE: bool
+    """
+    return local_config['KEY_METADATA']['ROTATION_MODE'] == 'CREATE_FIRST' and len(key_metadata) < 2
+
+
+def rotate_create_first(profile, user, aws_account, deprecated_access_key, user_name='', auto=False,
+                        debug=False, pipeline=None):
+    """
+    Summary:
+        Zero downtime rotation.  The new access key is created, written to
+        the local awscli configuration and confirmed usable before the
+        deprecated key is deactivated and deleted; the profile holds
+        working credentials throughout
+
+    Args:
+        :profile (str): iam user alias in the local awscli config
+        :user (str): iam user to which profile maps
+        :aws_account (str): AWS account number
+        :deprecated_access_key (str): AccessKeyId replaced by the rotation
+        :user_name (str): surrogate iam username, if any
+        :auto (bool): suppress stdout output
+        :debug (bool): write credentials to debug location
+        :pipeline (Pipeline): records rotation step timings
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    from keyup.list_ops import list_keys
+    from keyup.pipeline import Pipeline
+
+    pipeline = pipeline or Pipeline()
+    result, new_keys = pipeline.call('create_keyset', create_keyset, iam_user=user, profile=profile, surrogate=user_name)
+
+    if not result:
+        logger.warning('New keyset not created; deprecated access key %s retained', deprecated_access_key)
+        sys.exit(exit_codes['EX_CREATE_FAIL']['Code'])
+
+    parsed, output_file, access_key, secret_key = configure_keyset(new_keys, profile, surrogate=user_name)
+    logger.info(
+        'Create request successful. AccessKeyId (%s) created for %s user %s',
+        access_key, 'surrogate' if user_name else 'iam', user_name or user)
+
+    if not pipeline.call('write_keyset', write_keyset, parsed, output_file, debug):
+        logger.warning('Could not write new keyset to config (AccessKeyId: %s). Exit.', access_key)
+        return False
+
+    results = complete_rotation(pipeline, 'Rotating access keys... ', new_keys, user_name or profile, auto)
+
+    if not results['wait_keyset_enabled']:
+        # new key written, but not confirmed usable; leave the deprecated key in service
+        logger.warning(
+            'New AccessKeyId %s not confirmed active; deprecated access key %s retained',
+            access_key, deprecated_access_key)
+        return False
+
+    if not pipeline.call('retire_keyset', retire_keyset, deprecated_access_key, profile, surrogate=user_name):
+        logger.warning('Deprecated access key %s may not have been deleted properly', deprecated_access_key)
+        sys.exit(exit_codes['EX_DELETE_FAIL']['Code'])
+
+    pipeline.call(
+        'list_keys (after)', list_keys,
+        account=aws_account,
+        profile=profile,
+        iam_user=user,
+        surrogate=user_name,
+        stage='AFTER ROTATION',
+        quiet=auto
+    )
+    pipeline.display(quiet=auto)
+    return True
+
+
+def complete_rotation(pipeline, title, new_keys, user, auto, then=()):
+    """
+    Summary:
+        Final steps of a rotation.  The readiness wait and the backup copy
+        of the new keyset run concurrently; steps in then which require
+        'wait_keyset_enabled' start once the new keyset is usable
+
+    Args:
+        :pipeline (Pipeline): rotation step graph
+        :title (str): progress bar label
+        :new_keys (dict): create_access_key response
+        :user (str): profile or surrogate iam user; names the backup file
+        :auto (bool): suppress stdout output
+        :then (list): further Steps run in the same graph
+
+    Returns:
+        {step name: result}, TYPE: dict
+    """
+    from libtools import stdout_message
+    from keyup.pipeline import Step
+
+    access_key = new_keys['AccessKey']['AccessKeyId']
+    secret_key = new_keys['AccessKey']['SecretAccessKey']
+
+    steps = [
+        Step('wait_keyset_enabled', functools.partial(
+            wait_keyset_enabled, title, quiet=auto, keysets=[(access_key, secret_key)]))
+    ]
+
+    # write copy of new keyset to backup location if config file flag set;
+    # output held until the readiness progress display completes
+    if local_config['KEY_BACKUP']['BACKUP_ENABLE']:
+        steps.append(Step('write_keyset_backup', functools.partial(
+            write_keyset_backup, keys=dict(new_keys['AccessKey']), user=user, quiet=True)))
+
+    results = pipeline.run(*steps, *then)
+
+    if results.get('write_keyset_backup') and not auto:
+        stdout_message('Copy of new keyset written to: {}'.format(
+            c.BOLD + c.WHITE + local_config['KEY_BACKUP']['BACKUP_LOCATION'] + c.RESET), 'INFO')
+    return results
+
+
 def create_keyset(iam_user, profile, surrogate=''):
     """
         Creates new access key, secret key pair for iam user
@@ -340,11 +505,13 @@ def create_keyset(iam_user, profile, surrogate=''):
     Returns:
         Success | Failure, TYPE: bool, aws access keys (dict)
     """
+    from botocore.exceptions import ClientError
+    from keyup.sessions import boto3_session
+
     try:
         logger.info(
-                'Request to create new keyset for %s user %s' %
-                ('surrogate' if surrogate else 'iam',
-                 surrogate if surrogate else iam_user)
+                'Request to create new keyset for %s user %s',
+                'surrogate' if surrogate else 'iam', surrogate if surrogate else iam_user
             )
         # create keyset for primary iam user unless for a surrogate
         client = boto3_session(service='iam', profile=profile)
@@ -361,9 +528,8 @@ def create_keyset(iam_user, profile, surrogate=''):
             sys.exit(exit_codes['EX_NOPERM']['Code'])
         else:
             logger.exception(
-                "%s: Problem creating iam access key (Code: %s Message: %s)" %
-                (inspect.stack()[0][3], e.response['Error']['Code'],
-                 e.response['Error']['Message']))
+                "Problem creating iam access key (Code: %s Message: %s)",
+                e.response['Error']['Code'], e.response['Error']['Message'])
             return False, {}
     return True, keys
 
@@ -413,55 +579,55 @@ class SetLogging():
                     logger = logd.getLogger(mode, __version__)
         except Exception as e:
             logger.exception(
-                '%s: Problem incurred during logging setup' % inspect.stack()[0][3]
+                'Problem incurred during logging setup'
                 )
             return False
         return True
 
 
-def write_keyset(configparser_obj, filename, debug=False):
+def write_keyset(keyfile, filename, debug=False):
     """
-        Write out new awscli credentials to local config
+        Write out new awscli credentials to local config.  Only the lines
+        of changed keys are rewritten; the file is replaced atomically
 
     Args:
-        - **configparser_obj (configparser)**: parsed awscli config containing
+        - **keyfile (CredentialsFile)**: awscli credentials file containing
           new keyset
         - **filename (str)**: path to file to which keyset written
         - **debug (bool)**:  debug flag
     Returns:
         TYPE: bool, Success | Failure
     """
-
-    alt_writefile = filename + '.orig'
+    changes = keyfile.changes()
 
     if debug:
         HOME = os.environ['HOME']
         filename = HOME + '/Downloads/' + DBUG_FILE
-        logger.debug('output_file is: %s' % filename)
-        logger.debug('alt_writefile is: %s' % alt_writefile)
-        logger.debug('Writing credentials output file %s' % (filename))
+        logger.debug('output_file is: %s', filename)
+        logger.debug('Writing credentials output file %s', filename)
+
+    alt_writefile = filename + '.orig'
+
     try:
         # write output file
-        logger.info('Writing credentials file %s' % (filename))
-        output_file = open(filename, 'w')
-        configparser_obj.write(output_file)
-        output_file.close()
-        logger.info('Successful write of credentials file %s' % (filename))
+        logger.info('Writing credentials file %s', filename)
+        keyfile.write(filename)
+        logger.info('Successful write of credentials file %s', filename)
 
-        if os.path.isfile(filename + '.orig'):
+        if os.path.isfile(alt_writefile):
             logger.info(
-                'Found alt credentials file (%s). Attempting to update it' %
-                (alt_writefile))
-            # write gcreds credentials backup file
-            output_file = open(filename + '.orig', 'w')
-            clean_config = remove_temporary_credentials(configparser_obj)
-            clean_config.write(output_file)
-            output_file.close()
-            logger.info('Successful write of alt credentials file %s' % (alt_writefile))
+                'Found alt credentials file (%s). Attempting to update it',
+                alt_writefile)
+            # patch new keyset into gcreds credentials backup file
+            mirror = CredentialsFile(alt_writefile)
+            for profile, key, value in changes:
+                mirror.set(profile, key, value)
+            mirror.write()
+            logger.info('Successful write of alt credentials file %s', alt_writefile)
     except OSError as e:
         logger.exception(
-            '%s: Problem writing new credentials file %s' %
-            (inspect.stack()[0][3], filename))
+            'Problem writing new credentials file %s',
+            filename)
         raise
     return True
 
@@ -476,6 +642,9 @@ def write_keyset_backup(keys, user, quiet):
     Returns:
         TYPE: bool, Success | Failure
     """
+    from libtools import stdout_message
+    from libtools.js import export_iterobject
+
     def string_datetime(dt_obj):
         """ Replaces datetime with string """
         return dt_obj.strftime('%Y-%m-%dT%H:%M:%S')
@@ -494,17 +663,18 @@ def write_keyset_backup(keys, user, quiet):
     fail_msg = 'Problem writing new keyset to backup location: %s' % output_file
     try:
         # write keyset
-        if os.path.exists(fs_location):
+        # backup location created on first use; keysets readable by owner only
+        if ensure_directory(fs_location, mode=0o700):
             if os.path.exists(output_file):
-                logger.info('%s pre-existing object - overwriting file' % output_file)
+                logger.info('%s pre-existing object - overwriting file', output_file)
             r = export_iterobject(safe_keyset(keys), output_file)
         else:
-            logger.warning('Directory location to store new keysets (%s) does not exist' % fs_location)
+            logger.warning('Directory location to store new keysets (%s) cannot be created', fs_location)
             return False
     except OSError as e:
         logger.exception(
-            '%s: Problem writing keyset to backup location: %s' %
-            (inspect.stack()[0][3], output_file))
+            'Problem writing keyset to backup location: %s',
+            output_file)
         return False
     # stdout message handling
     if r and not quiet:
@@ -530,68 +700,185 @@ def configure_keyset(keyset, profile, surrogate=''):
         :surrogate (str): iam username on which access key operations
             are conducted by another iam user denoted in profile
     Returns:
-        :parsed (configParser):  object configured with new access key signatures
+        :keyfile (CredentialsFile):  credentials file with new access key signatures
         :configfile_path (str):  os dependent path to awscli credentials file
         :access_key (str):  sts access key string
         :secret_key (str):  sts secret key string
     """
+    from libtools import stdout_message
+    from keyup.map import forget_identity
+    from keyup.sessions import invalidate
+
     access_key = keyset['AccessKey']['AccessKeyId']
     secret_key = keyset['AccessKey']['SecretAccessKey']
-    parsed, configfile_path = parse_awscli()
+    keyfile = CredentialsFile(awscli_credentials_file())
 
     # insert newly created keyset into surrogate instead of iam_user profile
     if surrogate:
         profile = surrogate
 
     # create keyset to write to local awscli config
-    for profile_user in parsed.sections():
-        if profile_user == profile:
-            if set(IAM_KEYS).issubset(config[profile].keys()):
-                parsed[profile]['aws_access_key_id'] = access_key
-                parsed[profile]['aws_secret_access_key'] = secret_key
-                return parsed, configfile_path, access_key, secret_key
-    try:
-        # since profile not found in parsed.sections: then
-        # if surrogate: search for accesskeys associated with surrogate in local awscli \
-        #   when profile id, write new keyset to it
-        # elif not surrogate:  search for access key used to id profile
-        # NO NEED TO QUITE IN THIS SECTION UNTIL ABOVE LOGIC COMPLETED
-        if parsed[profile]['aws_access_key_id'] != access_key:
-            msg = 'profile_user not found in local awscli config. Exit'
-            logger.warning(msg)
-            stdout_message(msg, 'WARN')
-            sys.exit(exit_codes['E_MISC']['Code'])
-    except KeyError:
-        msg = 'profile_user not found in local awscli config. Exit'
-        logger.warning(msg)
-        stdout_message(msg, 'WARN')
-        sys.exit(exit_codes['E_MISC']['Code'])
+    if profile in keyfile and set(IAM_KEYS).issubset(keyfile.keys(profile)):
+        # cached identity, pooled sessions of the replaced key no longer valid
+        forget_identity(keyfile.get(profile, 'aws_access_key_id'))
+        invalidate(profile)
+        keyfile.set(profile, 'aws_access_key_id', access_key)
+        keyfile.set(profile, 'aws_secret_access_key', secret_key)
+        return keyfile, keyfile.path, access_key, secret_key
+
+    msg = 'profile_user not found in local awscli config. Exit'
+    logger.warning(msg)
+    stdout_message(msg, 'WARN')
+    sys.exit(exit_codes['E_MISC']['Code'])
+
+
+def select_deprecated_key(key_metadata, profile, surrogate=''):
+    """
+        Identifies the access key replaced during rotation
+
+    Args:
+        :key_metadata (list): AccessKeyMetadata of the iam user's keys
+        :profile (str): iam user alias in the local awscli config
+        :surrogate (str): iam username on which access key operations
+            are conducted by another iam user denoted in profile
+
+    Returns:
+        AccessKeyId, TYPE: str; empty str if no key identified
+    """
+    if len(key_metadata) == 1:
+        return key_metadata[0]['AccessKeyId']
+
+    if local_config['KEY_METADATA']['KEY_DEPRECATION'] == 'AGE':
+        # oldest ACTIVE key, will replace
+        active = [x for x in key_metadata if x['Status'] == 'Active'] or key_metadata
+        return sorted(active, key=lambda x: x['CreateDate'])[0]['AccessKeyId']
+    return get_current_key(profile_name=profile, surrogate=surrogate)
+
+
+def wait_keyset_enabled(title, quiet=False, keysets=()):
+    """
+        Waits for newly created access keys to become usable, displaying
+        a progress bar unless quiet.  In PROBE readiness mode, new keysets
+        are polled against STS and the wait ends as soon as all keysets
+        authenticate; KEY_ENABLE_DELAY seconds is the upper bound
+
+    Args:
+        :title (str): progress bar label
+        :quiet (bool): suppress progress display
+        :keysets (list): (access_key, secret_key) tuples of new keys
+
+    Returns:
+        TYPE: bool, True (keys ready) | False (ceiling reached before
+        keys authenticated)
+    """
+    from prompt_toolkit.shortcuts import ProgressBar
+    from keyup.readiness import backoff_schedule, readiness_mode, wait_ready
+    from keyup.thread_progress import custom_formatters, style
+
+    if keysets and readiness_mode() == 'PROBE':
+        schedule = backoff_schedule(KEY_ENABLE_DELAY)
+
+        if quiet:
+            return wait_ready(keysets, KEY_ENABLE_DELAY, schedule)
+
+        results = queue.Queue()
+
+        with ProgressBar(style=style, formatters=custom_formatters) as pb:
+            # progress reflects probe attempts
+            counter = pb(label=title, total=len(keysets) * (len(schedule) + 1))
+
+            t1 = threading.Thread(
+                target=lambda: results.put(
+                    wait_ready(keysets, KEY_ENABLE_DELAY, schedule, counter.item_completed)
+                )
+            )
+            t1.daemon = True
+            print('\n')
+            t1.start()
+
+            while t1.is_alive():
+                t1.join(timeout=0.5)
+            counter.done = True
+        return results.get()
+
+    if quiet:
+        sleep(KEY_ENABLE_DELAY)
+        return True
+
+    d = 0.05     # duration / cycle (secs)
+    iterations = int(KEY_ENABLE_DELAY / d)
+    exit_event = threading.Event()
+
+    with ProgressBar(style=style, formatters=custom_formatters) as pb:
+        # Two parallel tasks.
+        def display_progress():
+            for i in pb(range(iterations), label=title):
+                time.sleep(d)
+                if exit_event.is_set():
+                    break
+            sys.stdout.flush()
+
+        def delay():
+            sleep(KEY_ENABLE_DELAY)
+
+        # Start threads.
+        t1 = threading.Thread(target=display_progress)
+        t2 = threading.Thread(target=delay)
+
+        t1.daemon = True
+        t2.daemon = True
+        print('\n')
+        t1.start()
+        t2.start()
+
+        # Wait for the primary work thread to finish (t2)
+        while t2.is_alive():
+            t2.join(timeout=0.5)
+        else:
+            exit_event.set()
+    return True
 
 
 def main(operation, profile, auto, debug, user_name=''):
     """
     End-to-end renew of access keys for a specific profile in local awscli config
     """
-    if user_name:
-        logger.info('user_name parameter given (%s) as surrogate' % user_name)
-        user_name = map_iam_username(user_name, profile)
+    from libtools import stdout_message
+    from keyup.list_ops import list_keys
+    from keyup.map import map_identity, map_iam_username
+    from keyup.pipeline import Pipeline, Step
+    from keyup.retirement import defer_keyset, deferred, release_slot
+
+    pipeline = Pipeline()
 
     # find out to which iam user profile name maps
-    user, aws_account = map_identity(profile=profile)
+    steps = [Step('map_identity', functools.partial(map_identity, profile=profile))]
+
+    if user_name:
+        logger.info('user_name parameter given (%s) as surrogate', user_name)
+        steps.append(Step('map_iam_username', functools.partial(map_iam_username, user_name, profile)))
+
+    if operation in ROTATE_OPERATIONS:
+        # check local awscli config for active temporary sts credentials
+        steps.append(Step('clean_config', functools.partial(clean_config, quiet=auto)))
+
+    # identity mapping and temporary credential checks are independent
+    results = pipeline.run(*steps)
+    user, aws_account = results['map_identity']
+    user_name = results.get('map_iam_username', user_name)
 
     if (user or aws_account) is None:
-        msg = 'Expired or invalid credentials to authenticate for profile user (%s)'.format(profile)
+        msg = 'Expired or invalid credentials to authenticate for profile user ({})'.format(profile)
         stdout_message(
-            ('%s: %s. Exit. [Code: %d]' % (inspect.stack()[0][3], msg,
-             exit_codes['EX_NOPERM']['Code'])), prefix='AUTH', severity='WARNING'
+            ('%s. Exit. [Code: %d]' % (msg, exit_codes['EX_NOPERM']['Code'])),
+            prefix='AUTH', severity='WARNING'
             )
-        logger.warning(msg, exit_codes['EX_NOPERM']['Reason'])
+        logger.warning('%s. %s', msg, exit_codes['EX_NOPERM']['Reason'])
         sys.exit(exit_codes['EX_NOPERM']['Code'])
 
     if operation in ROTATE_OPERATIONS:
-        # check local awscli config for active temporary sts credentials
-        if clean_config(quiet=auto):
-            keylist, key_metadata = list_keys(
+        keylist, key_metadata = pipeline.call(
+                    'list_keys (before)', list_keys,
                     account=aws_account,
                     profile=profile,
                     iam_user=user,
@@ -615,33 +902,57 @@ def main(operation, profile, auto, debug, user_name=''):
                 --operation { """ + msg_accent + """ }
         """
         stdout_message(msg)
-        logger.warning('%s: No valid operation provided. Exit' % (inspect.stack()[0][3]))
+        logger.warning('No valid operation provided. Exit')
         sys.exit(exit_codes['E_MISC']['Code'])
 
     else:
         msg = 'Unknown operation. Exit'
         stdout_message(msg)
-        logger.warning('%s: %s' % (msg, inspect.stack()[0][3]))
+        logger.warning(msg)
         sys.exit(exit_codes['E_MISC']['Code'])
 
+    # keys listed with the new keyset once usable; overlaps the backup write
+    after_rotation = Step('list_keys (after)', functools.partial(
+        list_keys, account=aws_account, profile=profile, iam_user=user,
+        surrogate=user_name, stage='AFTER ROTATION', quiet=auto
+    ), requires=('wait_keyset_enabled',))
+
+    if deferred() and len(keylist) == 2:
+        # deprecated key of an earlier rotation awaiting deletion frees a slot
+        key_metadata = release_slot(key_metadata, profile, surrogate=user_name)
+        keylist = [x['AccessKeyId'] for x in key_metadata]
+
     try:
+        # -- Key Rotation: create before delete (free key slot) ----------------
+        if len(keylist) == 1 and create_first(key_metadata):
+            return rotate_create_first(
+                profile, user, aws_account, key_metadata[0]['AccessKeyId'],
+                user_name=user_name, auto=auto, debug=debug, pipeline=pipeline
+            )
+
         # -- Key Rotation: 1 keyset exists -------------------------------------
-        if len(keylist) == 1:       # 1 keyset exists
+        elif len(keylist) == 1:       # 1 keyset exists
             deprecated_access_key = key_metadata[0]['AccessKeyId']
 
             # delete keyset, must supply profile ------------------------------
-            r = delete_keyset(
-                    access_key=deprecated_access_key,
-                    profile=profile,
-                    surrogate=user_name
-                )
+            if deferred():
+                # deactivated; deleted after grace period (keyup --retire)
+                r = pipeline.call('defer_keyset', defer_keyset, deprecated_access_key, profile, surrogate=user_name)
+            else:
+                r = pipeline.call(
+                        'delete_keyset', delete_keyset,
+                        access_key=deprecated_access_key,
+                        profile=profile,
+                        surrogate=user_name
+                    )
             if r:
-                result, new_keys = create_keyset(iam_user=user, profile=profile, surrogate=user_name)
+                result, new_keys = pipeline.call(
+                    'create_keyset', create_keyset, iam_user=user, profile=profile, surrogate=user_name)
             else:
                 logger.warning(
-                    '%s: Deprecated access key %s may not have \
-                    been deleted properly. Check User Permissions' %
-                    (inspect.stack()[0][3], deprecated_access_key)
+                    'Deprecated access key %s may not have \
+                    been deleted properly. Check User Permissions',
+                    deprecated_access_key
                 )
                 sys.exit(exit_codes['EX_DELETE_FAIL']['Code'])
 
@@ -650,127 +961,75 @@ def main(operation, profile, auto, debug, user_name=''):
                 parsed, output_file, access_key, secret_key = configure_keyset(new_keys, profile, surrogate=user_name)
                 # log success
                 logger.info(
-                    'Create request successful. AccessKeyId (%s) created for %s user %s' %
-                    (access_key, 'surrogate' if user_name != '' else 'iam',
-                     user_name if user_name != '' else user)
+                    'Create request successful. AccessKeyId (%s) created for %s user %s',
+                    access_key, 'surrogate' if user_name != '' else 'iam', user_name if user_name != '' else user
                     )
             else:
                 logger.exception(
-                    '%s: New keys did not generate correctly. Keys received: %s\n\nAbort.' %
-                    (inspect.stack()[0][3], str(new_keys)))
+                    'New keys did not generate correctly. Keys received: %s\n\nAbort.',
+                    new_keys)
 
             # switch to new keys in mem before rewriting the credentials file
-            if write_keyset(parsed, output_file, debug):
+            if pipeline.call('write_keyset', write_keyset, parsed, output_file, debug):
                 if set_keyset(access_key, secret_key):
                     # delete keyset, no profile given, use in memory keys
-                    d = 0.05     # duration / cycle (secs)
                     print('\n')
-                    title = 'Rotating access keys... Please wait '
-                    iterations =  int(KEY_ENABLE_DELAY / d)
-                    exit_event = threading.Event()
-
-                    with ProgressBar(style=style, formatters=custom_formatters) as pb:
-                        # Two parallel tasks.
-                        def display_progress():
-                            for i in pb(range(iterations), label=title):
-                                time.sleep(d)
-                                if exit_event.is_set():
-                                    break
-                            sys.stdout.flush()
-
-                        def delay():
-                            sleep(KEY_ENABLE_DELAY)
-
-                        # Start threads.
-                        t1 = threading.Thread(target=display_progress)
-                        t2 = threading.Thread(target=delay)
-
-                        t1.daemon = True
-                        t2.daemon = True
-                        print('\n')
-                        t1.start()
-                        t2.start()
-
-                        # Wait for the primary work thread to finish (t2)
-                        while t2.is_alive():
-                            t2.join(timeout=0.5)        # wait only for report data thread
-                        else:
-                            exit_event.set()
-
-                    keylist, key_metadata = list_keys(
-                            account=aws_account,
-                            profile=profile,
-                            iam_user=user,
-                            surrogate=user_name,
-                            stage='AFTER ROTATION',
-                            quiet=auto
-                        )
-                    # write copy of new keyset to backup location if config file flag set
-                    if local_config['KEY_BACKUP']['BACKUP_ENABLE']:
-                        write_keyset_backup(
-                                keys=new_keys['AccessKey'],
-                                user=user_name or profile,
-                                quiet=auto
-                            )
-
+                    complete_rotation(
+                        pipeline, 'Rotating access keys... Please wait ', new_keys, user_name or profile, auto,
+                        then=[after_rotation]
+                    )
+                    pipeline.display(quiet=auto)
                     return True
                 else:
                     logger.warning(
-                        '%s: Problem setting new keyset; failed authentication test (AccessKeyId: %s). Exit.' %
-                        (inspect.stack()[0][3], access_key)
+                        'Problem setting new keyset; failed authentication test (AccessKeyId: %s). Exit.',
+                        access_key
                         )
                     return False
             else:
                 logger.warning(
-                    '%s: Could not write new keyset to config (AccessKeyId: %s). Exit.' %
-                    (inspect.stack()[0][3], access_key)
+                    'Could not write new keyset to config (AccessKeyId: %s). Exit.',
+                    access_key
                     )
                 return False
 
         # -- Key Rotation: 2 keysets exist -------------------------------------
         elif len(keylist) == 2:
-            if local_config['KEY_METADATA']['KEY_DEPRECATION'] == 'AGE':
-                    # find oldest ACTIVE key, will replace
-                    dates = [x['CreateDate'] for x in key_metadata]
-                    dates.sort()
-                    deprecated_keydate = dates[0]   # oldest date
-                    for key in key_metadata:
-                        if key['CreateDate'] == deprecated_keydate and key['Status'] == 'Active':
-                            deprecated_access_key = key['AccessKeyId']
+            deprecated_access_key = select_deprecated_key(key_metadata, profile, surrogate=user_name)
+            if deprecated_access_key:
+                logger.info('Deprecated access key identified as (%s)', deprecated_access_key)
             else:
-                deprecated_access_key = get_current_key(profile_name=profile, surrogate=user_name)
-                if deprecated_access_key:
-                    logger.info('Deprecated access key identified as (%s)' % deprecated_access_key)
-                else:
-                    logger.warning(
-                        '%s: Failed to identify access key for replacement. Exit (Code: %s)' %
-                        (inspect.stack()[0][3], sys.exit(exit_codes['EX_AWSCLI']['Code']))
-                        )
-                    sys.exit(exit_codes['EX_AWSCLI']['Code'])
+                logger.warning(
+                    'Failed to identify access key for replacement. Exit (Code: %s)',
+                    exit_codes['EX_AWSCLI']['Code']
+                    )
+                sys.exit(exit_codes['EX_AWSCLI']['Code'])
             if debug:
                 logger.debug(
-                    '%s: key_metadata is: %s' %
-                    (inspect.stack()[0][3], str(key_metadata))
+                    'key_metadata is: %s',
+                    key_metadata
                     )
                 logger.debug(
-                    '%s: sorted key create dates: %s' %
-                    (inspect.stack()[0][3], str(dates))
+                    'deprecated access key: %s',
+                    deprecated_access_key
                     )
                 sys.exit(exit_codes['EX_OK']['Code'])
 
             # delete keyset, must supply profile ------------------------------
-            r = delete_keyset(
+            r = pipeline.call(
+                    'delete_keyset', delete_keyset,
                     access_key=deprecated_access_key,
                     profile=profile,
                     surrogate=user_name
                 )
             if r:
-                result, new_keys = create_keyset(iam_user=user, profile=profile, surrogate=user_name)
+                result, new_keys = pipeline.call(
+                    'create_keyset', create_keyset, iam_user=user, profile=profile, surrogate=user_name)
             else:
                 logger.warning(
-                    '%s: Deprecated access key %s may not have \
-                    been deleted properly. Check User Permissions' %
-                    (inspect.stack()[0][3], deprecated_access_key)
+                    'Deprecated access key %s may not have \
+                    been deleted properly. Check User Permissions',
+                    deprecated_access_key
                 )
                 sys.exit(exit_codes['EX_DELETE_FAIL']['Code'])
 
@@ -780,90 +1039,134 @@ def main(operation, profile, auto, debug, user_name=''):
                 parsed, output_file, access_key, secret_key = configure_keyset(new_keys, profile, surrogate=user_name)
                 # log success
                 logger.info(
-                    'Create request successful. AccessKeyId (%s) created for iam user %s' %
-                    (access_key, user)
+                    'Create request successful. AccessKeyId (%s) created for iam user %s',
+                    access_key, user
                     )
             else:
                 logger.exception(
-                    '%s: New keys did not generate correctly, keys have length of %d. Abort.' %
-                    (inspect.stack()[0][3], len(new_keys)))
+                    'New keys did not generate correctly, keys have length of %d. Abort.',
+                    len(new_keys))
                 sys.exit(exit_codes['EX_CREATE_FAIL']['Code'])
 
             # write new awscli config
-            if write_keyset(parsed, output_file, debug):
-                d = 0.05     # duration / cycle (secs)
-                title = 'Rotating access keys... '
-                iterations =  int(KEY_ENABLE_DELAY / d)
-                exit_event = threading.Event()
-
-                with ProgressBar(style=style, formatters=custom_formatters) as pb:
-                    # Two parallel tasks.
-                    def display_progress():
-                        for i in pb(range(iterations), label=title):
-                            time.sleep(d)
-                            if exit_event.is_set():
-                                break
-                        sys.stdout.flush()
-
-                    def delay():
-                        sleep(KEY_ENABLE_DELAY)
-
-                    # Start threads.
-                    t1 = threading.Thread(target=display_progress)
-                    t2 = threading.Thread(target=delay)
-
-                    t1.daemon = True
-                    t2.daemon = True
-                    print('\n')
-                    t1.start()
-                    t2.start()
-
-                    # Wait for the primary work thread to finish (t2)
-                    while t2.is_alive():
-                        t2.join(timeout=0.5)        # wait only for report data thread
-                    else:
-                        exit_event.set()
-
-                #print('\n')
-                keylist, key_metadata = list_keys(
-                        account=aws_account,
-                        profile=profile,
-                        iam_user=user,
-                        surrogate=user_name,
-                        stage='AFTER ROTATION',
-                        quiet=auto
-                    )
-                # write copy of new keyset to backup location if config file flag set
-                if local_config['KEY_BACKUP']['BACKUP_ENABLE']:
-                    write_keyset_backup(
-                            keys=new_keys['AccessKey'],
-                            user=user_name or profile,
-                            quiet=auto
-                        )
+            if pipeline.call('write_keyset', write_keyset, parsed, output_file, debug):
+                complete_rotation(
+                    pipeline, 'Rotating access keys... ', new_keys, user_name or profile, auto,
+                    then=[after_rotation]
+                )
+                pipeline.display(quiet=auto)
                 return True
             else:
                 logger.warning(
-                    '%s: Could not write new keyset to config (AccessKeyId: %s). Exit.' %
-                    (inspect.stack()[0][3], access_key)
+                    'Could not write new keyset to config (AccessKeyId: %s). Exit.',
+                    access_key
                     )
                 return False
     except KeyError as e:
         logger.critical(
-            '%s: Cannot find Key %s' %
-            (inspect.stack()[0][3], str(e)))
+            'Cannot find Key %s',
+            e)
         return False
     except OSError as e:
         logger.critical(
-            '%s: problem writing to file %s. Error %s' %
-            (inspect.stack()[0][3], output_file, str(e)))
+            'problem writing to file %s. Error %s',
+            output_file, e)
         return False
     except Exception as e:
         logger.critical(
-            '%s: Unknown error. Error %s' %
-            (inspect.stack()[0][3], str(e)))
+            'Unknown error. Error %s',
+            e)
         raise e
 
 
+def report_formats(values):
+    """
+    Summary:
+        Key report output formats from --format values.  Each value may
+        be a comma-separated list.  Without --format, the table is shown
+        on a terminal and json lines are written otherwise
+
+    Returns:
+        format names, TYPE: list
+    """
+    from keyup.report_export import FORMATS
+
+    formats = [x.strip().lower() for v in (values or []) for x in v.split(',') if x.strip()]
+
+    if not formats:
+        return ['table' if sys.stdout.isatty() else 'jsonl']
+
+    for fmt in formats:
+        if fmt not in FORMATS:
+            print('Unknown report format: {}.  Valid: {}'.format(fmt, ', '.join(FORMATS)))
+            sys.exit(exit_codes['E_BADARG']['Code'])
+    return list(dict.fromkeys(formats))
+
+
+def key_report(formats, output=None, fleet=None):
+    """
+    Summary:
+        Key report for all profiles in the local awscli configuration.
+        Profile data is fetched once and streamed to every requested
+        format as each profile's queries finish
+
+    Args:
+        :formats (list): table, json, jsonl, csv
+        :output (str): file path for machine-readable formats; with more
+            than one, each is written to output.<format>.  Written to
+            stdout when omitted
+        :fleet (str): profile with account-wide iam read permissions;
+            reports every iam user of its account instead of the local
+            awscli profiles
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    from keyup.cauth import prepare_fleetdata, prepare_reportdata, render_report, report_records
+    from keyup.report_export import export_report, tee, writer
+
+    machine = [x for x in formats if x != 'table']
+
+    if not output and (len(machine) > 1 or (machine and 'table' in formats)):
+        print('--output is required when more than one report format is written')
+        sys.exit(exit_codes['E_BADARG']['Code'])
+
+    streams = {}
+    try:
+        for fmt in machine:
+            if not output:
+                streams[fmt] = sys.stdout
+            else:
+                path = output if len(machine) == 1 else '{}.{}'.format(output, fmt)
+                streams[fmt] = open(path, 'w', newline='')
+        writers = [writer(fmt, streams[fmt]) for fmt in machine]
+
+        if fleet:
+            t2 = threading.Thread(target=prepare_fleetdata, args=(fleet, container))
+        else:
+            t2 = threading.Thread(target=prepare_reportdata, args=(container,))
+        t2.daemon = True
+        t2.start()
+
+        if 'table' in formats:
+            # clear screen; rows are rendered as each profile's queries finish
+            os.system('cls' if os.name == 'nt' else 'clear')
+            render_report(tee(report_records(container), writers))
+        else:
+            export_report(report_records(container), writers)
+        t2.join()
+
+    except OSError as e:
+        logger.critical('problem writing key report to %s. Error %s', output, e)
+        return False
+
+    finally:
+        for stream in streams.values():
+            if stream is not sys.stdout:
+                stream.close()
+    return True
+
+
 def options(parser, help_menu=False):
     """
         Parse cli parameter options
@@ -881,6 +1184,15 @@ def options(parser, help_menu=False):
     parser.add_argument("-q", "--quiet", dest='quiet', action='store_true', required=False)
     parser.add_argument("-R", "--key-report", dest='keyreport', action='store_true', required=False)
     parser.add_argument("-u", "--user-name", dest='username', type=str, required=False)
+    parser.add_argument("--format", dest='format', type=str, action='append', required=False)
+    parser.add_argument("--output", dest='output', type=str, required=False)
+    parser.add_argument("--fleet", dest='fleet', action='store_true', required=False)
+    parser.add_argument("--profiles", dest='profiles', type=str, required=False)
+    parser.add_argument("--user-names", dest='usernames', type=str, required=False)
+    parser.add_argument("--user-file", dest='userfile', type=str, required=False)
+    parser.add_argument("--all", dest='all', action='store_true', required=False)
+    parser.add_argument("--retire", dest='retire', action='store_true', required=False)
+    parser.add_argument("--reactivate", dest='reactivate', type=str, required=False)
     parser.add_argument("-V", "--version", dest='version', action='store_true', required=False)
     return parser.parse_args()
 
@@ -889,6 +1201,7 @@ def package_version():
     """
     Prints package version and requisite PACKAGE info
     """
+    from keyup import about
     print(about.about_object)
     sys.exit(exit_codes['EX_OK']['Code'])
 
@@ -935,6 +1248,8 @@ def init():
         source_globals()
 
     except KeyError:
+        from keyup import keyconfig
+
         # remove offending configuration file, then recreate
         if os.path.exists(local_config['PROJECT']['CONFIG_PATH']):
             os.remove(local_config['PROJECT']['CONFIG_PATH'])
@@ -948,10 +1263,19 @@ def init():
         args = options(parser)
 
     except Exception as e:
+        from libtools import stdout_message
+
         help_menu()
         stdout_message(str(e), 'ERROR')
         sys.exit(exit_codes['EX_OK']['Code'])
 
+    if args.debug:
+        import atexit
+        from keyup.ratelimit import display_counters
+
+        # request, throttle and retry counts of every rate limiter on exit
+        atexit.register(display_counters)
+
     if len(sys.argv) == 1:
         help_menu()
         sys.exit(exit_codes['EX_OK']['Code'])
@@ -964,52 +1288,85 @@ def init():
         package_version()
 
     elif args.configure:
+        from keyup import keyconfig
+
         r = keyconfig.option_configure(args.debug, local_config['PROJECT']['CONFIG_PATH'])
         return r
 
     elif args.keyreport:
-        # clear screen; create margin header space
-        msg = 'Generating Key Report. Please Wait...'
-        tab = '\t'.expandtabs(46)
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(('\n' * 5) + f'\n{tab}{msg}\n\n\n\n')
+        fleet = args.profile if args.fleet else None
+        return key_report(report_formats(args.format), args.output, fleet)
 
-        d = 0.05     # duration / cycle (secs)
-        title = 'Querying Amazon STS'
-        iterations = round(len(local_profilenames()) / d)
-        exit_event = threading.Event()
+    elif args.reactivate:
+        from keyup.retirement import reactivate_keyset
 
-        with ProgressBar(style=style, formatters=custom_formatters) as pb:
-            # Two parallel tasks.
-            def display_progress():
-                for i in pb(range(iterations), label=title):
-                    time.sleep(d)
-                    if exit_event.is_set():
-                        break
-                sys.stdout.flush()
-
-            # Start threads.
-            t1 = threading.Thread(target=display_progress)
-            t2 = threading.Thread(target=prepare_reportdata, args=(container, ))
+        if not reactivate_keyset(args.reactivate):
+            sys.exit(exit_codes['E_MISC']['Code'])
+        sys.exit(exit_codes['EX_OK']['Code'])
 
-            t1.daemon = True
-            t2.daemon = True
-            t1.start()
-            t2.start()
+    elif args.retire:
+        from keyup.retirement import retire_due
+
+        # every queued key when --retire given explicitly with --all
+        failed = retire_due(force=args.all, quiet=args.quiet)
+        if failed:
+            logger.warning('Deferred deletion failed for access keys: %s', ', '.join(failed))
+            sys.exit(exit_codes['EX_DELETE_FAIL']['Code'])
+        sys.exit(exit_codes['EX_OK']['Code'])
+
+    elif (args.usernames or args.userfile) and args.operation in ROTATE_OPERATIONS:
+        if precheck():
+            from keyup.batch import read_usernames, rotate_surrogates
+            from keyup.retirement import retire_pending
+
+            retire_pending(quiet=args.quiet)
 
-            # Wait for the primary work thread to finish (t2)
-            while t2.is_alive():
-                t2.join(timeout=0.5)        # wait only for report data thread
+            usernames = [x.strip() for x in (args.usernames or '').split(',') if x.strip()]
+
+            if args.userfile:
+                try:
+                    usernames.extend(read_usernames(args.userfile))
+                except OSError as e:
+                    logger.warning('Unable to read iam usernames from %s: %s', args.userfile, e)
+                    sys.exit(exit_codes['E_BADARG']['Code'])
+
+            failed = rotate_surrogates(args.profile, usernames, quiet=args.quiet, debug=args.debug)
+            if failed:
+                logger.warning('Rotation failed for iam users: %s', ', '.join(failed))
+                sys.exit(exit_codes['EX_BATCH_FAIL']['Code'])
+            logger.info('IAM access keyset surrogate batch operation complete')
+            sys.exit(exit_codes['EX_OK']['Code'])
+
+    elif (args.profiles or args.all) and args.operation in ROTATE_OPERATIONS:
+        if precheck():
+            from keyup.batch import rotate_profiles
+            from keyup.iam_operations import local_profilenames
+            from keyup.retirement import retire_pending
+
+            retire_pending(quiet=args.quiet)
+
+            if args.all:
+                profiles = local_profilenames()
             else:
-                exit_event.set()
+                profiles = [x.strip() for x in args.profiles.split(',') if x.strip()]
 
-        # Exit ProgessBar context & unpack Queue
-        data, skipped = container.get()
-        setup_table(data, skipped)
+            failed = rotate_profiles(profiles, quiet=args.quiet, debug=args.debug)
+            if failed:
+                logger.warning('Rotation failed for profiles: %s', ', '.join(failed))
+                sys.exit(exit_codes['EX_BATCH_FAIL']['Code'])
+            logger.info('IAM access keyset batch operation complete')
+            sys.exit(exit_codes['EX_OK']['Code'])
 
     else:
+        from libtools import stdout_message
+        from keyup.map import authenticated
+
         if precheck():              # if prereqs set, run
             if authenticated(profile=args.profile):
+                if args.operation in ROTATE_OPERATIONS:
+                    from keyup.retirement import retire_pending
+                    retire_pending(quiet=args.quiet)
+
                 # execute keyset operation
                 success = main(
                             operation=args.operation,
@@ -1032,7 +1389,8 @@ def init():
     failure = """ : Check of runtime parameters failed for unknown reason.
     Please ensure local awscli is configured. Then run keyconfig to
     configure keyup runtime parameters.   Exiting. Code: """
-    logger.warning(failure + 'Exit. Code: %s' % sys.exit(exit_codes['E_MISC']['Code']))
-    print(failure)
+    logger.warning('%s%s', failure, exit_codes['E_MISC']['Code'])
+    print(failure + str(exit_codes['E_MISC']['Code']))
+    sys.exit(exit_codes['E_MISC']['Code'])
 
 # end
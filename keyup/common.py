@@ -20,11 +20,7 @@ import os
 import json
 import platform
 import datetime
-import re
 import logging
-import inspect
-import distro
-from libtools.js import export_iterobject
 from keyup.colors import Colors
 from keyup import __version__
 
@@ -106,18 +102,19 @@ def convert_dt_time(duration, return_iter=False):
                  minutes, 's' if minutes != 1 else '', seconds, 's' if seconds != 1 else ''))
     except AttributeError as e:
         logger.exception(
-            '%s: Type mismatch when converting timedelta objects (Code: %s)' %
-            (inspect.stack()[0][3], str(e)))
+            'Type mismatch when converting timedelta objects (Code: %s)',
+            e)
     except Exception as e:
         logger.exception(
-            '%s: Unknown error when converting datetime objects (Code: %s)' %
-            (inspect.stack()[0][3], str(e)))
+            'Unknown error when converting datetime objects (Code: %s)',
+            e)
     return format_string
 
 
 def debug_mode(header, data_object, debug=False, halt=False):
     """ debug output """
     if debug:
+        from libtools.js import export_iterobject
         print('\n  ' + str(header) + '\n')
         try:
             export_iterobject(data_object)
@@ -159,8 +156,8 @@ def awscli_defaults(os_type=None):
         alt_credentials = os.getenv('AWS_SHARED_CREDENTIALS_FILE')
     except OSError as e:
         logger.exception(
-            '%s: problem determining local os environment %s' %
-            (inspect.stack()[0][3], str(e))
+            'problem determining local os environment %s',
+            e
             )
         raise e
     return {
@@ -186,29 +183,19 @@ def os_parityPath(path):
 def distrotype():
     """
     Returns:
-        rhel | debian | None, TYPE: str, (Nonetype)
+        amzn | debian | rhel | ubuntu | None, TYPE: str, (Nonetype)
     """
-    for os in ['amzn', 'debian', 'rhel', 'ubuntu']:
-        if re.search(os, distro.like()):
-            return os
-    return None
+    from keyup import hostenv
+    return hostenv.distrotype()
 
 
-def syslog_enabled(system=distrotype()):
+def syslog_enabled(system=None):
     """
-        Determines which system logger is present and working
+        Determines which system logger is present and working.  Host
+        distribution probed on first call (keyup.hostenv), not on import
 
     Returns:
         True | False, TYPE: bool
     """
-    logmap = {
-        "amzn": "/var/log/messages",
-        "debian": "/var/log/syslog",
-        "rhel": "/var/log/messages",
-        "ubuntu": "/var/log/syslog"
-    }
-
-    try:
-        return os.path.exists(logmap[system])
-    except OSError:
-        return True
+    from keyup import hostenv
+    return hostenv.syslog_enabled(system)
@@ -20,7 +20,6 @@ import os
 import platform
 import sys
 import json
-import inspect
 import datetime
 import string
 import re
@@ -29,8 +28,9 @@ from libtools import Colors
 from libtools.js import export_iterobject
 from libtools import stdout_message
 from keyup.statics import PACKAGE, local_config
-from keyup.common import debug_mode, os_parityPath, distrotype, syslog_enabled
-from keyup.script_utils import bool_assignment, import_file_object, read_local_config
+from keyup.common import debug_mode, os_parityPath
+from keyup.hostenv import syslog_enabled, syslog_path
+from keyup.script_utils import bool_assignment, read_local_config
 from keyup import logger, __version__
 from keyup.variables import act, bd, bdwt, cm, exit_codes, frame, rd, rst
 from keyup.variables import splitchar, text, yl, url, os_type
@@ -69,9 +69,9 @@ class UpdateConfig():
             r = self.update(cfg=self.cfg_file, debug=debug)
 
         else:
-            logger.info('local config file [%s] not found, creating using defaults.' % local_file)
+            logger.info('local config file [%s] not found, creating using defaults.', local_file)
             self.cfg_file = local_config['PROJECT']['CONFIG_PATH']
-            self.local_config = local_config
+            self.local_config = local_config.copy()
             self.parameters = self.preload_parameters(local_config)
             r = self.config_directory(cfg=self.cfg_file)
             if r:
@@ -101,8 +101,8 @@ class UpdateConfig():
 
         except KeyError as e:
             logger.info(
-                'KeyError parsing pre-existing config (%s). Replacing config file' %
-                str(e))
+                'KeyError parsing pre-existing config (%s). Replacing config file',
+                e)
             os.remove(self.cfg_file)
             params['enable_logging'] = local_config['LOGGING']['ENABLE_LOGGING']
             params['log_mode'] = local_config['LOGGING']['LOG_MODE']
@@ -157,17 +157,18 @@ class UpdateConfig():
                     sys.stdout.write(text)
                     question2 = (
                             '\n\tLog messages to ' + Colors.BOLD + cm.bwt +
-                            'FILE' + rst + text + ', or the system logger, ' +
+                            'FILE' + rst + text + ', a file written in the background, ' +
+                            cm.bd + cm.bwt + 'QUEUE' + rst + text + ', or the system logger, ' +
                             cm.bd + cm.bwt + 'SYSLOG' + rst +
                             text + '? ' + rst + '[FILE] '
                         )
                     answer2 = (input(question2).upper() or 'FILE')
-                    self.parameters['log_mode'] = converge_answer(question2, ['FILE', 'SYSLOG'], answer2)
+                    self.parameters['log_mode'] = converge_answer(question2, ['FILE', 'QUEUE', 'SYSLOG'], answer2)
                     #    stdout_message(msg)
                     print(rst + '\n\tLogging mode set to: %s\n' % self.parameters['log_mode'])
 
                     # Q3 logging
-                    if self.parameters['log_mode'] == 'FILE':
+                    if self.parameters['log_mode'] in ('FILE', 'QUEUE'):
                         default = os_parityPath(self.parameters['log_path'])
                         msg = (
                                 '\n\t{}Log file location? [{}]:  '.format(text, url + default + rst + text)
@@ -199,9 +200,9 @@ class UpdateConfig():
                             self.parameters['log_path'] = os_parityPath(self.parameters['log_path'])
                             self.parameters['log_filename'] = 'keyup.log'
                         else:
-                            logpath = '/var/log/messages' if distrotype() == 'rhel' else '/var/log/syslog'
+                            logpath = syslog_path()
                             self.parameters['log_path'] = logpath
-                            self.parameters['log_filename'] = 'messages' if distrotype() == 'rhel' else 'syslog'
+                            self.parameters['log_filename'] = os.path.basename(logpath)
 
                     else:
                         tab = '\t'.expandtabs(22)
@@ -341,13 +342,13 @@ class UpdateConfig():
                 if not os.path.exists(path):
                     os.mkdir(path)
                     os.chmod(path, 0o700)
-                    logger.info('created directory %s' % path)
+                    logger.info('created directory %s', path)
                 else:
-                    logger.info('path exits (%s), skipping creation' % path)
+                    logger.info('path exits (%s), skipping creation', path)
         except OSError as e:
             logger.exception(
-                '%s: Could not access path to configuration file. Error: %s' %
-                (inspect.stack()[0][3], str(e))
+                'Could not access path to configuration file. Error: %s',
+                e
             )
             return False
         return True
@@ -357,16 +358,16 @@ class UpdateConfig():
         try:
 
             logger.info(
-                '%s: writing local configuration file (%s)' %
-                (inspect.stack()[0][3], cfg)
+                'writing local configuration file (%s)',
+                cfg
             )
             r = export_iterobject(parameter_dict, filename=cfg)
-            logger.info('%s: config file write complete (%s)' % (inspect.stack()[0][3], cfg))
+            logger.info('config file write complete (%s)', cfg)
 
         except OSError as e:
             logger.exception(
-                '%s: Problem writing config file (%s). Error: %s' %
-                (inspect.stack()[0][3], cfg, str(e)))
+                'Problem writing config file (%s). Error: %s',
+                cfg, e)
             return False
         return True
 
@@ -457,7 +458,7 @@ class ReadConfig():
         if os.path.exists(local_file):
             self.local_file = local_file
         else:
-            logger.info('local config file [%s] not found' % local_file)
+            logger.info('local config file [%s] not found', local_file)
         return
 
     def read(self, cfg=''):
@@ -465,12 +466,12 @@ class ReadConfig():
         # use parameter or
         cfg = cfg or self.local_file
         try:
-            json_object = import_file_object(cfg)
+            json_object = read_local_config(cfg)
             return json_object
         except IOError as e:
             logger.exception(
-                '%s: Problem opening config file (%s). Error: %s' %
-                (inspect.stack()[0][3], cfg, str(e))
+                'Problem opening config file (%s). Error: %s',
+                cfg, e
             )
             print('Problem opening config file')
             return {}
@@ -575,8 +576,8 @@ def expand_home_path(path):
             path = user_home + path[1:]
     except KeyError as e:
         logger.critical(
-            '%s: %s variable is required and not found in the environment' %
-            (inspect.stack()[0][3], str(e)))
+            '%s variable is required and not found in the environment',
+            e)
         raise e
     return path
 
@@ -661,7 +662,7 @@ def validate_fs_location(path):
 
     except OSError as e:
         msg = 'Location is not writeable. Retry.'
-        logger.info('%s: Error %s: %s.' % (inspect.stack()[0][3], str(e), msg))
+        logger.info('Error %s: %s.', e, msg)
         return False
     return True
 
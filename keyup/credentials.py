@@ -0,0 +1,344 @@
+"""
+Summary:
+    awscli credentials file engine.
+
+    - One pass over the file builds a byte-offset index of every section
+      (profile) and key, giving O(1) lookup of a profile's values
+    - Changes are recorded as byte-range patches of only the affected
+      lines; comments, ordering, and all other sections are untouched
+    - Writes are atomic: temporary file in the target directory, fsync,
+      then rename over the original
+
+    - Readers share one immutable parsed snapshot per file version,
+      keyed on (path, mtime, size, inode); a run parses the file once
+
+Module Classes:
+    - CredentialsFile:
+        offset-indexed awscli credentials file with in-place patching
+    - CredentialsSnapshot:
+        immutable parsed credentials file with precomputed profile views
+
+Module Functions:
+    - snapshot:
+        shared snapshot of the current version of a credentials file
+
+"""
+import os
+import tempfile
+import threading
+from types import MappingProxyType
+from keyup import logger
+
+
+TEMPORARY_KEYS = ('aws_security_token', 'aws_session_token')
+
+# (path, mtime, size, inode) -> CredentialsSnapshot
+snapshots = {}
+snapshots_lock = threading.Lock()
+
+
+COMMENT = (b'#', b';')
+
+
+class CredentialsFile():
+    """
+    Summary:
+        Offset-indexed awscli credentials file
+
+    Args:
+        :path (str): location of the awscli credentials file
+
+    Example:
+        keyfile = CredentialsFile('~/.aws/credentials')
+        keyfile.set('dev', 'aws_access_key_id', 'AKIA...')
+        keyfile.write()
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = b''
+        self._index = None      # profile -> {'start', 'end', 'keys': {key: (start, end, value)}}
+        self.patches = {}       # (profile, key) -> value
+        self.load()
+
+    def load(self, data=None):
+        """ reads the credentials file; offset index rebuilt on next lookup """
+        if data is not None:
+            self.data = data
+        elif os.path.isfile(self.path):
+            with open(self.path, 'rb') as f1:
+                self.data = f1.read()
+        else:
+            self.data = b''
+        self._index = None
+        self.patches = {}
+        return self
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self.build_index(self.data)
+        return self._index
+
+    @staticmethod
+    def build_index(data):
+        """
+        Summary:
+            Single pass over file contents.  Records the byte span of each
+            section and of each key line within it
+
+        Returns:
+            TYPE: dict
+        """
+        index, section, offset = {}, None, 0
+
+        for line in data.splitlines(keepends=True):
+            end = offset + len(line)
+            stripped = line.strip()
+
+            if not stripped or stripped.startswith(COMMENT):
+                pass
+
+            elif stripped.startswith(b'[') and b']' in stripped:
+                section = {'start': offset, 'end': end, 'keys': {}}
+                index[stripped[1:stripped.index(b']')].strip().decode('utf-8')] = section
+
+            elif section is not None:
+                key, sep, value = stripped.partition(b'=')
+                if not sep:
+                    key, sep, value = stripped.partition(b':')
+                section['keys'][key.strip().decode('utf-8').lower()] = (offset, end, value.strip())
+                section['end'] = end
+            offset = end
+        return index
+
+    def sections(self):
+        """ profile names in file order """
+        return list(self.index.keys())
+
+    def __contains__(self, profile):
+        return profile in self.index
+
+    def keys(self, profile):
+        """ key names of a profile, including pending additions """
+        pending = [k for (p, k) in self.patches if p == profile and k not in self.index.get(profile, {}).get('keys', {})]
+        return list(self.index.get(profile, {}).get('keys', {}).keys()) + pending
+
+    def get(self, profile, key, default=None):
+        """ value of a key in a profile; pending changes take precedence """
+        key = key.lower()
+        if (profile, key) in self.patches:
+            return self.patches[(profile, key)]
+        try:
+            return self.index[profile]['keys'][key][2].decode('utf-8')
+        except KeyError:
+            return default
+
+    def set(self, profile, key, value):
+        """ records a change; applied to disk by write """
+        self.patches[(profile, key.lower())] = value
+        return True
+
+    def changes(self):
+        """ pending changes as (profile, key, value) tuples """
+        return [(p, k, v) for (p, k), v in self.patches.items()]
+
+    def render(self):
+        """
+        Summary:
+            File contents with pending changes applied.  Existing keys are
+            replaced line for line, new keys are inserted after the last key
+            of their section, new sections are appended
+
+        Returns:
+            TYPE: bytes
+        """
+        edits, appended = [], {}
+
+        for (profile, key), value in self.patches.items():
+            line = '{} = {}\n'.format(key, value).encode('utf-8')
+            section = self.index.get(profile)
+
+            if section is None:
+                appended.setdefault(profile, []).append(line)
+            elif key in section['keys']:
+                start, end, _ = section['keys'][key]
+                original = self.data[start:end]
+                # keep the line ending of the original line
+                edits.append((start, end, line.rstrip(b'\n') + original[len(original.rstrip(b'\r\n')):]))
+            else:
+                edits.append((section['end'], section['end'], line))
+
+        output, cursor, tail = [], 0, b''
+
+        for start, end, replacement in sorted(edits, key=lambda x: x[0]):
+            chunk = self.data[cursor:start]
+            tail = chunk[-1:] or tail
+            # insertion after a final line lacking a line ending
+            if start == end and tail not in (b'', b'\n'):
+                replacement = b'\n' + replacement
+            output.extend([chunk, replacement])
+            tail = replacement[-1:]
+            cursor = end
+        output.append(self.data[cursor:])
+        body = b''.join(output)
+
+        for profile, lines in appended.items():
+            if body and not body.endswith(b'\n'):
+                body += b'\n'
+            if body and not body.endswith(b'\n\n'):
+                body += b'\n'
+            body += '[{}]\n'.format(profile).encode('utf-8') + b''.join(lines)
+        return body
+
+    def write(self, path=None):
+        """
+        Summary:
+            Atomically writes file contents with pending changes applied.
+            Writing to the source path resets the index to the new contents
+
+        Args:
+            :path (str): destination; defaults to the source file
+
+        Returns:
+            TYPE: bool, Success | Failure
+        """
+        path = path or self.path
+        directory = os.path.dirname(os.path.abspath(path))
+        mode = os.stat(path).st_mode & 0o777 if os.path.isfile(path) else 0o600
+
+        contents = self.render()
+        fd, tmp = tempfile.mkstemp(prefix='.credentials-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f1:
+                f1.write(contents)
+                f1.flush()
+                os.fsync(f1.fileno())
+            os.chmod(tmp, mode)
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception('Problem writing credentials file %s', path)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        self._fsync_directory(directory)
+        forget_snapshot(path)
+
+        if path == self.path:
+            self.load(contents)
+        return True
+
+    @staticmethod
+    def _fsync_directory(directory):
+        """ persists the rename; not supported on all platforms """
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except (OSError, AttributeError):
+            return False
+        try:
+            os.fsync(fd)
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+        return True
+
+
+class CredentialsSnapshot():
+    """
+    Summary:
+        Immutable, thread-safe parsed awscli credentials file.  Profile
+        views are computed once when the snapshot is built
+
+    Attributes:
+        :path (str): location of the credentials file
+        :static_profiles (tuple): profiles with long-term iam access keys
+        :temporary_profiles (tuple): profiles with sts session tokens
+        :role_profiles (tuple): assume role profiles (role_arn)
+        :iam_profiles (tuple): all profiles except temporary and role profiles
+    """
+    def __init__(self, path, data=b''):
+        index = CredentialsFile.build_index(data)
+        profiles = {
+            profile: MappingProxyType(
+                {k: v[2].decode('utf-8') for k, v in section['keys'].items()}
+            ) for profile, section in index.items()
+        }
+        self.path = path
+        self.profiles = MappingProxyType(profiles)
+        self.temporary_profiles = tuple(
+            x for x, keys in profiles.items() if any(k in keys for k in TEMPORARY_KEYS)
+        )
+        self.role_profiles = tuple(x for x, keys in profiles.items() if 'role_arn' in keys)
+        self.static_profiles = tuple(
+            x for x, keys in profiles.items()
+            if 'aws_access_key_id' in keys and 'aws_secret_access_key' in keys
+            and x not in self.temporary_profiles and x not in self.role_profiles
+        )
+        self.iam_profiles = tuple(
+            x for x in profiles if x not in self.temporary_profiles and x not in self.role_profiles
+        )
+
+    def sections(self):
+        """ profile names in file order """
+        return list(self.profiles.keys())
+
+    def __contains__(self, profile):
+        return profile in self.profiles
+
+    def __getitem__(self, profile):
+        return self.profiles[profile]
+
+    def get(self, profile, key, default=None):
+        """ value of a key in a profile """
+        return self.profiles.get(profile, {}).get(key.lower(), default)
+
+
+def _version(path):
+    """ (path, mtime, size, inode) of a credentials file; None if absent """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def snapshot(path):
+    """
+    Summary:
+        Parsed snapshot of the current version of a credentials file.
+        The file is parsed only when its path, mtime, size, or inode
+        differ from a previously parsed version
+
+    Args:
+        :path (str): location of the awscli credentials file
+
+    Returns:
+        CredentialsSnapshot; empty if file does not exist
+    """
+    version = _version(path)
+
+    if version is None:
+        return CredentialsSnapshot(path)
+
+    with snapshots_lock:
+        if version not in snapshots:
+            try:
+                with open(path, 'rb') as f1:
+                    data = f1.read()
+            except OSError:
+                logger.exception('Problem reading credentials file %s', path)
+                return CredentialsSnapshot(path)
+            # previous versions of this file are stale
+            for key in [x for x in snapshots if x[0] == path]:
+                snapshots.pop(key)
+            snapshots[version] = CredentialsSnapshot(path, data)
+        return snapshots[version]
+
+
+def forget_snapshot(path=None):
+    """ discards snapshots of a credentials file (or all files) """
+    with snapshots_lock:
+        for key in [x for x in snapshots if path is None or x[0] == path]:
+            snapshots.pop(key)
+    return True
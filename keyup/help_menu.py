@@ -6,90 +6,134 @@ Help Menu
 
 """
 
-from libtools import Colors, ColorMap
+from keyup.colors import Colors
 from keyup.statics import PACKAGE, CONFIG_SCRIPT
 
 
-# globals
-cm = ColorMap()
-
-
 PKG_ACCENT = Colors.ORANGE
 PARAM_ACCENT = Colors.WHITE
-bdwt = cm.bd + cm.bwt
+bdwt = Colors.BOLD + Colors.BRIGHTWHITE
+rst = Colors.RESET
 
 
-help_title = bdwt + PACKAGE + cm.rst + ' command help'
+help_title = bdwt + PACKAGE + rst + ' command help'
 
 synopsis_cmd = (
-    cm.rst + PKG_ACCENT + PACKAGE +
-    PARAM_ACCENT + ' --profile ' + cm.rst + ' [PROFILE] ' +
-    PARAM_ACCENT + '--operation ' + cm.rst + '[OPERATION]'
+    rst + PKG_ACCENT + PACKAGE +
+    PARAM_ACCENT + ' --profile ' + rst + ' [PROFILE] ' +
+    PARAM_ACCENT + '--operation ' + rst + '[OPERATION]'
     )
 
-url_doc = Colors.URL + 'http://keyup.readthedocs.io' + cm.rst
-url_sc = Colors.URL + 'https://bitbucket.org/blakeca00/keyup' + cm.rst
+url_doc = Colors.URL + 'http://keyup.readthedocs.io' + rst
+url_sc = Colors.URL + 'https://bitbucket.org/blakeca00/keyup' + rst
 
 menu_body = bdwt + """
-  DESCRIPTION""" + cm.rst + """
+  DESCRIPTION""" + rst + """
             Automated IAM Access Key Rotation for Amazon Web Services
 
             Documentation  :  """ + url_doc + """
             Source Code    :  """ + url_sc + """
     """ + bdwt + """
-  SYNOPSIS""" + cm.rst + """
+  SYNOPSIS""" + rst + """
               """ + synopsis_cmd + """
 
                              -p, --profile    <value>
                              -o, --operation  <value>
                             [-u, --user-name  <value> ]
+                            [--profiles  <value> | --all ]
+                            [--user-names  <value> | --user-file  <value> ]
+                            [--retire [--all] | --reactivate  <value> ]
                             [-q, --quiet  ]
                             [-c, --configure  ]
-                            [-R, --key-report ]
+                            [-R, --key-report  [--fleet] [--format <value>] [--output <value>] ]
                             [-d, --debug   ]
                             [-h, --help    ]
                             [-V, --version ]
     """ + bdwt + """
   OPTIONS
-        -p, --profile""" + cm.rst + """  <value>:  Profile  name of an IAM  (Identity Access
+        -p, --profile""" + rst + """  <value>:  Profile  name of an IAM  (Identity Access
             Management) user from the local awscli configuration for which
             you want to rotate access keys.
     """ + bdwt + """
-        -o, --operation""" + cm.rst + """  <value>: Operation conducted on the access key of
+        -o, --operation""" + rst + """  <value>: Operation conducted on the access key of
             the IAM user denoted in --profile value. Valid: {list, update}
 
                     - list  :  List keys and key metadata (DEFAULT)
                     - up    :  Create new keys, replace old keyset
     """ + bdwt + """
-        -u, --user-name""" + cm.rst + """  <value>:  IAM username for which you will conduct
+        -u, --user-name""" + rst + """  <value>:  IAM username for which you will conduct
             key operations  using the permissions  of the profile username
             provided with the --profile option.
     """ + bdwt + """
-        -c, --configure""" + cm.rst + """:  Configure custom values for runtime parameters.
+        --profiles""" + rst + """  <value>:  Comma-separated list of profile names from
+            the local awscli configuration.  Rotates the access keys of all
+            profiles listed in a single run (--operation up only).  Exits
+            with code 23 if rotation fails for any profile in the list.
+    """ + bdwt + """
+        --user-names""" + rst + """  <value>:  Comma-separated list of IAM usernames. Ro-
+            tates the access keys of each IAM user with the permissions of
+            the --profile user (--operation up only).  New keysets are
+            written to the local awscli profile of the same name, or to the
+            key backup location when no such profile exists.
+    """ + bdwt + """
+        --user-file""" + rst + """  <value>:  File of IAM usernames, one per line, rotated
+            as with --user-names.  Once IAM throttles requests, key create
+            and delete requests are held to IAM_WRITE_RATE per second.
+    """ + bdwt + """
+        --all""" + rst + """:  Rotate access keys of every profile found in the local
+            awscli configuration (--operation up only).
+    """ + bdwt + """
+        --retire""" + rst + """:  Delete access keys deactivated by rotations with
+            KEY_RETIREMENT set to DEFERRED once RETIREMENT_GRACE seconds
+            have elapsed.  With --all, delete every deactivated key.  Due
+            keys are also deleted at the start of each rotation.
+    """ + bdwt + """
+        --reactivate""" + rst + """  <value>:  AccessKeyId of a key deactivated by a
+            rotation awaiting deletion.  Reactivates the key and cancels its
+            deletion, undoing the rotation.
+    """ + bdwt + """
+        -c, --configure""" + rst + """:  Configure custom values for runtime parameters.
             If local configuration file does not exist,  option writes new
             local configuration file to disk.  If a file exists, overwrite
             the existing configuration with updated values.
 
               Configure runtime options:  |  Display local config file:
                                           |
-                $ """ + PKG_ACCENT + PACKAGE + PARAM_ACCENT + ' --configure' + cm.rst + """       |       $ """ + PKG_ACCENT + CONFIG_SCRIPT + PARAM_ACCENT + """
+                $ """ + PKG_ACCENT + PACKAGE + PARAM_ACCENT + ' --configure' + rst + """       |       $ """ + PKG_ACCENT + CONFIG_SCRIPT + PARAM_ACCENT + """
     """ + bdwt + """
-        -R, --key-report""" + cm.rst + """:  Key expiration report for  all identities found
+        -R, --key-report""" + rst + """:  Key expiration report for  all identities found
             in local awscli configuration files. Expired keysets are noted
             in red. Displays metadata for all keysets including key create
             date,  and the Identity Access Management (IAM) user  to which
             the awscli profile name maps in the AWS Account.
     """ + bdwt + """
-        -q, --quiet""" + cm.rst + """: Suppress stdout output when """ + PACKAGE + """ is triggered via a
+        --fleet""" + rst + """:  With --key-report,  report the access keys of every IAM
+            user in the AWS Account of --profile  from a single IAM  cred-
+            ential report.  --profile requires iam:GenerateCredentialReport
+            and iam:GetCredentialReport;  without them, users and keys are
+            listed instead (iam:ListUsers, iam:ListAccessKeys).
+    """ + bdwt + """
+        --format""" + rst + """  <value>:  Key report output format; one of table, json,
+            jsonl or csv.  Several may be given, comma-separated, from a
+            single fetch of report data.  Records are written one profile
+            at a time as results arrive.  Defaults to table on a terminal;
+            when stdout is redirected to a pipe or file, defaults to jsonl.
+    """ + bdwt + """
+        --output""" + rst + """  <value>:  File path for json, jsonl or csv key report
+            output (default: stdout).  When several formats are requested,
+            each is written to <value>.<format>.
+    """ + bdwt + """
+        -q, --quiet""" + rst + """: Suppress stdout output when """ + PACKAGE + """ is triggered via a
             scheduler such as unix cron or alternative automated means to
             rotate keys on a periodic schedule.
     """ + bdwt + """
-        -d, --debug""" + cm.rst + """:  When True, only write newly generated credentials to
+        -d, --debug""" + rst + """:  When True, only write newly generated credentials to
             temporary location on the  local filesystem instead of writing
             to local awscli config file(s).  Allows safe validation of the
             intgrity of the newly  created AWS authentication credentials.
+            Prints AWS request, throttling and retry counts on exit.
     """ + bdwt + """
-        -V, --version""" + cm.rst + """:  Print the """ + PACKAGE + """ package version.
+        -V, --version""" + rst + """:  Print the """ + PACKAGE + """ package version.
     """ + bdwt + """
-        -h, --help""" + cm.rst + """:  Show this help message and exit.
+        -h, --help""" + rst + """:  Show this help message and exit.
     """
@@ -0,0 +1,157 @@
+"""
+Summary:
+    Host environment probe.  Detects the local os, linux distribution, and
+    system logger once, on demand, instead of when modules are imported.
+
+    - Result memoized for the life of the process
+    - Distribution detection cached on disk between runs, keyed by host
+      name, kernel release and architecture; a kernel or host change
+      forces a new probe
+
+Module Functions:
+    - probe:
+        host environment details, TYPE: dict
+    - distrotype:
+        linux distribution family (amzn, debian, rhel, ubuntu) or None
+    - syslog_path:
+        file written by the system logger on this host, or None
+    - syslog_enabled:
+        True if the system logger file exists on this host
+    - syslog_socket:
+        local socket of the system logger, or None
+
+"""
+import os
+import re
+import platform
+import threading
+from keyup.cache import DiskCache, cache_ttl
+from keyup import logger
+
+
+DISTRO_FAMILIES = ('amzn', 'debian', 'rhel', 'ubuntu')
+
+SYSLOG_PATHS = {
+    "amzn": "/var/log/messages",
+    "debian": "/var/log/syslog",
+    "rhel": "/var/log/messages",
+    "ubuntu": "/var/log/syslog"
+}
+
+SYSLOG_SOCKETS = ('/dev/log', '/var/run/syslog')
+
+environment_cache = DiskCache('environment', ttl=cache_ttl('ENVIRONMENT_TTL'))
+
+_host = None
+_host_lock = threading.Lock()
+
+
+def _fingerprint():
+    """ identifies the host and kernel; cheap, no filesystem access """
+    uname = platform.uname()
+    return '{}:{}:{}:{}'.format(uname.system, uname.node, uname.release, uname.machine)
+
+
+def _detect_distro():
+    """
+    Summary:
+        Linux distribution family from os-release (ID, then ID_LIKE)
+
+    Returns:
+        amzn | debian | rhel | ubuntu | None, TYPE: str
+    """
+    try:
+        import distro
+        names = ' '.join([distro.id(), distro.like()])
+    except Exception as e:
+        logger.info('Unable to determine linux distribution: %s', e)
+        return None
+
+    for family in DISTRO_FAMILIES:
+        if re.search(family, names):
+            return family
+    return None
+
+
+def probe(refresh=False):
+    """
+    Summary:
+        Host environment details.  Probed once per process; linux
+        distribution read from the disk cache when the host is unchanged
+
+    Args:
+        :refresh (bool): ignore memoized and cached results
+
+    Returns:
+        {'os_type', 'distro', 'syslog_path'}, TYPE: dict
+    """
+    global _host
+
+    with _host_lock:
+        if _host is not None and not refresh:
+            return _host
+
+        os_type = platform.system()
+        fingerprint = _fingerprint()
+        family = None
+
+        if os_type == 'Linux':
+            cached = None if refresh else environment_cache.get(fingerprint)
+
+            if cached is not None:
+                family = cached.get('distro')
+            else:
+                family = _detect_distro()
+                environment_cache.set(fingerprint, {'distro': family})
+
+        _host = {
+            'os_type': os_type,
+            'distro': family,
+            'syslog_path': SYSLOG_PATHS.get(family)
+        }
+        return _host
+
+
+def distrotype():
+    """
+    Returns:
+        amzn | debian | rhel | ubuntu | None, TYPE: str
+    """
+    return probe()['distro']
+
+
+def syslog_path(system=None):
+    """
+    Args:
+        :system (str): distribution family; defaults to this host
+
+    Returns:
+        system logger file, TYPE: str | None
+    """
+    if system is not None:
+        return SYSLOG_PATHS.get(system)
+    return probe()['syslog_path']
+
+
+def syslog_enabled(system=None):
+    """
+    Summary:
+        Determines if the system logger is present and writing to its
+        file.  Checked on every call; only the distribution is cached
+
+    Returns:
+        True | False, TYPE: bool
+    """
+    path = syslog_path(system)
+    return bool(path) and os.path.exists(path)
+
+
+def syslog_socket():
+    """
+    Returns:
+        local system logger socket, TYPE: str | None
+    """
+    for path in SYSLOG_SOCKETS:
+        if os.path.exists(path):
+            return path
+    return None
@@ -17,38 +17,53 @@ Returns:
 
 """
 import os
-import inspect
+from types import MappingProxyType
 from botocore.exceptions import ClientError, ProfileNotFound
-from pyaws.session import client_wrapper as clientcreator
-from pyaws.utils import stdout_message
 from keyup.common import os_parityPath
+from keyup.credentials import snapshot
 from keyup.statics import local_config
 from keyup import logger
 
 
-try:
-    from configparser import ConfigParser
-except Exception:
-    logger.exception('unable to import configParser library. Exit')
-    raise e
+def iam_usernames(client):
+    """
+    Summary:
+        Streams the usernames of all iam users in an account, one page of
+        list_users results at a time
+
+    Args:
+        :client (boto3 client): iam client
+
+    Yields:
+        iam username, TYPE: str
+    """
+    for page in client.get_paginator('list_users').paginate():
+        for user in page['Users']:
+            yield user['UserName']
 
 
 def iam_users(profile):
+    """
+    Returns:
+        usernames of all iam users in the account of profile, TYPE: list
+    """
+    from keyup.sessions import boto3_session
+    from libtools import stdout_message
+
     try:
-        client = clientcreator('iam', profile=profile)
+        client = boto3_session(service='iam', profile=profile)
+        if client is not None:
+            return list(iam_usernames(client))
     except ClientError as e:
         logger.exception(
-            "%s: IAM user or role not found (Code: %s Message: %s)" %
-            (inspect.stack()[0][3], e.response['Error']['Code'],
-             e.response['Error']['Message']))
+            "IAM user or role not found (Code: %s Message: %s)",
+            e.response['Error']['Code'], e.response['Error']['Message'])
         stdout_message('IAM user or role not found ({})'.format(profile), 'WARN')
     except ProfileNotFound:
-        msg = (
-            '%s: The profile (%s) was not found in your local config' %
-            (inspect.stack()[0][3], profile))
+        msg = 'The profile ({}) was not found in your local config'.format(profile)
         stdout_message(msg, 'FAIL')
         logger.warning(msg)
-    return [x['UserName'] for x in client.list_users()['Users']]
+    return []
 
 
 def create_userlist(content, exclusions):
@@ -58,21 +73,22 @@ def create_userlist(content, exclusions):
         the exclusion list
 
     Args:
-        content (configParser object):  local awscli credentials file parsed content
+        content (dict):  local awscli credentials file parsed content
         exclusions (list):  profilenames to be excluded from return
 
     Returns:
         list of profile names from localhost awscli configuration
 
     """
-    return [x for x in content.sections() if x not in exclusions]
+    return [x for x in content if x not in exclusions]
 
 
 def temporary_profilenames(conf, exclusions=[]):
     """
     Summary:
-        Return usernames from configParser object which
-        represent temporary (iam role) credentials
+        Return profile names from the parsed credentials snapshot which
+        represent temporary (iam role) credentials:  profiles without an
+        aws_access_key_id, such as assume role (role_arn) profiles
 
     Args:
         :conf (str):  path to awscli credentials file
@@ -83,18 +99,11 @@ def temporary_profilenames(conf, exclusions=[]):
         TYPE: str
 
     """
-    config = ConfigParser()
-
-    try:
-        if os.path.isfile(conf):
-            config.read(conf)
-    except Exception:
-        logger.exception(f'{conf} configuration provided is not a filesystem object')
+    if not os.path.isfile(conf):
+        logger.warning(f'{conf} configuration provided is not a filesystem object')
 
-    for profile in config.sections():
-        if ('aws_access_key_id' or 'aws_secret_access_key') in config[profile].keys():
-            config.pop(profile)
-    return [x for x in config.sections() if x not in exclusions]
+    parsed = snapshot(conf)
+    return [x for x in parsed.sections() if 'aws_access_key_id' not in parsed[x] and x not in exclusions]
 
 
 def shared_credentials_location():
@@ -121,21 +130,43 @@ def awscli_profiles(conf):
     """
     Summary.
 
-        Returns IAM usernames from local awscli configuration
+        Returns IAM usernames from local awscli configuration; excludes
+        role and temporary credential profiles
 
+    Returns:
+        profile name -> profile keys, TYPE: dict (read-only)
+
+    """
+    if not os.path.isfile(conf):
+        logger.warning(f'{conf} configuration provided is not a filesystem object')
+
+    parsed = snapshot(conf)
+    return MappingProxyType({x: parsed[x] for x in parsed.iam_profiles})
+
+
+def profile_access_key(profile):
+    """
+    Summary:
+        AccessKeyId of the static keyset used by a profile.  Keys set in the
+        environment take precedence for the default profile, as in boto3
+
+    Args:
+        :profile (str): profile name from the local awscli configuration
+
+    Returns:
+        AccessKeyId, TYPE: str | None for temporary credentials or unknown profiles
     """
-    config = ConfigParser()
+    if profile in (None, 'default') and os.environ.get('AWS_ACCESS_KEY_ID'):
+        return os.environ['AWS_ACCESS_KEY_ID']
 
     try:
-        if os.path.isfile(conf):
-            config.read(conf)
-    except Exception:
-        logger.exception(f'{conf} configuration provided is not a filesystem object')
+        section = snapshot(shared_credentials_location())[profile or 'default']
+    except KeyError:
+        return None
 
-    for profile in config.sections():
-        if 'role_arn' in config[profile].keys() or 'aws_security_token' in config[profile].keys():
-            config.pop(profile)
-    return config
+    if 'aws_security_token' in section or 'aws_session_token' in section:
+        return None
+    return section.get('aws_access_key_id')
 
 
 def print_profiles(config, args):
@@ -143,7 +174,7 @@ def print_profiles(config, args):
     try:
         print_array(config, args)
     except OSError as e:
-        print('{}: OSError: {}'.format(inspect.stack(0)[3], e))
+        print('OSError: {}'.format(e))
         return False
     return True
 
@@ -79,7 +79,7 @@ def option_configure(debug=False, path=None):
 
     if debug:
         if os.path.isfile(path):
-            display_content(data_object=local_config, halt=True)
+            display_content(data_object=local_config.copy(), halt=True)
 
         else:
             msg = """  Local config file does not yet exist. Run:
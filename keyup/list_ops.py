@@ -5,12 +5,12 @@ Summary.
 """
 
 import sys
-import inspect
 from botocore.exceptions import ClientError
-from pyaws.session import boto3_session
+from keyup.sessions import boto3_session
 from libtools import stdout_message
 from keyup.vault import _display_keylist_header, _display_keylist_detail, _logging
 from keyup.variables import bcy, cyn, rd, rst, bd, bdwt
+from keyup.map import account_alias
 from keyup import logger
 
 try:
@@ -60,8 +60,8 @@ def query_keyinfo(account, profile, surrogate='', quiet=False):
 
         elif e.response['Error']['Code'] == 'AccessDenied':
             stdout_message(
-                ('%s: User %s has inadequate permissions to conduct key operations. Exit [Code: %d]'
-                 % (inspect.stack()[0][3], profile, exit_codes['EX_NOPERM']['Code'])),
+                ('User %s has inadequate permissions to conduct key operations. Exit [Code: %d]'
+                 % (profile, exit_codes['EX_NOPERM']['Code'])),
                 prefix='AUTH', severity='WARNING')
             logger.warning(exit_codes['EX_NOPERM']['Reason'])
             sys.exit(exit_codes['EX_NOPERM']['Code'])
@@ -82,9 +82,8 @@ def query_keyinfo(account, profile, surrogate='', quiet=False):
 
         else:
             logger.warning(
-                '%s: Inadequate User permissions (Code: %s Message: %s)' %
-                (inspect.stack()[0][3], e.response['Error']['Code'],
-                 e.response['Error']['Message']))
+                'Inadequate User permissions (Code: %s Message: %s)',
+                e.response['Error']['Code'], e.response['Error']['Message'])
             raise e
     return r['AccessKeyMetadata'], r['ResponseMetadata']['HTTPStatusCode']
 
@@ -111,10 +110,7 @@ def list_keys(account, profile, iam_user, surrogate='', stage=None, quiet=False)
     metadata, statuscode = query_keyinfo(account, profile, surrogate, quiet)
 
     if not str(statuscode).startswith('20'):
-        fx = inspect.stack()[0][3]
-        raise OSError(
-                '{}: Problem retrieving access keys for user profile: {}'.format(fx, profile)
-            )
+        raise OSError('Problem retrieving access keys for user profile: {}'.format(profile))
 
     # collect key metadata
     access_keys = [x['AccessKeyId'] for x in metadata]
@@ -128,7 +124,10 @@ def list_keys(account, profile, iam_user, surrogate='', stage=None, quiet=False)
     ]
 
     if not quiet:
-        _display_keylist_header(account, profile, iam_user, surrogate, stage)
+        _display_keylist_header(
+            account, profile, iam_user, surrogate, stage,
+            account_alias=account_alias(account, profile=profile)
+        )
 
     # log record
     [_logging(x) for x in account_stats][0]
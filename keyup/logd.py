@@ -2,19 +2,48 @@
 Summary:
     Project-level logging module
 
+    - Log records carry the calling function (%(funcName)s); callers do
+      not format function names into messages
+    - Callers pass message arguments to the logger rather than formatting
+      messages themselves, so nothing is formatted when a level is disabled
+    - ProfileAdapter attaches the awscli profile name to every record
+      logged on behalf of a profile
+    - QUEUE mode: callers only enqueue records; a background thread writes
+      them to a size-rotated LOG_PATH as text or JSON lines (LOG_FORMAT).
+      The queue is drained when the process exits
+
+Module Classes:
+    - ContextFormatter:
+        formatter which prefixes messages with per-profile context
+    - JsonFormatter:
+        formatter which renders records as single-line json documents
+    - ProfileAdapter:
+        logger adapter carrying an awscli profile name
+
+Module Functions:
+    - shutdown:
+        drains the QUEUE mode log queue and stops its writer thread
+
 """
 import os
 import sys
-import inspect
+import copy
+import time
+import json
+import queue
+import atexit
 import logging
 import logging.handlers
 from pathlib import Path
-from keyup.statics import local_config
+from keyup.statics import local_config, log_backups, log_format, log_max_bytes
 
 syslog = logging.getLogger()
 syslog.setLevel(logging.DEBUG)
 
-valid_modes = ('STEAM', 'FILE', 'SYSLOG')
+valid_modes = ('STREAM', 'FILE', 'SYSLOG', 'QUEUE')
+
+# QUEUE mode background writer
+listener = None
 
 
 def mode_assignment(mode):
@@ -30,7 +59,9 @@ def mode_assignment(mode):
         'FILESYSTEM': 'FILE',
         'SYSLOG': 'SYSLOG',
         'MESSAGES': 'SYSLOG',
-        'SYSTEM': 'SYSLOG'
+        'SYSTEM': 'SYSLOG',
+        'QUEUE': 'QUEUE',
+        'ASYNC': 'QUEUE'
     }.get(mode.upper(), 'STREAM')
 
 
@@ -47,7 +78,7 @@ def logprep(mode):
 
     """
     try:
-        if not mode.startswith('FILE'):
+        if not mode.startswith(('FILE', 'QUEUE')):
             return False
 
         log_path = local_config['LOGGING']['LOG_PATH']
@@ -60,20 +91,112 @@ def logprep(mode):
             Path(log_path).touch(mode=0o644, exist_ok=True)
 
     except OSError as e:
-        syslog.exception(f'{inspect.stack()[0][3]}: Failure while seeding log file path: {e}')
-        syslog.warning(f'{inspect.stack()[0][3]}: Log preparation fail - exit')
+        syslog.exception('Failure while seeding log file path: %s', e)
+        syslog.warning('Log preparation fail - exit')
         sys.exit(1)
     return True
 
 
 def _format_map(format):
     return {
-        'FILE': '%(asctime)s - %(pathname)s - %(name)s - [%(levelname)s]: %(message)s',
-        'STREAM': '%(pathname)s - %(name)s - [%(levelname)s]: %(message)s',
-        'SYSLOG': '- %(pathname)s - %(name)s - [%(levelname)s]: %(message)s'
+        'FILE': '%(asctime)s - %(pathname)s - %(name)s - [%(levelname)s]: %(funcName)s: %(context)s%(message)s',
+        'STREAM': '%(pathname)s - %(name)s - [%(levelname)s]: %(funcName)s: %(context)s%(message)s',
+        'SYSLOG': '- %(pathname)s - %(name)s - [%(levelname)s]: %(funcName)s: %(context)s%(message)s'
     }.get(mode_assignment(format), 'STREAM')
 
 
+class ContextFormatter(logging.Formatter):
+    """
+        Formatter which prefixes messages with the profile name of records
+        logged through a ProfileAdapter
+    """
+    def format(self, record):
+        profile = getattr(record, 'profile', None)
+        record.context = 'profile {}: '.format(profile) if profile else ''
+        return super().format(record)
+
+
+class ProfileAdapter(logging.LoggerAdapter):
+    """
+        Logger adapter for operations executed on behalf of a single profile.
+        Records carry the profile name; concurrent profile operations remain
+        distinguishable in the log
+
+    Example:
+        log = ProfileAdapter(logger, 'dev')
+        log.info('Key %s created', access_key)
+    """
+    def __init__(self, logger, profile):
+        super().__init__(logger, {'profile': profile})
+
+
+class JsonFormatter(logging.Formatter):
+    """
+        Renders each record as a json document on a single line (JSON
+        lines) for ingestion by log collection tools.  Times are UTC
+    """
+    converter = time.gmtime
+
+    def format(self, record):
+        document = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + '.%03dZ' % record.msecs,
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'profile', None):
+            document['profile'] = record.profile
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document['exception'] = record.exc_text
+        return json.dumps(document, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+        Enqueues records for the background writer.  Messages are formatted
+        in the calling thread so arguments are captured when logged;
+        tracebacks are kept apart from the message for the json format
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def shutdown():
+    """
+    Summary:
+        Writes all queued records and stops the QUEUE mode writer thread.
+        Registered to run at interpreter exit
+
+    Returns:
+        TYPE: bool, True if a writer was stopped
+    """
+    global listener
+
+    if listener is None:
+        return False
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    listener = None
+    return True
+
+
+# queued records are written before the interpreter exits
+atexit.register(shutdown)
+
+
 def getLogger(*args, **kwargs):
     """
     Summary:
@@ -94,25 +217,54 @@ def getLogger(*args, **kwargs):
         if logprep(mode_assignment(log_mode)):
             # file handler
             f_handler = logging.FileHandler(local_config['LOGGING']['LOG_PATH'])
-            f_formatter = logging.Formatter(_format_map('file'), asctime_format)
+            f_formatter = ContextFormatter(_format_map('file'), asctime_format)
             f_handler.setFormatter(f_formatter)
             logger.addHandler(f_handler)
             logger.setLevel(logging.DEBUG)
             return logger
 
+    def _logconfig_queue(logger_object):
+        global listener
+
+        if logprep(mode_assignment(log_mode)):
+            # writer thread; size-rotated log file
+            settings = local_config['LOGGING']
+            f_handler = logging.handlers.RotatingFileHandler(
+                settings['LOG_PATH'],
+                maxBytes=int(settings.get('LOG_MAX_BYTES', log_max_bytes)),
+                backupCount=int(settings.get('LOG_BACKUPS', log_backups))
+            )
+            if str(settings.get('LOG_FORMAT', log_format)).upper() == 'JSON':
+                f_handler.setFormatter(JsonFormatter())
+            else:
+                f_handler.setFormatter(ContextFormatter(_format_map('file'), asctime_format))
+
+            shutdown()
+            listener = logging.handlers.QueueListener(queue.Queue(-1), f_handler)
+            listener.start()
+
+            logger.addHandler(_QueueHandler(listener.queue))
+            logger.setLevel(logging.DEBUG)
+            return logger
+
     def _logconfig_stdout(logger_object):
         # stream handlers
         s_handler = logging.StreamHandler()
-        s_formatter = logging.Formatter(_format_map('stdout'))
+        s_formatter = ContextFormatter(_format_map('stdout'))
         s_handler.setFormatter(s_formatter)
         logger.addHandler(s_handler)
         logger.setLevel(logging.DEBUG)
         return logger
 
     def _logconfig_syslog(logger_object):
+        from keyup.hostenv import syslog_socket
+        address = syslog_socket()
+        if address is None:
+            syslog.warning('System logger socket not found; logging to stdout')
+            return _logconfig_stdout(logger_object)
         syslog_facility = 'local7' if local_config['LOGGING']['SYSLOG_FILE'] else 'user'
-        sys_handler = logging.handlers.SysLogHandler(address='/dev/log', facility=syslog_facility)
-        sys_formatter = logging.Formatter(_format_map('syslog'))
+        sys_handler = logging.handlers.SysLogHandler(address=address, facility=syslog_facility)
+        sys_formatter = ContextFormatter(_format_map('syslog'))
         sys_handler.setFormatter(sys_formatter)
         logger.addHandler(sys_handler)
         logger.setLevel(logging.DEBUG)
@@ -123,7 +275,8 @@ def getLogger(*args, **kwargs):
                 "FILE": _logconfig_file,
                 "STREAM": _logconfig_stdout,
                 "SYSLOG": _logconfig_syslog,
-            }.get(mode, lambda x: _logconfig_stdout)(_lobject)
+                "QUEUE": _logconfig_queue,
+            }.get(mode, _logconfig_stdout)(_lobject)
 
     # query local configuration for logging methodology
     log_mode = local_config['LOGGING']['LOG_MODE']
@@ -137,19 +290,17 @@ def getLogger(*args, **kwargs):
         logger.propagate = False
 
         if mode_assignment(log_mode) not in valid_modes:
-            ex = Exception(
-                    '%s: Unsupported mode indicated by log_mode value: %s' %
-                    (inspect.stack()[0][3], str(log_mode))
-                )
+            ex = Exception('Unsupported mode indicated by log_mode value: %s' % log_mode)
             raise ex
 
         if not logger.handlers:
             # branch on output format, default to stream
             return _logmode_map(mode_assignment(log_mode), logger)
+        return logger
 
     except OSError as e:
         syslog.warning(
-            '%s: [WARN]: Unknown error configuring logging objects for log mode (%s)' %
-            (inspect.stack()[0][3], str(log_mode))
+            '[WARN]: Unknown error configuring logging objects for log mode (%s)',
+            log_mode
         )
         raise e
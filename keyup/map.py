@@ -6,12 +6,13 @@ Summary:
 """
 
 import sys
-import inspect
+import threading
 from botocore.exceptions import ClientError
-from pyaws.session import boto3_session
+from keyup.sessions import boto3_session
 from libtools import stdout_message
 from libtools import Colors
-from keyup.iam_operations import local_profilenames
+from keyup.iam_operations import iam_usernames, local_profilenames, profile_access_key
+from keyup.cache import DiskCache, cache_ttl, key_digest
 from keyup import logger
 
 
@@ -27,6 +28,64 @@ except Exception:
     text = Colors.CYAN
 
 
+# profile -> (iam_user, account) mappings, keyed by access key digest
+identity_cache = DiskCache('identity', ttl=cache_ttl('IDENTITY_TTL'))
+
+# profile -> (access key, (iam_user, account)); identities resolved by this
+# process, including invalid credentials, whether or not caching is enabled
+identity_memo = {}
+identity_locks = {}
+identity_locks_guard = threading.Lock()
+
+# account id -> account alias; empty alias cached for accounts without one
+alias_cache = DiskCache('aliases', ttl=cache_ttl('ALIAS_TTL'))
+alias_locks = {}
+alias_locks_guard = threading.Lock()
+
+# account id -> iam usernames known to exist in the account
+username_cache = DiskCache('usernames', ttl=cache_ttl('USERNAME_TTL'))
+
+
+def account_alias(account, profile=None, client=None):
+    """
+    Summary:
+        Human readable alias of an AWS account.  Results, including failed
+        lookups and accounts without an alias, are cached on disk so an
+        account alias is requested at most once per ALIAS_TTL
+
+    Args:
+        :account (str): AWS account number
+        :profile (str): profile name used to query iam when not cached
+        :client (boto3 client): iam client; used in place of profile if given
+
+    Returns:
+        account alias, TYPE: str; empty str if account has no alias
+    """
+    with alias_locks_guard:
+        lock = alias_locks.setdefault(account, threading.Lock())
+
+    # one lookup per account when called concurrently
+    with lock:
+        alias = alias_cache.get(account)
+
+        if alias is not None:
+            return alias
+
+        try:
+            client = client or boto3_session(service='iam', profile=profile)
+            alias = client.list_account_aliases()['AccountAliases'][0]
+        except ClientError as e:
+            logger.info(
+                'Unable to retrieve alias for account %s (Code: %s)',
+                account, e.response['Error']['Code'])
+            alias = ''
+        except IndexError:
+            alias = ''
+
+        alias_cache.set(account, alias)
+    return alias
+
+
 def map_iam_username(username, profilename):
     """
     Summary:
@@ -41,24 +100,124 @@ def map_iam_username(username, profilename):
     if username in local_profilenames():
         return map_identity(username)[0] or username
 
-    client = boto3_session(service='iam', profile=profilename)
-    r = client.list_users()
+    if iam_user_exists(username, profilename):
+        return username
+
+    logger.warning('Username %s not found in account of profile %s', username, profilename)
+    var = Colors.RED + username + Colors.RESET
+    msg = f'Provided --username value {var} not a valid awscli profilename or iam username'
+    stdout_message(message=msg, prefix='WARN')
+    sys.exit(exit_codes['E_MISC']['Code'])
+
+
+def iam_user_exists(username, profile):
+    """
+    Summary:
+        Determines if an iam user exists in the account of a profile.
+        Usernames known to exist are cached per account for USERNAME_TTL;
+        otherwise the user is looked up directly with get_user.  All users
+        are listed, page by page, only when the profile is not permitted
+        to get other users
+
+    Args:
+        :username (str): iam username
+        :profile (str): profile name used to query iam
+
+    Returns:
+        TYPE: bool
+    """
+    account = map_identity(profile)[1] or profile
+    known = username_cache.get(account, [])
+
+    if username in known:
+        return True
+
+    client = boto3_session(service='iam', profile=profile)
 
     try:
-        if username in [x['UserName'] for x in r['Users']]:
-            return username
-    except KeyError:
-        logger.warning(f'Profilename given ({profilename}) not found in local awscli')
-        var = Colors.RED + username + Colors.RESET
-        msg = f'Provided --username value {var} not a valid awscli profilename or iam username'
-        stdout_message(message=msg, prefix='WARN')
-        sys.exit(exit_codes['E_MISC']['Code'])
+        client.get_user(UserName=username)
+        username_cache.set(account, sorted(set(known) | {username}))
+        return True
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchEntity':
+            return False
+        logger.info(
+            'Unable to get iam user %s (Code: %s); listing users',
+            username, e.response['Error']['Code'])
+
+    try:
+        usernames = set(iam_usernames(client))
+    except ClientError as e:
+        logger.warning('Unable to list iam users for profile %s (Code: %s)', profile, e.response['Error']['Code'])
+        return False
+
+    username_cache.set(account, sorted(usernames))
+    return username in usernames
+
+
+def cached_identity(profile):
+    """
+    Summary:
+        Looks up the identity of a profile in the persistent identity cache.
+        Entries are keyed by the digest of the profile's access key, so a
+        rotated key never matches the identity cached for its predecessor
+
+    Returns:
+        (iam_user, account), TYPE: tuple | None when not cached
+    """
+    access_key = profile_access_key(profile)
+    memo = identity_memo.get(profile)
+
+    if memo is not None and memo[0] == access_key and memo[1][0] is not None:
+        return memo[1]
+
+    if access_key:
+        identity = identity_cache.get(key_digest(access_key))
+        if identity:
+            return identity['iam_user'], identity['account']
+    return None
+
+
+def forget_identity(access_key):
+    """
+    Removes the cached identity of an access key which has been replaced or deleted
+    """
+    if access_key:
+        for profile, memo in list(identity_memo.items()):
+            if memo[0] == access_key:
+                identity_memo.pop(profile, None)
+        return identity_cache.delete(key_digest(access_key))
+    return False
+
+
+def authenticated(profile):
+    """
+    Summary:
+        Tests generic authentication status to AWS Account.  The identity
+        resolved is memoized, so the map_identity which follows makes no
+        further STS round trip
+
+    Returns:
+        TYPE: bool, True (Authenticated)| False (Unauthenticated)
+    """
+    try:
+        return map_identity(profile)[0] is not None
+    except ClientError as e:
+        logger.warning(
+            'Unable to authenticate profile %s (Code: %s Message: %s)',
+            profile, e.response['Error']['Code'], e.response['Error']['Message'])
+    except Exception as e:
+        logger.warning('Unable to authenticate profile %s: %s', profile, e)
+    return False
 
 
 def map_identity(profile):
     """
     Summary:
-        retrieves iam user info for profiles in awscli config
+        retrieves iam user info for profiles in awscli config.  Identities
+        are memoized per profile for the life of the process; concurrent
+        callers for one profile share a single STS round trip
     Args:
         :user (str): string, local profile user from which the current
            boto3 session object created
@@ -66,22 +225,51 @@ def map_identity(profile):
         :iam_user (str): AWS iam user corresponding to the provided
            profile user in local config
     """
+    with identity_locks_guard:
+        lock = identity_locks.setdefault(profile, threading.Lock())
+
+    with lock:
+        access_key = profile_access_key(profile)
+        memo = identity_memo.get(profile)
+
+        # memo of a replaced access key is stale
+        if memo is not None and memo[0] == access_key:
+            return memo[1]
+
+        identity = _map_identity(profile, access_key)
+        identity_memo[profile] = (access_key, identity)
+    return identity
+
+
+def _map_identity(profile, access_key):
+    """ identity from the persistent cache, otherwise from STS """
+    identity = cached_identity(profile)
+
+    if identity:
+        logger.info(
+            'profile %s mapped to iam_user: %s (cached)',
+            profile, identity[0]
+            )
+        return identity
+
     try:
         sts_client = boto3_session(service='sts', profile=profile)
         r = sts_client.get_caller_identity()
         iam_user = r['Arn'].split('/')[1]
         account = r['Account']
         logger.info(
-            '%s: profile %s mapped to iam_user: %s' %
-            (inspect.stack()[0][3], profile, iam_user)
+            'profile %s mapped to iam_user: %s',
+            profile, iam_user
             )
     except ClientError as e:
         if e.response['Error']['Code'] == 'InvalidClientTokenId':
             return None, None
         else:
             logger.warning(
-                '%s: Inadequate User permissions (Code: %s Message: %s)' %
-                (inspect.stack()[0][3], e.response['Error']['Code'],
-                 e.response['Error']['Message']))
+                'Inadequate User permissions (Code: %s Message: %s)',
+                e.response['Error']['Code'], e.response['Error']['Message'])
             raise e
+
+    if access_key:
+        identity_cache.set(key_digest(access_key), {'iam_user': iam_user, 'account': account})
     return iam_user, account
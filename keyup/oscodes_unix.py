@@ -78,6 +78,10 @@ exit_codes = {
         'Code': 22,
         'Reason': 'Keyset failed to delete.  Possible Permissions issue'
     },
+    'EX_BATCH_FAIL': {
+        'Code': 23,
+        'Reason': 'Keyset rotation failed for one or more profiles in a batch'
+    },
     'EX_DATAERR': {
         'Code': os.EX_DATAERR,
         'Reason': 'Input data incorrect'
@@ -76,5 +76,9 @@ exit_codes = {
     'EX_DELETE_FAIL': {
         'Code': 22,
         'Reason': 'Keyset failed to delete.  Possible Permissions issue'
+    },
+    'EX_BATCH_FAIL': {
+        'Code': 23,
+        'Reason': 'Keyset rotation failed for one or more profiles in a batch'
     }
 }
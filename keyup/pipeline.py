@@ -0,0 +1,141 @@
+"""
+Summary:
+    Rotation step graph.  The steps of a single-profile key rotation are
+    run as a small dependency graph: each step starts as soon as the steps
+    it requires complete, so independent steps overlap.  Start and end
+    times of every step are recorded to report the critical path, the
+    chain of steps that determines end-to-end latency.
+
+Module Classes:
+    - Step:
+        named unit of work and the names of the steps it requires
+    - Pipeline:
+        executes steps, records timings, reports the critical path
+
+"""
+import time
+import concurrent.futures
+from keyup.variables import bd, rst
+from keyup import logger
+
+
+class Step():
+    """
+        Named unit of work in a rotation
+
+    Args:
+        - **name (str)**: step name; unique within a Pipeline
+        - **function (callable)**: work function, called without arguments
+        - **requires (tuple)**: names of steps which must complete first;
+            steps of earlier runs are always complete
+    """
+    def __init__(self, name, function, requires=()):
+        self.name = name
+        self.function = function
+        self.requires = tuple(requires)
+
+
+class Pipeline():
+    """
+        Executes rotation steps and records their timings.  Steps passed to
+        a single run() call execute concurrently where requirements allow;
+        consecutive run() and call() invocations execute in sequence
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.timings = {}       # name -> (start, end, requires)
+
+    def _timed(self, step):
+        start = time.perf_counter()
+        try:
+            return step.function()
+        finally:
+            self.timings[step.name] = (start - self.origin, time.perf_counter() - self.origin, step.requires)
+
+    def call(self, name, function, *args, **kwargs):
+        """ runs a single step in the calling thread; returns its result """
+        return self._timed(Step(name, lambda: function(*args, **kwargs)))
+
+    def run(self, *steps):
+        """
+        Summary:
+            Executes steps, each as soon as its requirements complete.  The
+            first exception raised by a step (including SystemExit) is
+            re-raised once running steps finish; steps not yet started are
+            abandoned
+
+        Returns:
+            {step name: result}, TYPE: dict
+        """
+        pending = {x.name: x for x in steps}
+        results, running = {}, {}
+
+        if len(pending) == 1:
+            step = steps[0]
+            return {step.name: self._timed(step)}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            while pending or running:
+                for name in [x for x, step in pending.items() if all(y in self.timings for y in step.requires)]:
+                    running[executor.submit(self._timed, pending.pop(name))] = name
+
+                if not running:
+                    raise ValueError('Unknown or circular step requirements: {}'.format(', '.join(pending)))
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException:
+                        pending.clear()
+                        concurrent.futures.wait(running)
+                        raise
+        return results
+
+    def critical_path(self):
+        """
+        Summary:
+            Chain of steps ending with the last step to finish; each step is
+            preceded by the latest-finishing step it waited on (its required
+            steps, or any step completed before it started)
+
+        Returns:
+            [(step name, seconds)] in execution order, TYPE: list
+        """
+        if not self.timings:
+            return []
+
+        name = max(self.timings, key=lambda x: self.timings[x][1])
+        path = []
+
+        while name is not None:
+            start, end, requires = self.timings[name]
+            path.append((name, end - start))
+            candidates = [x for x in (requires or self.timings) if x in self.timings and self.timings[x][1] <= start]
+            name = max(candidates, key=lambda x: self.timings[x][1]) if candidates else None
+        return list(reversed(path))
+
+    def elapsed(self):
+        """ seconds from the first step's start to the last step's end """
+        if not self.timings:
+            return 0.0
+        return max(x[1] for x in self.timings.values()) - min(x[0] for x in self.timings.values())
+
+    def display(self, quiet=False):
+        """
+        Logs, and unless quiet prints, the critical path; serial time is
+        the sum of all step durations, the latency had every step run in
+        sequence
+        """
+        path = self.critical_path()
+        serial = sum(end - start for start, end, _ in self.timings.values())
+        summary = ' > '.join('{} {:.2f}s'.format(name, seconds) for name, seconds in path)
+
+        logger.info('Rotation critical path: %s (elapsed %.2fs, serial %.2fs)', summary, self.elapsed(), serial)
+
+        if not quiet:
+            print('\tCritical path:  {}'.format(summary).expandtabs(4))
+            print('\tElapsed:  {}{:.2f}s{}  (steps run serially: {:.2f}s)\n'.format(
+                bd, self.elapsed(), rst, serial).expandtabs(4))
+        return True
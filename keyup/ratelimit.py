@@ -0,0 +1,278 @@
+"""
+Summary:
+    Process-wide AWS request rate limiter.  Every request made by a pooled
+    keyup client passes through a token bucket for its account and API
+    family (STS, IAM read, IAM write) before it is sent.
+
+    - Buckets start unlimited; requests are not held until AWS throttles
+    - The first throttling response of a bucket applies the configured
+      rate (CONCURRENCY section); further throttling responses halve the
+      rate (multiplicative decrease); each successful request restores a
+      fraction of a call per second (additive increase), up to the
+      configured rate
+    - Throttled requests are retried by botocore with jittered exponential
+      backoff; each retry draws a token from the bucket again
+
+Module Functions:
+    - family:
+        API family of a service operation
+    - limiter:
+        shared limiter of an account and API family
+    - register:
+        attaches the limiter to a botocore client's events
+    - counters:
+        request, throttle, retry and wait counters of every limiter
+    - display_counters:
+        prints limiter counters to stdout (debug output)
+
+"""
+import time
+import threading
+from keyup.statics import local_config, rate_defaults
+from keyup import logger
+
+
+# API family -> rate ceiling parameter (CONCURRENCY section)
+rate_parameters = {
+    'sts': 'STS_RATE',
+    'iam-read': 'IAM_READ_RATE',
+    'iam-write': 'IAM_WRITE_RATE'
+}
+
+THROTTLING_CODES = (
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestLimitExceeded',
+    'TooManyRequestsException', 'RequestThrottled', 'RequestThrottledException'
+)
+
+# additive increase per successful request, calls per second
+RATE_STEP = 0.1
+
+# lowest rate reached by multiplicative decrease, calls per second
+RATE_FLOOR = 0.5
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter():
+    """
+        Token bucket shared by worker threads.  acquire() blocks until a
+        call is permitted, holding callers to an average rate with bursts
+        of up to burst calls
+
+    Args:
+        - **rate (float)**: calls per second; 0 disables the limit
+        - **burst (int)**: bucket capacity; defaults to one second of calls
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """ blocks until a call is permitted; returns seconds waited """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveLimiter(RateLimiter):
+    """
+        Token bucket with an AIMD adaptive rate.  Unlimited until the first
+        throttling response, which applies the configured rate; later
+        throttling responses halve the current rate
+
+    Args:
+        - **name (str)**: account and API family, for logging
+        - **rate (float)**: ceiling, calls per second; 0 disables the limit
+    """
+    def __init__(self, name, rate, burst=None):
+        super().__init__(rate, burst)
+        self.name = name
+        self.ceiling = self.rate
+        self.rate = 0.0         # unlimited until throttled
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    def acquire(self):
+        waited = super().acquire()
+        with self.lock:
+            self.requests += 1
+            self.waited += waited
+        return waited
+
+    def on_success(self, retries=0):
+        """ additive increase; retries made before the call succeeded are counted """
+        with self.lock:
+            self.retries += retries
+            if self.ceiling > 0 and self.rate > 0:
+                self.rate = min(self.ceiling, self.rate + RATE_STEP)
+
+    def on_throttle(self):
+        """
+        configured rate applied to an unlimited bucket, multiplicative
+        decrease otherwise; the bucket is emptied
+        """
+        with self.lock:
+            self.throttled += 1
+            if self.ceiling <= 0:
+                return
+            if self.rate <= 0:
+                self.rate = self.ceiling
+            else:
+                self.rate = max(min(RATE_FLOOR, self.ceiling), self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = time.monotonic()
+            rate = self.rate
+        logger.info('Request throttled (%s); rate reduced to %.2f/s', self.name, rate)
+
+    def counters(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'retries': self.retries,
+                'waited': round(self.waited, 3),
+                'rate': round(self.rate, 2)
+            }
+
+
+def configured_rate(api_family):
+    """
+    Summary:
+        Rate ceiling of an API family, applied once requests of the family
+        are throttled.  Configuration files written before the rate
+        parameters existed fall back to default
+
+    Returns:
+        calls per second, TYPE: float; 0 when unlimited
+    """
+    parameter = rate_parameters[api_family]
+    try:
+        rate = float(local_config['CONCURRENCY'][parameter])
+    except (KeyError, TypeError, ValueError):
+        rate = rate_defaults[parameter]
+    return max(0.0, rate)
+
+
+def family(service, operation):
+    """
+    Returns:
+        sts | iam-read | iam-write | service name, TYPE: str
+    """
+    if service == 'iam':
+        return 'iam-read' if operation.startswith(('Get', 'List')) else 'iam-write'
+    return service
+
+
+def limiter(account, api_family):
+    """
+    Returns:
+        shared limiter of an account and API family, TYPE: AdaptiveLimiter
+    """
+    key = (account, api_family)
+    with _limiters_lock:
+        if key not in _limiters:
+            rate = configured_rate(api_family) if api_family in rate_parameters else 0
+            _limiters[key] = AdaptiveLimiter('{} {}'.format(account, api_family), rate)
+        return _limiters[key]
+
+
+def _account(profile):
+    """ account of a profile when its identity is cached; otherwise None """
+    from keyup.map import cached_identity
+
+    identity = cached_identity(profile)
+    return identity[1] if identity else None
+
+
+def _throttled(response):
+    """ True if a response is a throttling error """
+    if response is None:
+        return False
+    http_response, parsed = response
+    code = parsed.get('Error', {}).get('Code') if isinstance(parsed, dict) else None
+    return code in THROTTLING_CODES or getattr(http_response, 'status_code', 0) == 429
+
+
+def register(client, profile=None):
+    """
+    Summary:
+        Attaches the shared limiters to a botocore client.  Each request,
+        including retries, draws a token before it is sent
+
+    Args:
+        :client (boto3 client): pooled client
+        :profile (str): profile whose credentials the client uses
+
+    Returns:
+        client, TYPE: boto3 client
+    """
+    service = client.meta.service_model.service_id.hyphenize()
+    events = client.meta.events
+    resolved = {}
+
+    def _limiter(event_name):
+        # requests made before the identity of the profile is known are
+        # limited per profile
+        operation = event_name.split('.')[-1]
+        if 'account' not in resolved:
+            account = _account(profile)
+            if account is None:
+                return limiter('profile:{}'.format(profile or 'default'), family(service, operation))
+            resolved['account'] = account
+        return limiter(resolved['account'], family(service, operation))
+
+    def _before_send(event_name=None, **kwargs):
+        _limiter(event_name).acquire()
+
+    def _needs_retry(event_name=None, response=None, **kwargs):
+        if _throttled(response):
+            _limiter(event_name).on_throttle()
+
+    def _after_call(event_name=None, http_response=None, parsed=None, **kwargs):
+        if http_response is not None and http_response.status_code < 400:
+            retries = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            _limiter(event_name).on_success(retries)
+
+    events.register('before-send.{}'.format(service), _before_send)
+    events.register_first('needs-retry.{}'.format(service), _needs_retry)
+    events.register('after-call.{}'.format(service), _after_call)
+    return client
+
+
+def counters():
+    """
+    Returns:
+        {'<account> <family>': counters}, TYPE: dict
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {x.name: x.counters() for x in limiters}
+
+
+def display_counters():
+    """
+    Prints limiter counters; debug output
+    """
+    for name, values in sorted(counters().items()):
+        print('\tRate limiter {}: {}'.format(
+            name, ', '.join('{} {}'.format(k, v) for k, v in values.items())).expandtabs(4))
+    return True
@@ -0,0 +1,166 @@
+"""
+Summary:
+    Access key readiness module.  New IAM access keys are not usable
+    until the key propagates; instead of a fixed delay, the new keypair
+    is probed against STS with exponential backoff and jitter until it
+    authenticates.  The configured KEY_ENABLE_DELAY is the upper bound.
+
+Module Functions:
+    - readiness_mode:
+        'PROBE' or 'DELAY' from the local configuration (KEY_METADATA)
+    - backoff_schedule:
+        intervals between probe attempts, bounded by a ceiling
+    - keyset_active:
+        single authentication attempt with an access keypair
+    - probe_keyset:
+        polls STS until a new keypair authenticates or ceiling elapses;
+        the pooled probe client is discarded afterwards
+    - wait_ready:
+        probes one or more new keypairs concurrently
+
+"""
+import time
+import random
+from botocore.exceptions import BotoCoreError, ClientError
+from keyup.sessions import boto3_session, invalidate
+from keyup.statics import local_config, key_readiness
+from keyup.workers import fan_out
+from keyup import logger
+
+
+BASE_DELAY = 0.5        # seconds, interval after the first probe attempt
+MAX_DELAY = 4           # seconds, maximum interval between attempts
+
+
+def readiness_mode():
+    """
+    Summary:
+        Method used to determine when new keys are usable.  Configuration
+        files written before KEY_READINESS existed fall back to default
+
+    Returns:
+        'PROBE' | 'DELAY', TYPE: str
+    """
+    mode = str(local_config['KEY_METADATA'].get('KEY_READINESS', key_readiness)).upper()
+    return mode if mode in ('PROBE', 'DELAY') else key_readiness
+
+
+def backoff_schedule(ceiling, base=BASE_DELAY, cap=MAX_DELAY):
+    """
+    Summary:
+        Sleep intervals between probe attempts.  Intervals double each
+        attempt up to cap, with equal jitter so concurrent probes do not
+        synchronise.  Intervals sum to ceiling
+
+    Args:
+        :ceiling (int): maximum total wait (seconds)
+        :base (float): first interval (seconds)
+        :cap (float): maximum single interval (seconds)
+
+    Returns:
+        intervals (seconds), TYPE: list
+    """
+    schedule, elapsed, attempt = [], 0.0, 0
+
+    while elapsed < ceiling:
+        interval = min(cap, base * 2 ** attempt)
+        interval = min(interval / 2 + random.uniform(0, interval / 2), ceiling - elapsed)
+        schedule.append(interval)
+        elapsed += interval
+        attempt += 1
+    return schedule
+
+
+def keyset_active(access_key, secret_key):
+    """
+    Summary:
+        Authenticates to STS with an access keypair
+
+    Returns:
+        TYPE: bool, True (keypair usable) | False
+    """
+    try:
+        client = boto3_session(service='sts', access_key=access_key, secret_key=secret_key)
+        client.get_caller_identity()
+    except ClientError as e:
+        logger.debug('AccessKeyId %s not yet active (Code: %s)', access_key, e.response['Error']['Code'])
+        return False
+    except BotoCoreError as e:
+        logger.debug('AccessKeyId %s probe failed (%s)', access_key, e)
+        return False
+    return True
+
+
+def probe_keyset(access_key, secret_key, ceiling, schedule=None, on_attempt=None):
+    """
+    Summary:
+        Polls STS with a new keypair until it authenticates or the
+        ceiling elapses
+
+    Args:
+        :access_key (str): new AccessKeyId
+        :secret_key (str): new SecretAccessKey
+        :ceiling (int): maximum wait (seconds); KEY_ENABLE_DELAY
+        :schedule (list): intervals between attempts; generated if omitted
+        :on_attempt (callable): invoked after every probe attempt
+
+    Returns:
+        (ready, latency, attempts), TYPE: tuple
+    """
+    start = time.time()
+    schedule = backoff_schedule(ceiling) if schedule is None else schedule
+    attempts = 0
+
+    try:
+        for interval in schedule + [None]:
+            attempts += 1
+            ready = keyset_active(access_key, secret_key)
+
+            if on_attempt:
+                on_attempt()
+
+            if ready or interval is None:
+                break
+            time.sleep(interval)
+    finally:
+        # probe client reused across attempts, not after the probe ends
+        invalidate(access_key=access_key)
+
+    return ready, time.time() - start, attempts
+
+
+def wait_ready(keysets, ceiling, schedule=None, on_attempt=None):
+    """
+    Summary:
+        Probes new keypairs concurrently; returns when every keypair
+        authenticates or the ceiling elapses.  Readiness latency of each
+        keypair is logged for tuning KEY_ENABLE_DELAY
+
+    Args:
+        :keysets (list): (access_key, secret_key) tuples
+        :ceiling (int): maximum wait (seconds); KEY_ENABLE_DELAY
+
+    Returns:
+        TYPE: bool, True (all keypairs ready) | False
+    """
+    def _probe(keyset):
+        return probe_keyset(keyset[0], keyset[1], ceiling, schedule, on_attempt)
+
+    all_ready = True
+
+    for keyset, result, e in fan_out(_probe, list(keysets)):
+        if e is not None:
+            logger.warning('Readiness probe error for AccessKeyId %s: %s', keyset[0], e)
+            all_ready = False
+            continue
+
+        ready, latency, attempts = result
+
+        if ready:
+            logger.info('AccessKeyId %s ready after %.2f seconds (%d attempts, ceiling %ds)',
+                        keyset[0], latency, attempts, ceiling)
+        else:
+            logger.warning('AccessKeyId %s not ready after %.2f seconds (%d attempts); proceeding',
+                           keyset[0], latency, attempts)
+            all_ready = False
+    return all_ready
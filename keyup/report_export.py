@@ -0,0 +1,181 @@
+"""
+Summary:
+    Machine-readable key report output.  Writes one record per profile as
+    each profile's queries complete; no table is constructed and no color
+    or column width is computed.
+
+    - json:  a single JSON array, one element per profile
+    - jsonl:  one JSON object per line
+    - csv:  header row, then one row per profile
+
+Module Functions:
+    - export_record:
+        flat, serializable record for one profile
+    - writer:
+        record writer for an output format
+    - export_report:
+        writes report records to one or more writers as they arrive
+    - tee:
+        writes report records to writers and passes them on to a renderer
+
+"""
+import csv
+import json
+import datetime
+import pytz
+from keyup.vault import KEYAGE_MAX
+from keyup.statics import local_config
+
+
+FORMATS = ('table', 'json', 'jsonl', 'csv')
+
+FIELDS = (
+    'profile', 'iam_user', 'account', 'alias', 'access_key_ids', 'key_status',
+    'CreateDate', 'days_remaining', 'status', 'error'
+)
+
+
+def export_record(profile, record, e=None):
+    """
+    Summary:
+        Flat report record for one profile
+
+    Args:
+        :profile (str): profile name from the local awscli configuration
+        :record (dict): report record from cauth.profile_keydata
+        :e (Exception): error raised querying the profile, if any
+
+    Returns:
+        record keyed by FIELDS, TYPE: dict; status one of valid, warning,
+        expired or error
+    """
+    if e is not None or record is None:
+        row = dict.fromkeys(FIELDS)
+        row.update(
+            profile=profile,
+            status='error',
+            error=str(e) if e is not None else 'Unable to locate aws account'
+        )
+        return row
+
+    expiration = record['CreateDate'] + KEYAGE_MAX
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    days = (expiration - now).days
+
+    if now >= expiration:
+        status = 'expired'
+    elif days < local_config['KEY_METADATA']['KEYAGE_WARNING']:
+        status = 'warning'
+    else:
+        status = 'valid'
+
+    return {
+        'profile': profile,
+        'iam_user': record['iam_user'],
+        'account': record.get('account_id', record['account']),
+        'alias': record.get('alias') or None,
+        'access_key_ids': record.get('access_key_ids', []),
+        'key_status': record['status'],
+        'CreateDate': record['CreateDate'].isoformat(),
+        'days_remaining': days,
+        'status': status,
+        'error': None
+    }
+
+
+class JsonWriter():
+    """ JSON array written element by element """
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def write(self, row):
+        self.stream.write(('[\n' if not self.count else ',\n') + '  ' + json.dumps(row))
+        self.stream.flush()
+        self.count += 1
+
+    def close(self):
+        self.stream.write('\n]\n' if self.count else '[]\n')
+        self.stream.flush()
+
+
+class JsonLinesWriter():
+    """ one JSON object per line """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+class CsvWriter():
+    """ csv with a header row; access key ids separated by ';' """
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(dict(row, access_key_ids=';'.join(row['access_key_ids'] or [])))
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+_writers = {
+    'json': JsonWriter,
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter
+}
+
+
+def writer(fmt, stream):
+    """
+    Args:
+        :fmt (str): json | jsonl | csv
+        :stream (file object): text stream receiving the records
+
+    Returns:
+        record writer, TYPE: JsonWriter | JsonLinesWriter | CsvWriter
+    """
+    return _writers[fmt](stream)
+
+
+def tee(records, writers):
+    """
+    Summary:
+        Writes each report record to every writer, then yields it; lets the
+        table renderer and machine-readable output share a single fetch
+
+    Args:
+        :records (iterable): (profile, record, exception) tuples
+        :writers (list): record writers
+
+    Yields:
+        (profile, record, exception), TYPE: tuple
+    """
+    for profile, record, e in records:
+        if writers:
+            row = export_record(profile, record, e)
+            for w in writers:
+                w.write(row)
+        yield profile, record, e
+
+    for w in writers:
+        w.close()
+
+
+def export_report(records, writers):
+    """
+    Summary:
+        Writes report records to writers as they arrive
+
+    Returns:
+        number of records written, TYPE: int
+    """
+    return sum(1 for _ in tee(records, writers))
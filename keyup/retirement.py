@@ -0,0 +1,295 @@
+"""
+Summary:
+    Deferred retirement of deprecated access keys (KEY_RETIREMENT DEFERRED).
+    On rotation the deprecated key is deactivated rather than deleted and
+    recorded in a local retirement ledger.  Keys whose grace period
+    (RETIREMENT_GRACE) has elapsed are deleted in one batch by
+    ``keyup --retire`` or at the start of the next rotation.  Until then a
+    rotation is undone by reactivating the deprecated key.
+
+    Unlike keyup caches, the ledger holds access key ids (never secret
+    keys); the ledger file is readable only by the user.
+
+Module Functions:
+    - deferred:
+        Determines if deferred retirement is enabled in local configuration
+    - grace_period:
+        Seconds a deactivated key is retained before deletion
+    - defer_keyset:
+        deactivates an access key and queues it for deletion
+    - retire_due:
+        deletes queued keys whose grace period has elapsed
+    - retire_pending:
+        retire_due for the start of a rotation; no-op unless deferred
+    - release_slot:
+        deletes queued keys of an iam user to free a key slot for rotation
+    - reactivate_keyset:
+        reactivates a queued key, removing it from the ledger (undo)
+
+Module Classes:
+    - RetirementLedger:
+        Thread-safe record of deactivated keys persisted to a single file
+
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+from keyup.statics import local_config, retirement_ledger, retirement_grace
+from keyup.workers import fan_out
+from keyup import logger
+
+
+def deferred():
+    """
+    Returns:
+        True if deprecated keys are deactivated and deleted later, TYPE: bool
+    """
+    return local_config['KEY_METADATA'].get('KEY_RETIREMENT', 'IMMEDIATE') == 'DEFERRED'
+
+
+def grace_period():
+    """
+    Summary:
+        Retention of deactivated keys; configuration files written before
+        the parameter existed fall back to default
+
+    Returns:
+        seconds, TYPE: int
+    """
+    return int(local_config['KEY_METADATA'].get('RETIREMENT_GRACE', retirement_grace))
+
+
+class RetirementLedger():
+    """
+        Deactivated access keys awaiting deletion, persisted as json.  Each
+        entry is keyed by AccessKeyId and records the profile (and surrogate
+        iam user) with which the key is deleted or reactivated
+
+    Args:
+        - **path (str)**: ledger file location
+    """
+    def __init__(self, path=None):
+        self.path = path or retirement_ledger
+        self.lock = threading.Lock()
+
+    def _load(self):
+        """ read ledger from disk; a missing or unreadable ledger is empty """
+        try:
+            with open(self.path) as f1:
+                entries = json.load(f1)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        """ atomic replace of the ledger file, readable only by the user """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmpfile = None
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory, mode=0o700)
+            # unique temporary file (mode 0600); concurrent keyup processes never share one
+            fd, tmpfile = tempfile.mkstemp(prefix='.' + os.path.basename(self.path) + '-', dir=directory)
+            with os.fdopen(fd, 'w') as f1:
+                json.dump(entries, f1, indent=4, sort_keys=True)
+            os.replace(tmpfile, self.path)
+        except OSError as e:
+            logger.warning('Unable to write retirement ledger (%s). Error: %s', self.path, e)
+            if tmpfile and os.path.exists(tmpfile):
+                os.remove(tmpfile)
+            return False
+        return True
+
+    def add(self, access_key, profile, surrogate=''):
+        """ queues a deactivated key; returns True if the ledger was written """
+        with self.lock:
+            entries = self._load()
+            entries[access_key] = {
+                'profile': profile,
+                'surrogate': surrogate,
+                'deactivated': time.time()
+            }
+            return self._write(entries)
+
+    def remove(self, access_key):
+        """ removes a single entry; returns True if an entry was removed """
+        with self.lock:
+            entries = self._load()
+            if entries.pop(access_key, None) is None:
+                return False
+            return self._write(entries)
+
+    def get(self, access_key):
+        with self.lock:
+            return self._load().get(access_key)
+
+    def entries(self):
+        """
+        Returns:
+            {AccessKeyId: entry}, TYPE: dict
+        """
+        with self.lock:
+            return self._load()
+
+
+ledger = RetirementLedger()
+
+
+def defer_keyset(access_key, profile, surrogate=''):
+    """
+    Summary:
+        Deactivates a deprecated access key and queues it for deletion
+
+    Args:
+        :access_key (str): AccessKeyId of the deprecated keyset
+        :profile (str): profile name from the local awscli configuration
+        :surrogate (str): iam username on which access key operations
+            are conducted by the iam user denoted in profile
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    from keyup.cli import deactivate_keyset
+
+    if not deactivate_keyset(access_key, profile, surrogate):
+        return False
+
+    if not ledger.add(access_key, profile, surrogate):
+        logger.warning('Deactivated access key %s not queued; delete manually', access_key)
+    else:
+        logger.info('Access key %s deactivated; deletion deferred %s seconds', access_key, grace_period())
+    return True
+
+
+def _delete(access_key, entry):
+    """ deletes a queued key; a key deleted by other means is also retired """
+    from botocore.exceptions import ClientError
+    from keyup.map import forget_identity
+    from keyup.sessions import boto3_session
+
+    try:
+        client = boto3_session(service='iam', profile=entry['profile'])
+        if entry.get('surrogate'):
+            client.delete_access_key(AccessKeyId=access_key, UserName=entry['surrogate'])
+        else:
+            client.delete_access_key(AccessKeyId=access_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'NoSuchEntity':
+            logger.warning(
+                'Problem deleting AccessKeyId %s (Code: %s Message: %s)',
+                access_key, e.response['Error']['Code'], e.response['Error']['Message'])
+            return False
+    forget_identity(access_key)
+    return True
+
+
+def retire_due(force=False, quiet=False):
+    """
+    Summary:
+        Deletes queued access keys whose grace period has elapsed.  Keys
+        of all profiles are deleted concurrently in one pass
+
+    Args:
+        :force (bool): delete every queued key regardless of grace period
+        :quiet (bool): suppress stdout output
+
+    Returns:
+        AccessKeyIds which could not be deleted, TYPE: list
+    """
+    from libtools import stdout_message
+
+    cutoff = time.time() - (0 if force else grace_period())
+    due = {k: v for k, v in ledger.entries().items() if v.get('deactivated', 0) <= cutoff}
+    failed = []
+
+    for access_key, deleted, e in fan_out(lambda x: _delete(x, due[x]), list(due)):
+        if deleted and e is None:
+            ledger.remove(access_key)
+            logger.info('Deferred deletion of access key %s complete', access_key)
+        else:
+            failed.append(access_key)
+
+    if not quiet and due:
+        stdout_message('Retired {} of {} deactivated access keys'.format(len(due) - len(failed), len(due)))
+    return failed
+
+
+def retire_pending(quiet=False):
+    """
+    Summary:
+        Retirement pass run at the start of a rotation; deletes keys of
+        earlier rotations whose grace period has elapsed
+
+    Returns:
+        AccessKeyIds which could not be deleted, TYPE: list
+    """
+    if not deferred():
+        return []
+    return retire_due(quiet=quiet)
+
+
+def release_slot(key_metadata, profile, surrogate=''):
+    """
+    Summary:
+        An iam user holds at most 2 access keys; while the deprecated key
+        of an earlier rotation awaits deletion, a further rotation must
+        delete it first.  Queued keys among key_metadata are deleted
+        regardless of grace period
+
+    Args:
+        :key_metadata (list): AccessKeyMetadata of the iam user's keys
+        :profile (str): profile name from the local awscli configuration
+        :surrogate (str): iam username on which access key operations
+            are conducted by the iam user denoted in profile
+
+    Returns:
+        AccessKeyMetadata of keys remaining, TYPE: list
+    """
+    entries = ledger.entries()
+    remaining = []
+
+    for metadata in key_metadata:
+        access_key = metadata['AccessKeyId']
+        if access_key in entries and _delete(access_key, dict(entries[access_key], profile=profile, surrogate=surrogate)):
+            ledger.remove(access_key)
+            logger.info('Queued access key %s deleted; superseded by rotation', access_key)
+        else:
+            remaining.append(metadata)
+    return remaining
+
+
+def reactivate_keyset(access_key):
+    """
+    Summary:
+        Undo of a rotation; reactivates a queued access key and removes it
+        from the ledger
+
+    Returns:
+        TYPE: bool, Success | Failure
+    """
+    from botocore.exceptions import ClientError
+    from keyup.sessions import boto3_session
+
+    entry = ledger.get(access_key)
+
+    if entry is None:
+        logger.warning('Access key %s not found in retirement ledger', access_key)
+        return False
+
+    try:
+        client = boto3_session(service='iam', profile=entry['profile'])
+        if entry.get('surrogate'):
+            client.update_access_key(AccessKeyId=access_key, Status='Active', UserName=entry['surrogate'])
+        else:
+            client.update_access_key(AccessKeyId=access_key, Status='Active')
+    except ClientError as e:
+        logger.warning(
+            'Problem reactivating AccessKeyId %s (Code: %s Message: %s)',
+            access_key, e.response['Error']['Code'], e.response['Error']['Message'])
+        return False
+
+    ledger.remove(access_key)
+    logger.info('Access key %s reactivated', access_key)
+    return True
@@ -18,7 +18,6 @@ import platform
 import datetime
 import re
 import logging
-import inspect
 from libtools.js import export_iterobject
 from keyup.colors import Colors
 from keyup import __version__
@@ -117,13 +116,13 @@ def import_file_object(filename):
 
     except OSError as e:
         logger.critical(
-            'import_file_object: %s error opening %s' % (str(e), str(filename))
+            'import_file_object: %s error opening %s', e, filename
         )
         raise e
     except ValueError:
         logger.info(
-            '%s: import_file_object: %s not json. file object returned' %
-            (inspect.stack()[0][3], str(filename))
+            'import_file_object: %s not json. file object returned',
+            filename
         )
         return file_obj    # reg file, not valid json
     return dict_obj
@@ -138,16 +137,22 @@ def read_local_config(cfg):
     Returns:
         dict object of values contained in local config file
     """
+    from keyup.statics import local_config
+
+    # keyup config file already parsed once per version by keyup.statics
+    if os.path.isfile(cfg) and os.path.abspath(cfg) == os.path.abspath(local_config.path):
+        return local_config.copy()
+
     try:
         if os.path.exists(cfg):
             config = import_file_object(cfg)
             return config
         else:
             logger.warning(
-                '%s: local config file (%s) not found, cannot be read' %
-                (inspect.stack()[0][3], str(cfg)))
+                'local config file (%s) not found, cannot be read',
+                cfg)
     except OSError as e:
         logger.warning(
-            'import_file_object: %s error opening %s' % (str(e), str(cfg))
+            'import_file_object: %s error opening %s', e, cfg
         )
     return {}
@@ -0,0 +1,224 @@
+"""
+Summary:
+    Process-wide boto3 session and client pool.
+
+    - One boto3 session per profile and one client per (profile, service)
+    - All sessions share a single botocore data loader, so service models
+      are read from disk and parsed once per process
+    - Clients are configured with TCP keep-alive and a connection pool
+      sized for the configured number of concurrent workers
+    - Every request of a pooled client passes through the shared rate
+      limiter of its account and API family (keyup.ratelimit); throttled
+      requests are retried up to MAX_ATTEMPTS times
+
+Module Functions:
+    - boto3_session:
+        pooled client for a service, drop-in for pyaws.session.boto3_session
+    - get_session:
+        pooled boto3 session for a profile
+    - invalidate:
+        discards pooled sessions, clients of a profile after key rotation,
+        or of an explicit access key once it is no longer needed
+
+"""
+import os
+import threading
+import boto3
+import botocore.loaders
+import botocore.session
+from botocore.config import Config
+from botocore.exceptions import InvalidRetryConfigurationError, ProfileNotFound
+from libtools import stdout_message
+from keyup.workers import max_workers
+from keyup.statics import local_config, max_attempts_default
+from keyup import ratelimit
+from keyup import logger
+
+
+DEFAULT_REGION = os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
+
+# pool state
+lock = threading.RLock()
+sessions = {}
+clients = {}
+loader = None
+
+
+def client_config():
+    """
+    Summary:
+        botocore client configuration shared by pooled clients.
+        Connection pool sized to serve every concurrent worker
+
+    Returns:
+        botocore.config.Config
+    """
+    pool_size = max(10, max_workers())
+    options = {
+        'max_pool_connections': pool_size,
+        'tcp_keepalive': True,
+        'retries': {'mode': 'standard', 'max_attempts': max_attempts()}
+    }
+    try:
+        return Config(**options)
+    except (TypeError, InvalidRetryConfigurationError):
+        # botocore versions prior to tcp_keepalive support, retry modes
+        options.pop('tcp_keepalive')
+        options['retries'] = {'max_attempts': options['retries']['max_attempts'] - 1}
+        return Config(**options)
+
+
+def max_attempts():
+    """
+    Returns:
+        attempts per request including the first, TYPE: int
+    """
+    try:
+        attempts = int(local_config['CONCURRENCY']['MAX_ATTEMPTS'])
+    except (KeyError, TypeError, ValueError):
+        attempts = max_attempts_default
+    return max(1, attempts)
+
+
+class SearchPaths(list):
+    """
+        Data loader search paths.  boto3 appends its resource path to the
+        loader of every session it creates; paths present are not added again
+    """
+    def append(self, path):
+        if path not in self:
+            super().append(path)
+
+
+def shared_loader():
+    """
+    Summary:
+        botocore data loader common to all pooled sessions.  Search paths
+        (AWS_DATA_PATH, botocore and boto3 data) are set once, when the
+        loader is created
+
+    Returns:
+        botocore.loaders.Loader
+    """
+    global loader
+    with lock:
+        if loader is None:
+            data_path = botocore.session.get_session().get_config_variable('data_path')
+            paths = SearchPaths(
+                os.path.expanduser(os.path.expandvars(x)) for x in (data_path or '').split(os.pathsep) if x
+            )
+            loader = botocore.loaders.Loader(extra_search_paths=paths)
+            paths.append(os.path.join(os.path.dirname(boto3.__file__), 'data'))
+    return loader
+
+
+def _session_key(profile, access_key=None):
+    """
+    Summary:
+        Pool key for a session.  Default profile sessions resolve keys
+        set in the environment, so those keys are part of the pool key
+    """
+    if not profile or profile == 'default':
+        return ('default', access_key or os.environ.get('AWS_ACCESS_KEY_ID') or None)
+    return (profile, access_key)
+
+
+def get_session(profile=None, access_key=None, secret_key=None):
+    """
+    Summary:
+        Returns pooled boto3 session for a profile, created on first use
+
+    Args:
+        :profile (str): profile_name of an iam user from local awscli config
+        :access_key (str): explicit AccessKeyId; overrides profile keys
+        :secret_key (str): explicit SecretAccessKey paired with access_key
+
+    Returns:
+        boto3.Session
+
+    Raises:
+        ProfileNotFound when profile does not exist in local awscli config
+    """
+    key = _session_key(profile, access_key)
+
+    with lock:
+        if key not in sessions:
+            core = botocore.session.Session(
+                profile=None if key[0] == 'default' else profile
+            )
+            core.register_component('data_loader', shared_loader())
+            # lazy components resolved once here; clients of the session
+            # are then constructed concurrently without the pool lock
+            core.get_component('credential_provider')
+            sessions[key] = boto3.Session(
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                botocore_session=core
+            )
+        return sessions[key]
+
+
+def boto3_session(service, region=DEFAULT_REGION, profile=None, access_key=None, secret_key=None):
+    """
+    Summary:
+        Returns pooled boto3 client; one client per (profile, service, region)
+
+    Args:
+        :service (str): boto3 service abbreviation ('iam', 'sts', etc)
+        :profile (str): profile_name of an iam user from local awscli config
+        :region (str):  AWS region code, optional
+        :access_key (str): explicit AccessKeyId; overrides profile keys
+        :secret_key (str): explicit SecretAccessKey paired with access_key
+
+    Returns:
+        client (boto3 object) | None if profile not found
+    """
+    region = None if service == 'iam' else region
+    key = _session_key(profile, access_key) + (service, region)
+
+    with lock:
+        client = clients.get(key)
+
+    if client is not None:
+        return client
+
+    try:
+        # client construction (endpoint, service model loading) runs outside
+        # the pool lock; the first client built for a key is kept
+        session = get_session(profile, access_key, secret_key)
+        client = ratelimit.register(
+            session.client(service, region_name=region, config=client_config()), profile
+        )
+        with lock:
+            return clients.setdefault(key, client)
+
+    except ProfileNotFound:
+        msg = 'Profile name {} was not found in your local config.'.format(profile)
+        stdout_message(msg, 'WARN')
+        logger.warning(msg)
+    return None
+
+
+def invalidate(profile=None, access_key=None):
+    """
+    Summary:
+        Discards pooled sessions and clients for a profile (or all profiles)
+        so the next request reloads rotated credentials.  With access_key,
+        discards only those created with that explicit AccessKeyId
+
+    Returns:
+        number of pooled objects discarded, TYPE: int
+    """
+    def _stale(key):
+        if access_key is not None:
+            return key[1] == access_key
+        return profile is None or key[0] == (profile or 'default')
+
+    with lock:
+        stale_sessions = [k for k in sessions if _stale(k)]
+        stale_clients = [k for k in clients if _stale(k)]
+        for k in stale_sessions:
+            sessions.pop(k)
+        for k in stale_clients:
+            clients.pop(k)
+    return len(stale_sessions) + len(stale_clients)
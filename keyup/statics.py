@@ -24,13 +24,34 @@ Module Attributes:
             - 'AGE':  keyup deprecates based on age, replacing the oldest key
             - 'AWSCLI':  keyup replaces keys currently in the local awscli config
 
+    - local_config (TYPE LocalConfig):
+        local configuration; read from config_path on first access, falls
+        back to seed_config defaults if the file does not exist
+
+    - key_readiness (TYPE str):
+        Method keyup uses to determine when newly created keys are usable.
+
+        2 values possible:
+
+            - 'PROBE':  poll STS with the new keys, KEY_ENABLE_DELAY is the upper bound
+            - 'DELAY':  wait KEY_ENABLE_DELAY seconds
+
+    - key_retirement (TYPE str):
+        Disposition of the deprecated key during rotation.
+
+        2 values possible:
+
+            - 'IMMEDIATE':  the deprecated key is deleted
+            - 'DEFERRED':  the deprecated key is deactivated and deleted
+              RETIREMENT_GRACE seconds later (keyup --retire or next rotation)
+
 """
-import json
 import os
+import copy
 import platform
-import inspect
 import logging
-from pyaws.script_utils import get_os
+import threading
+from collections.abc import MutableMapping
 from keyup._version import __version__
 
 logger = logging.getLogger(__version__)
@@ -49,20 +70,22 @@ def import_file_object(filename):
     Returns:
         dictionary obj (valid json file), file data object
     """
+    import json
+
     try:
-        handle = open(filename, 'r')
-        file_obj = handle.read()
+        with open(filename, 'r') as handle:
+            file_obj = handle.read()
         dict_obj = json.loads(file_obj)
 
     except OSError as e:
         logger.critical(
-            'import_file_object: %s error opening %s' % (str(e), str(filename))
+            'import_file_object: %s error opening %s', e, filename
         )
         raise e
     except ValueError:
         logger.info(
-            '%s: import_file_object: %s not json. file object returned' %
-            (inspect.stack()[0][3], str(filename))
+            'import_file_object: %s not json. file object returned',
+            filename
         )
         return file_obj    # reg file, not valid json
     return dict_obj
@@ -83,15 +106,33 @@ def read_local_config(cfg):
             return config
         else:
             logger.warning(
-                '%s: local config file (%s) not found, cannot be read' %
-                (inspect.stack()[0][3], str(cfg)))
+                'local config file (%s) not found, cannot be read',
+                cfg)
     except OSError as e:
         logger.warning(
-            'import_file_object: %s error opening %s' % (str(e), str(cfg))
+            'import_file_object: %s error opening %s', e, cfg
         )
     return {}
 
 
+def local_environment():
+    """
+    Summary:
+        os type and home directory of the local user
+
+    Returns:
+        TYPE: dict
+
+    Raises:
+        KeyError if HOME not set in the environment
+    """
+    os_type = platform.system()
+    if os_type == 'Windows':
+        username = os.getenv('username') or os.getenv('USER')
+        return {'os_type': os_type, 'HOME': 'C:\\Users\\' + username}
+    return {'os_type': os_type, 'HOME': os.environ['HOME']}
+
+
 def os_parityPath(path):
     """
     Converts unix paths to correct windows equivalents.
@@ -105,14 +146,14 @@ def os_parityPath(path):
 
 try:
 
-    env_info = get_os(detailed=True)
+    env_info = local_environment()
     OS = env_info['os_type']
     user_home = env_info['HOME']
 
 except KeyError as e:
     logger.critical(
-        '%s: %s variable is required and not found in the environment' %
-        (inspect.stack()[0][3], str(e)))
+        '%s variable is required and not found in the environment',
+        e)
     raise e
 else:
     # local vars -- this section executes as default; if windows, execute diff
@@ -137,11 +178,40 @@ else:
     keyage_limit = 365
     keyage_warning = 2                  # warn when 2 days till expiration
     key_deprecation = 'AGE'             # 'AWSCLI' || 'AGE'
-    rotation_delay = 9                  # seconds
+    rotation_delay = 9                  # seconds, upper bound when probing
+    key_readiness = 'PROBE'             # 'PROBE' || 'DELAY'
+    rotation_mode = 'DELETE_FIRST'      # 'DELETE_FIRST' || 'CREATE_FIRST' (zero downtime)
+    key_retirement = 'IMMEDIATE'        # 'IMMEDIATE' || 'DEFERRED' (deactivate, delete later)
+    retirement_grace = 86400            # seconds, deactivated keys retained before deletion
+    retirement_ledger = user_home + '/' + config_dir + '/' + config_subdir + '/' + 'retirement.json'
+
+    # concurrency parameters
+    max_workers_default = 10            # threads, concurrent profile operations
+    max_attempts_default = 8            # attempts per request; throttled requests retried
+    rate_defaults = {
+        "STS_RATE": 10,                 # calls per second per account once throttled, ceiling
+        "IAM_READ_RATE": 10,            # calls per second per account once throttled (Get*, List*)
+        "IAM_WRITE_RATE": 5             # calls per second per account once throttled, ceiling
+    }
+
+    # cache parameters
+    cache_dir = user_home + '/' + config_dir + '/' + config_subdir + '/' + 'cache'
+    cache_defaults = {
+        "ENABLE": True,
+        "IDENTITY_TTL": 604800,         # seconds (7 days)
+        "ALIAS_TTL": 86400,             # seconds (1 day)
+        "TOKEN_TTL": 2592000,           # seconds (30 days), expired sts tokens
+        "ENVIRONMENT_TTL": 604800,      # seconds (7 days), host environment probe
+        "CREDENTIAL_REPORT_TTL": 14400, # seconds (4 hours), iam credential report reuse
+        "USERNAME_TTL": 3600            # seconds (1 hour), iam usernames per account
+    }
 
     # logging parameters
     enable_logging = False
-    log_mode = 'FILE'
+    log_mode = 'FILE'                   # 'FILE' || 'QUEUE' || 'SYSLOG' || 'STREAM'
+    log_format = 'TEXT'                 # 'TEXT' || 'JSON' (json lines); QUEUE mode
+    log_max_bytes = 10485760            # bytes, log file rotation size; QUEUE mode
+    log_backups = 5                     # rotated log files retained; QUEUE mode
     log_filename = 'keyup.log'
     log_dir = user_home + '/' + 'logs'
     log_path = log_dir + '/' + log_filename
@@ -154,6 +224,8 @@ else:
         config_path = os_parityPath(config_path)
         log_path = os_parityPath(log_path)
         backup_location = os_parityPath(backup_location)
+        cache_dir = os_parityPath(cache_dir)
+        retirement_ledger = os_parityPath(retirement_ledger)
 
     seed_config = {
         "PROJECT": {
@@ -174,6 +246,9 @@ else:
             "LOG_FILENAME": log_filename,
             "LOG_PATH": log_path,
             "LOG_MODE": log_mode,
+            "LOG_FORMAT": log_format,
+            "LOG_MAX_BYTES": log_max_bytes,
+            "LOG_BACKUPS": log_backups,
             "SYSLOG_FILE": False
         },
         "KEY_METADATA": {
@@ -182,32 +257,133 @@ else:
             "KEYAGE_MAX_LIMIT": keyage_limit,
             "KEYAGE_WARNING": keyage_warning,
             "KEY_DEPRECATION": key_deprecation,
-            "KEY_ENABLE_DELAY": rotation_delay
+            "KEY_ENABLE_DELAY": rotation_delay,
+            "KEY_READINESS": key_readiness,
+            "ROTATION_MODE": rotation_mode,
+            "KEY_RETIREMENT": key_retirement,
+            "RETIREMENT_GRACE": retirement_grace
         },
         "KEY_BACKUP": {
             "BACKUP_ENABLE": backup_enable,
             "BACKUP_LOCATION": backup_location
-        }
+        },
+        "CONCURRENCY": {
+            "MAX_WORKERS": max_workers_default,
+            "MAX_ATTEMPTS": max_attempts_default,
+            **rate_defaults
+        },
+        "CACHE": dict(cache_defaults)
     }
 
-try:
-    if not os.path.exists(log_dir):
-        os.mkdir(log_dir)
-        os.chmod(log_dir, 0o755)
-    if os.path.exists(config_path):
-        # parse config file
-        local_config = read_local_config(cfg=config_path)
-        # fail to read, set to default config
-        if not local_config:
-            local_config = seed_config
-    else:
-        local_config = seed_config
-
-except KeyError:
-    local_config = seed_config
-except OSError as e:
-    logger.exception(
-        '%s: Error when attempting to access or create local log and config %s' %
-        (inspect.stack()[0][3], str(e))
-    )
-    raise e
+
+class LocalConfig(MutableMapping):
+    """
+    Summary:
+        Lazily loaded local configuration (config.json).  Nothing is read
+        until the first key is accessed; the parsed file is cached until
+        its mtime or size changes.  Each version of the file is validated
+        once against seed_config: missing sections and keys take default
+        values, so configuration files written by earlier versions of
+        keyup remain usable
+
+    Args:
+        :path (str): location of config.json
+        :defaults (dict): schema and default values (seed_config)
+    """
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = defaults
+        self._config = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def validate(self, config):
+        """
+        Summary:
+            Reconciles a parsed configuration with the default schema
+
+        Returns:
+            validated configuration, TYPE: dict
+        """
+        if not isinstance(config, dict):
+            logger.warning('local config file (%s) invalid; using defaults', self.path)
+            return copy.deepcopy(self.defaults)
+
+        for section, values in self.defaults.items():
+            if not isinstance(config.get(section), dict):
+                config[section] = copy.deepcopy(values)
+                continue
+            for key, value in values.items():
+                config[section].setdefault(key, copy.deepcopy(value))
+        return config
+
+    def load(self):
+        """ parsed, validated configuration; file read only if changed """
+        version = self._stat()
+
+        with self._lock:
+            if self._config is None or version != self._version:
+                config = read_local_config(self.path) if version else {}
+                self._config = self.validate(config or copy.deepcopy(self.defaults))
+                self._version = version
+            return self._config
+
+    def reload(self):
+        """ discards the cached configuration """
+        with self._lock:
+            self._config = None
+        return True
+
+    def copy(self):
+        """ independent copy of the configuration, TYPE: dict """
+        return copy.deepcopy(self.load())
+
+    def __getitem__(self, section):
+        return self.load()[section]
+
+    def __setitem__(self, section, value):
+        self.load()[section] = value
+
+    def __delitem__(self, section):
+        del self.load()[section]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.path)
+
+
+def ensure_directory(path, mode=0o755):
+    """
+    Summary:
+        Creates a directory if it does not exist.  Called by features
+        immediately before writing to the directory
+
+    Returns:
+        TYPE: bool, True (directory exists) | False
+    """
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path, mode=mode)
+    except OSError as e:
+        logger.exception(
+            'Error when attempting to create directory %s: %s',
+            path, e
+        )
+        return False
+    return True
+
+
+# read on first access
+local_config = LocalConfig(config_path, seed_config)
@@ -0,0 +1,173 @@
+"""
+Summary:
+    Temporary (sts) credentials module.  Determines if any temporary
+    credentials in the local awscli configuration are still active with
+    the fewest possible STS calls.
+
+    - Profiles are classified offline first: expiration metadata in the
+      credentials file, then tokens previously found expired (cached)
+    - Only profiles which remain ambiguous are probed, concurrently and
+      with a short timeout; probing stops at the first active profile
+
+Module Functions:
+    - expiration:
+        expiration time recorded for a temporary credentials profile
+    - classify:
+        offline classification of temporary credentials profiles
+    - probe:
+        short timeout authentication test of a single profile
+    - active_profile:
+        first temporary credentials profile found to be active
+
+"""
+import re
+import datetime
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from keyup.cache import DiskCache, cache_ttl, key_digest
+from keyup.sessions import DEFAULT_REGION, get_session
+from keyup.workers import first
+from keyup import logger
+
+
+# credentials file keys used by sts credential tools to record expiration
+EXPIRATION_KEYS = (
+    'aws_expiration', 'expiration', 'aws_session_expiration',
+    'aws_credential_expiration', 'x_security_token_expires'
+)
+TOKEN_KEYS = ('aws_session_token', 'aws_security_token')
+
+# error codes proving a token is no longer valid
+EXPIRED_CODES = ('ExpiredToken', 'ExpiredTokenException', 'InvalidClientTokenId', 'RequestExpired')
+
+PROBE_TIMEOUT = 3           # seconds
+
+EXPIRED = 'EXPIRED'
+UNKNOWN = 'UNKNOWN'
+
+# digest of sts tokens previously found expired
+token_cache = DiskCache('tokens', ttl=cache_ttl('TOKEN_TTL'))
+
+
+def expiration(keys):
+    """
+    Summary:
+        Expiration time recorded alongside temporary credentials.
+        Accepts ISO 8601 timestamps and unix epoch seconds
+
+    Args:
+        :keys (dict): keys of a profile in the credentials file
+
+    Returns:
+        timezone-aware datetime | None if absent or unparseable
+    """
+    for key in EXPIRATION_KEYS:
+        value = (keys.get(key) or '').strip()
+
+        if not value:
+            continue
+
+        if re.fullmatch(r'\d+(\.\d+)?', value):
+            return datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc)
+
+        # 2019-01-01T00:00:00Z | 2019-01-01 00:00:00.123+00:00
+        value = re.sub(r'(Z|UTC)$', '+00:00', value).replace('T', ' ')
+        value = re.sub(r'([+-]\d{2}):?(\d{2})$', r'\1\2', value)
+
+        for fmt in ('%Y-%m-%d %H:%M:%S.%f%z', '%Y-%m-%d %H:%M:%S%z', '%Y-%m-%d %H:%M:%S'):
+            try:
+                dt = datetime.datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            return dt if dt.tzinfo else dt.replace(tzinfo=datetime.timezone.utc)
+    return None
+
+
+def _token(keys):
+    for key in TOKEN_KEYS:
+        if keys.get(key):
+            return keys[key]
+    return None
+
+
+def classify(parsed, profiles):
+    """
+    Summary:
+        Classifies temporary credentials without contacting AWS
+
+    Args:
+        :parsed (CredentialsSnapshot): parsed awscli credentials file
+        :profiles (list): temporary credentials profile names
+
+    Returns:
+        profile -> EXPIRED | UNKNOWN, TYPE: dict
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    status = {}
+
+    for profile in profiles:
+        keys = parsed[profile]
+        token = _token(keys)
+        expires = expiration(keys)
+
+        if expires is not None and expires <= now:
+            status[profile] = EXPIRED
+        elif token and token_cache.get(key_digest(token)):
+            status[profile] = EXPIRED
+        else:
+            status[profile] = UNKNOWN
+
+        logger.info('temporary credentials in profile %s classified %s (expiration %s)',
+                    profile, status[profile], expires)
+    return status
+
+
+def probe(profile, token=None):
+    """
+    Summary:
+        Authenticates a profile to STS with a short timeout and no retries.
+        Tokens rejected as expired are cached so they are not probed again
+
+    Returns:
+        True (active) | False (expired, rejected) | None (undetermined)
+    """
+    config = Config(
+        connect_timeout=PROBE_TIMEOUT,
+        read_timeout=PROBE_TIMEOUT,
+        retries={'max_attempts': 0}
+    )
+    try:
+        client = get_session(profile).client('sts', region_name=DEFAULT_REGION, config=config)
+        client.get_caller_identity()
+    except ClientError as e:
+        if token and e.response['Error']['Code'] in EXPIRED_CODES:
+            token_cache.set(key_digest(token), True)
+        return False
+    except BotoCoreError as e:
+        logger.info('Unable to determine status of profile %s (%s)', profile, e)
+        return None
+    return True
+
+
+def active_profile(parsed, profiles):
+    """
+    Summary:
+        Finds an active temporary credentials profile.  Offline
+        classification first; ambiguous profiles probed concurrently,
+        returning on the first active profile found
+
+    Args:
+        :parsed (CredentialsSnapshot): parsed awscli credentials file
+        :profiles (list): temporary credentials profile names
+
+    Returns:
+        profile name, TYPE: str | None if no active profile
+    """
+    status = classify(parsed, profiles)
+    ambiguous = [x for x in profiles if status[x] == UNKNOWN]
+
+    if not ambiguous:
+        return None
+
+    match = first(lambda x: probe(x, _token(parsed[x])), ambiguous, predicate=lambda r: r is True)
+    return match[0] if match else None
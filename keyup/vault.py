@@ -37,7 +37,7 @@ def _access_keylist(stage):
         )
 
 
-def _display_keylist_header(acctnum, profilename, user, alias, stage=''):
+def _display_keylist_header(acctnum, profilename, user, alias, stage='', account_alias=''):
     # print account metadata to stdout -- header
     if stage:   # active rotation
         title = _access_keylist(_stage(stage))
@@ -47,6 +47,7 @@ def _display_keylist_header(acctnum, profilename, user, alias, stage=''):
     # print body
     print(
         title + '\n  AWS Account:\t\t' + acctnum +
+        (' (' + account_alias + ')' if account_alias else '') +
         '\n  ------------------------------------------'
         )
     print('  IAM User: \t\t%s' % (alias if alias else user))
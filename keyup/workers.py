@@ -0,0 +1,151 @@
+"""
+Summary:
+    Bounded concurrency module.  Fans out independent per-profile work
+    (STS, IAM calls) to a pool of worker threads and merges results in
+    the order the work items were submitted.
+
+Module Functions:
+    - max_workers:
+        worker count from the local configuration (CONCURRENCY section)
+    - fan_out:
+        executes a function over a sequence of items concurrently
+    - stream:
+        executes a function over items concurrently; yields each result
+        as soon as it completes
+    - first:
+        concurrent search; returns as soon as one item satisfies a predicate
+
+"""
+import concurrent.futures
+from keyup.statics import local_config, max_workers_default
+
+
+def max_workers():
+    """
+    Summary:
+        Worker thread count for concurrent operations.  Configuration files
+        written before the CONCURRENCY section existed fall back to default
+
+    Returns:
+        worker count, TYPE: int
+    """
+    try:
+        workers = int(local_config['CONCURRENCY']['MAX_WORKERS'])
+    except (KeyError, TypeError, ValueError):
+        workers = max_workers_default
+    return max(1, workers)
+
+
+def fan_out(function, items, workers=None, on_complete=None):
+    """
+    Summary:
+        Executes function(item) for every item in a bounded thread pool
+
+    Args:
+        :function (callable): work function taking a single item
+        :items (list): work items, usually awscli profile names
+        :workers (int): pool size; defaults to the configured MAX_WORKERS
+        :on_complete (callable): invoked with (item, result, exception) as
+            each work item finishes, in order of completion
+
+    Returns:
+        (item, result, exception) tuples in submission order, TYPE: list
+    """
+    items = list(items)
+    results = {}
+
+    if not items:
+        return []
+
+    pool_size = min(workers or max_workers(), len(items))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=pool_size) as executor:
+        futures = {executor.submit(function, item): index for index, item in enumerate(items)}
+
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                outcome = (items[index], future.result(), None)
+            except Exception as e:
+                outcome = (items[index], None, e)
+            results[index] = outcome
+
+            if on_complete is not None:
+                on_complete(*outcome)
+
+    # deterministic merge: submission order, independent of completion order
+    return [results[index] for index in range(len(items))]
+
+
+def stream(function, items, workers=None):
+    """
+    Summary:
+        Executes function(item) for every item in a bounded thread pool and
+        yields results in order of completion.  Results are not retained,
+        so memory is bounded by the work in flight rather than item count
+
+    Args:
+        :function (callable): work function taking a single item
+        :items (list): work items, usually awscli profile names
+        :workers (int): pool size; defaults to the configured MAX_WORKERS
+
+    Yields:
+        (item, result, exception), TYPE: tuple
+    """
+    items = list(items)
+
+    if not items:
+        return
+
+    pool_size = min(workers or max_workers(), len(items))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=pool_size) as executor:
+        futures = {executor.submit(function, item): item for item in items}
+
+        for future in concurrent.futures.as_completed(futures):
+            item = futures.pop(future)
+            try:
+                outcome = (item, future.result(), None)
+            except Exception as e:
+                outcome = (item, None, e)
+            yield outcome
+
+
+def first(function, items, predicate=bool, workers=None):
+    """
+    Summary:
+        Executes function(item) concurrently and returns as soon as one
+        result satisfies predicate.  Work items not yet started are
+        cancelled; items already running finish in the background
+
+    Args:
+        :function (callable): work function taking a single item
+        :items (list): work items
+        :predicate (callable): test applied to each result
+        :workers (int): pool size; defaults to the configured MAX_WORKERS
+
+    Returns:
+        (item, result) of the first match, TYPE: tuple | None if no match
+    """
+    items = list(items)
+
+    if not items:
+        return None
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(workers or max_workers(), len(items))
+    )
+    futures = {executor.submit(function, item): item for item in items}
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except Exception:
+                continue
+            if predicate(result):
+                return futures[future], result
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+    return None
@@ -0,0 +1,69 @@
+"""
+Shared pytest fixtures | moto iam users and local awscli configuration
+"""
+import types
+
+# aws imports
+import boto3
+
+# test imports
+import moto
+import pytest
+from keyup import hostenv
+from keyup import map as keymap
+from keyup import ratelimit
+from keyup import sessions
+from keyup.cache import DiskCache
+
+
+@pytest.fixture(autouse=True)
+def environment_cache(tmp_path, monkeypatch):
+    """ host environment cache isolated in a temporary location """
+    cache = DiskCache('environment', ttl=3600, path=str(tmp_path / 'cache' / 'environment.json'))
+    monkeypatch.setattr(hostenv, 'environment_cache', cache)
+    yield cache
+
+
+@pytest.fixture()
+def usernames():
+    """ iam users created by aws_profiles; override in a test module for more """
+    return ('developer1',)
+
+
+@pytest.fixture()
+def aws_profiles(usernames, tmp_path, monkeypatch):
+    """
+    moto iam users, each with one access key, and an awscli credentials
+    file holding a profile of the same name per user.  Identity and alias
+    caches are isolated in a temporary location; pooled clients and rate
+    limiters start empty
+
+    Yields:
+        path (credentials file), client (iam), keys ({user: AccessKey})
+    """
+    moto.mock_iam().start()
+    moto.mock_sts().start()
+    monkeypatch.setattr(keymap, 'identity_cache', DiskCache('identity', 3600, str(tmp_path / 'cache' / 'identity.json')))
+    monkeypatch.setattr(keymap, 'alias_cache', DiskCache('aliases', 3600, str(tmp_path / 'cache' / 'aliases.json')))
+    monkeypatch.setattr(keymap, 'identity_memo', {})
+    monkeypatch.setattr(ratelimit, '_limiters', {})
+    monkeypatch.delenv('AWS_ACCESS_KEY_ID', raising=False)
+    monkeypatch.delenv('AWS_SECRET_ACCESS_KEY', raising=False)
+
+    client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+    path = tmp_path / 'credentials'
+    keys = {}
+
+    with open(path, 'w') as f1:
+        for user in usernames:
+            client.create_user(UserName=user)
+            keys[user] = client.create_access_key(UserName=user)['AccessKey']
+            f1.write('[{}]\naws_access_key_id = {}\naws_secret_access_key = {}\n\n'.format(
+                user, keys[user]['AccessKeyId'], keys[user]['SecretAccessKey']))
+
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', str(path))
+    sessions.invalidate()
+    yield types.SimpleNamespace(path=str(path), client=client, keys=keys)
+    sessions.invalidate()
+    moto.mock_sts().stop()
+    moto.mock_iam().stop()
@@ -0,0 +1,210 @@
+import time
+import logging
+import configparser
+
+# aws imports
+import boto3
+
+# test imports
+import pytest
+from tests import environment
+from keyup import batch
+from keyup import cli
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+# test module globals
+TestUsers = ('developer1', 'developer2', 'developer3')
+
+
+@pytest.fixture()
+def usernames():
+    return TestUsers
+
+
+@pytest.fixture()
+def credentials_file(aws_profiles, monkeypatch):
+    """
+    moto iam users and matching awscli credentials file; no key enable delay
+    """
+    monkeypatch.setattr(cli, 'KEY_ENABLE_DELAY', 0, raising=False)
+    monkeypatch.setitem(batch.local_config['KEY_BACKUP'], 'BACKUP_ENABLE', False)
+    yield aws_profiles.path, {user: x['AccessKeyId'] for user, x in aws_profiles.keys.items()}
+
+
+class TestBatchRotation():
+    """
+    Test rotation of multiple profiles in one process
+    """
+    def test_1_rotate_profiles(self, credentials_file):
+        """
+        keys of every profile replaced; credentials file rewritten once
+        """
+        path, keys = credentials_file
+        failed = batch.rotate_profiles(list(TestUsers), quiet=True)
+        assert failed == []
+
+        parsed = configparser.ConfigParser()
+        parsed.read(path)
+        for user in TestUsers:
+            assert parsed[user]['aws_access_key_id'] != keys[user]
+
+    def test_2_failed_profile(self, credentials_file):
+        """
+        unknown profiles fail without blocking rotation of the others
+        """
+        failed = batch.rotate_profiles(['developer1', 'nonexistent'], quiet=True)
+        assert failed == ['nonexistent']
+
+    def test_3_rotate_surrogates(self, credentials_file, tmp_path, monkeypatch):
+        """
+        keys of iam users rotated by one admin profile; keysets written to
+        the matching local profile or the backup location
+        """
+        path, keys = credentials_file
+        monkeypatch.setitem(batch.local_config['KEY_BACKUP'], 'BACKUP_LOCATION', str(tmp_path / 'backup'))
+
+        client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+        client.create_user(UserName='service1')
+        deprecated = client.create_access_key(UserName='service1')['AccessKey']['AccessKeyId']
+
+        failed = batch.rotate_surrogates('developer1', ['developer2', 'service1', 'nosuchuser'], quiet=True)
+        assert failed == ['nosuchuser']
+
+        parsed = configparser.ConfigParser()
+        parsed.read(path)
+        assert parsed['developer2']['aws_access_key_id'] != keys['developer2']
+        assert parsed['developer1']['aws_access_key_id'] == keys['developer1']
+
+        current = client.list_access_keys(UserName='service1')['AccessKeyMetadata']
+        assert [x['AccessKeyId'] for x in current] != [deprecated]
+        backup = list((tmp_path / 'backup').iterdir())
+        assert len(backup) == 1 and 'service1' in backup[0].name
+
+    def test_4_create_first(self, credentials_file, monkeypatch):
+        """
+        ROTATION_MODE CREATE_FIRST: deprecated keys retired once the new
+        keysets are written and confirmed
+        """
+        path, keys = credentials_file
+        monkeypatch.setitem(batch.local_config['KEY_METADATA'], 'ROTATION_MODE', 'CREATE_FIRST')
+        deleted = []
+        retire_keyset = batch.retire_keyset
+
+        def _retire(access_key, profile, surrogate=''):
+            # new keyset installed before the deprecated key is deleted
+            parsed = configparser.ConfigParser()
+            parsed.read(path)
+            deleted.append(parsed[profile]['aws_access_key_id'] != access_key)
+            return retire_keyset(access_key, profile, surrogate)
+
+        monkeypatch.setattr(batch, 'retire_keyset', _retire)
+        failed = batch.rotate_profiles(['developer1', 'developer2'], quiet=True)
+        assert failed == [] and deleted == [True, True]
+
+        client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+        current = client.list_access_keys(UserName='developer1')['AccessKeyMetadata']
+        assert len(current) == 1 and current[0]['AccessKeyId'] != keys['developer1']
+
+    def test_5_create_first_not_ready(self, credentials_file, monkeypatch):
+        """
+        deprecated key retained when the new keyset is not confirmed usable
+        """
+        path, keys = credentials_file
+        monkeypatch.setitem(batch.local_config['KEY_METADATA'], 'ROTATION_MODE', 'CREATE_FIRST')
+        monkeypatch.setattr(batch, 'wait_keyset_enabled', lambda *args, **kwargs: False)
+
+        failed = batch.rotate_profiles(['developer1'], quiet=True)
+        assert failed == ['developer1']
+
+        client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+        current = client.list_access_keys(UserName='developer1')['AccessKeyMetadata']
+        assert keys['developer1'] in [x['AccessKeyId'] for x in current] and len(current) == 2
+
+    def test_6_shared_access_key(self, credentials_file, monkeypatch):
+        """
+        profiles sharing an access key: key rotated once, new keyset
+        written to each of them
+        """
+        path, keys = credentials_file
+        with open(path, 'a') as f1:
+            f1.write('[default]\naws_access_key_id = {}\naws_secret_access_key = secret\n\n'.format(keys['developer1']))
+
+        rotations = []
+        rotate_profile = batch.rotate_profile
+        monkeypatch.setattr(batch, 'rotate_profile', lambda profile, **kwargs: rotations.append(profile) or rotate_profile(profile, **kwargs))
+
+        failed = batch.rotate_profiles(['default', 'developer1', 'developer2'], quiet=True)
+        assert failed == [] and rotations.count('default') + rotations.count('developer1') == 1
+
+        parsed = configparser.ConfigParser()
+        parsed.read(path)
+        assert parsed['default']['aws_access_key_id'] == parsed['developer1']['aws_access_key_id'] != keys['developer1']
+
+        client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+        current = client.list_access_keys(UserName='developer1')['AccessKeyMetadata']
+        assert [x['AccessKeyId'] for x in current] == [parsed['developer1']['aws_access_key_id']]
+
+    def test_7_profile_checked_first(self, credentials_file, monkeypatch):
+        """
+        profiles absent from the credentials file fail before any iam call
+        """
+        monkeypatch.setattr(batch, 'map_identity', lambda profile: pytest.fail('iam called for ' + profile))
+        outcome = batch.rotate_profile('nonexistent')
+        assert outcome['success'] is False and 'not found' in outcome['reason']
+
+    def test_8_write_failure_backup(self, credentials_file, tmp_path, monkeypatch):
+        """
+        keysets which cannot be installed saved to the backup location,
+        whether or not BACKUP_ENABLE is set
+        """
+        path, keys = credentials_file
+        monkeypatch.setitem(batch.local_config['KEY_BACKUP'], 'BACKUP_LOCATION', str(tmp_path / 'backup'))
+
+        def _fail(keyfile, filename, debug=False):
+            raise OSError('read-only file system')
+
+        monkeypatch.setattr(batch, 'write_keyset', _fail)
+        failed = batch.rotate_profiles(['developer1', 'developer2'], quiet=True)
+        assert failed == ['developer1', 'developer2']
+
+        backup = sorted(x.name for x in (tmp_path / 'backup').iterdir())
+        assert len(backup) == 2 and 'developer1' in backup[0] and 'developer2' in backup[1]
+
+    def test_9_surrogate_write_failure(self, credentials_file, tmp_path, monkeypatch):
+        """
+        surrogate keysets which cannot be installed saved to the backup location
+        """
+        monkeypatch.setitem(batch.local_config['KEY_BACKUP'], 'BACKUP_LOCATION', str(tmp_path / 'backup'))
+
+        def _fail(keyfile, filename, debug=False):
+            raise OSError('read-only file system')
+
+        monkeypatch.setattr(batch, 'write_keyset', _fail)
+        failed = batch.rotate_surrogates('developer1', ['developer2', 'developer3'], quiet=True)
+        assert failed == ['developer2', 'developer3']
+
+        backup = sorted(x.name for x in (tmp_path / 'backup').iterdir())
+        assert len(backup) == 2 and 'developer2' in backup[0] and 'developer3' in backup[1]
+
+    def test_10_single_profile_key_selection(self, credentials_file):
+        """
+        single-profile rotation replaces the key batch rotation selects;
+        oldest key inactive
+        """
+        path, keys = credentials_file
+        cli.source_globals()
+        client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+        time.sleep(1)       # key CreateDate resolution is one second
+        second = client.create_access_key(UserName='developer1')['AccessKey']['AccessKeyId']
+        client.update_access_key(UserName='developer1', AccessKeyId=keys['developer1'], Status='Inactive')
+
+        metadata = client.list_access_keys(UserName='developer1')['AccessKeyMetadata']
+        assert cli.select_deprecated_key(metadata, 'developer1') == second
+
+        assert cli.main('up', 'developer1', auto=True, debug=False)
+        current = [x['AccessKeyId'] for x in client.list_access_keys(UserName='developer1')['AccessKeyMetadata']]
+        assert keys['developer1'] in current and second not in current and len(current) == 2
@@ -0,0 +1,130 @@
+import os
+import logging
+
+# test imports
+import pytest
+from tests import environment
+from keyup.credentials import CredentialsFile, snapshot
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+CONTENTS = """# static keys
+[developer1]
+aws_access_key_id = AKIA1
+aws_secret_access_key=SECRET1
+; rotated monthly
+
+[role-profile]
+aws_access_key_id = ASIA2
+aws_secret_access_key = SECRET2
+aws_session_token = TOKEN2
+
+[assume-role]
+role_arn = arn:aws:iam::123456789012:role/admin
+source_profile = developer1
+"""
+
+
+@pytest.fixture()
+def keyfile(tmp_path):
+    path = tmp_path / 'credentials'
+    path.write_text(CONTENTS)
+    os.chmod(str(path), 0o600)
+    yield CredentialsFile(str(path))
+
+
+class TestCredentialsFile():
+    """
+    Test offset-indexed credentials file engine
+    """
+    def test_1_index(self, keyfile):
+        assert keyfile.sections() == ['developer1', 'role-profile', 'assume-role']
+        assert keyfile.get('developer1', 'aws_secret_access_key') == 'SECRET1'
+        assert 'aws_session_token' in keyfile.keys('role-profile')
+        assert keyfile.get('missing', 'aws_access_key_id') is None
+
+    def test_2_patch_lines(self, keyfile):
+        """
+        only changed lines rewritten; comments and other sections preserved
+        """
+        keyfile.set('developer1', 'aws_access_key_id', 'AKIA3')
+        keyfile.set('developer1', 'aws_secret_access_key', 'SECRET3')
+        assert keyfile.write() is True
+
+        expected = CONTENTS.replace('AKIA1', 'AKIA3').replace('aws_secret_access_key=SECRET1', 'aws_secret_access_key = SECRET3')
+        with open(keyfile.path) as f1:
+            assert f1.read() == expected
+        assert keyfile.get('developer1', 'aws_access_key_id') == 'AKIA3'
+        assert oct(os.stat(keyfile.path).st_mode & 0o777) == oct(0o600)
+
+    def test_3_insert_keys_sections(self, keyfile):
+        keyfile.set('developer1', 'region', 'us-east-1')
+        keyfile.set('developer2', 'aws_access_key_id', 'AKIA4')
+        keyfile.write()
+
+        reloaded = CredentialsFile(keyfile.path)
+        assert reloaded.sections() == ['developer1', 'role-profile', 'assume-role', 'developer2']
+        assert reloaded.get('developer1', 'region') == 'us-east-1'
+        assert reloaded.get('developer2', 'aws_access_key_id') == 'AKIA4'
+        assert reloaded.get('role-profile', 'aws_session_token') == 'TOKEN2'
+
+    def test_4_snapshot_views(self, keyfile):
+        parsed = snapshot(keyfile.path)
+        assert parsed.static_profiles == ('developer1',)
+        assert parsed.temporary_profiles == ('role-profile',)
+        assert parsed.role_profiles == ('assume-role',)
+        assert parsed.get('developer1', 'aws_access_key_id') == 'AKIA1'
+        with pytest.raises(TypeError):
+            parsed['developer1']['aws_access_key_id'] = 'AKIA5'
+
+    def test_5_snapshot_shared(self, keyfile, monkeypatch):
+        """
+        file parsed once per version; a write produces a new snapshot
+        """
+        calls = []
+        build_index = CredentialsFile.build_index
+        monkeypatch.setattr(CredentialsFile, 'build_index', staticmethod(lambda data: calls.append(1) or build_index(data)))
+
+        first = snapshot(keyfile.path)
+        assert snapshot(keyfile.path) is first
+        assert len(calls) == 1
+
+        keyfile.set('developer1', 'aws_access_key_id', 'AKIA6')
+        keyfile.write()
+        assert snapshot(keyfile.path).get('developer1', 'aws_access_key_id') == 'AKIA6'
+
+    def test_6_current_key(self, keyfile, monkeypatch):
+        """
+        current key resolved in-process; surrogate and awscli config honoured
+        """
+        from keyup import cli
+
+        def _no_subprocess(*args, **kwargs):
+            raise AssertionError('subprocess spawned for current key lookup')
+
+        config = os.path.join(os.path.dirname(keyfile.path), 'config')
+        with open(config, 'w') as f1:
+            f1.write('[profile developer3]\naws_access_key_id = AKIA7\n')
+
+        monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', keyfile.path)
+        monkeypatch.setenv('AWS_CONFIG_FILE', config)
+        monkeypatch.setattr('subprocess.Popen', _no_subprocess)
+        assert cli.get_current_key('developer2', surrogate='developer1') == 'AKIA1'
+        assert cli.get_current_key('developer3') == 'AKIA7'
+        assert cli.get_current_key('missing') == ''
+
+    def test_7_temporary_profilenames(self, keyfile):
+        """
+        profiles without an access key, including sts session profiles
+        without role_arn; profiles holding keys excluded
+        """
+        from keyup.iam_operations import temporary_profilenames
+
+        with open(keyfile.path, 'a') as f1:
+            f1.write('\n[sts-session]\naws_session_token = TOKEN3\nregion = us-east-1\n')
+
+        assert temporary_profilenames(keyfile.path) == ['assume-role', 'sts-session']
+        assert temporary_profilenames(keyfile.path, exclusions=['assume-role']) == ['sts-session']
@@ -0,0 +1,55 @@
+import logging
+
+# test imports
+import pytest
+from tests import environment
+from keyup import hostenv
+from keyup.cache import DiskCache
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@pytest.fixture()
+def detections(tmp_path, monkeypatch):
+    """ isolated environment cache; counts distribution probes """
+    calls = []
+    monkeypatch.setattr(hostenv, 'environment_cache', DiskCache('environment', ttl=3600, path=str(tmp_path / 'environment.json')))
+    monkeypatch.setattr(hostenv, '_detect_distro', lambda: calls.append(1) or 'rhel')
+    monkeypatch.setattr(hostenv.platform, 'system', lambda: 'Linux')
+    monkeypatch.setattr(hostenv, '_host', None)
+    yield calls
+
+
+class TestHostEnvironment():
+    """
+    On-demand, memoized host environment probe
+    """
+    def test_1_memoized(self, detections):
+        """ distribution probed once per process """
+        assert hostenv.distrotype() == 'rhel'
+        assert hostenv.syslog_path() == '/var/log/messages'
+        assert hostenv.probe()['os_type'] == 'Linux'
+        assert len(detections) == 1
+
+    def test_2_disk_cache(self, detections, monkeypatch):
+        """ later processes read the distribution from the disk cache """
+        hostenv.probe()
+        # process exit: pending cache entries flushed
+        assert hostenv.environment_cache.flush() is True
+        monkeypatch.setattr(hostenv, '_host', None)
+        hostenv.environment_cache.entries = None
+
+        assert hostenv.distrotype() == 'rhel'
+        assert len(detections) == 1
+
+        hostenv.probe(refresh=True)
+        assert len(detections) == 2
+
+    def test_3_syslog_enabled(self, detections, monkeypatch):
+        """ unknown distribution or missing logger file is not an error """
+        monkeypatch.setattr(hostenv.os.path, 'exists', lambda x: x == '/var/log/messages')
+        assert hostenv.syslog_enabled() is True
+        assert hostenv.syslog_enabled('debian') is False
+        assert hostenv.syslog_enabled('unknown') is False
@@ -0,0 +1,194 @@
+import os
+import csv
+import json
+import time
+import queue
+import logging
+
+# aws imports
+import boto3
+from botocore.exceptions import ClientError
+
+# test imports
+import pytest
+from tests import environment
+from keyup import cauth
+from keyup import report_export
+from keyup.workers import fan_out, stream
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+# test module globals
+TestUsers = ('developer1', 'developer2', 'developer3', 'developer4')
+
+
+@pytest.fixture()
+def usernames():
+    return TestUsers
+
+
+@pytest.fixture()
+def credentials_file(aws_profiles):
+    """
+    iam users with access keys in moto and a matching awscli credentials
+    file containing one profile per user
+    """
+    yield aws_profiles.path
+
+
+class TestKeyReport():
+    """
+    Test concurrent generation of key report data
+    """
+    def test_1_fan_out_order(self):
+        """
+        results merged in submission order regardless of completion order
+        """
+        items = [5, 1, 4, 2, 3]
+        results = fan_out(lambda x: x * 2, items, workers=5)
+        assert [x[0] for x in results] == items
+        assert [x[1] for x in results] == [10, 2, 8, 4, 6]
+
+    def test_2_fan_out_exceptions(self):
+        """
+        exceptions are returned per item instead of aborting the pool
+        """
+        def _fail_odd(x):
+            if x % 2:
+                raise ValueError(x)
+            return x
+
+        results = fan_out(_fail_odd, [1, 2, 3, 4], workers=2)
+        assert [x[1] for x in results] == [None, 2, None, 4]
+        assert isinstance(results[0][2], ValueError)
+
+    def test_3_prepare_reportdata(self, credentials_file):
+        """
+        every profile reported once, in completion order
+        """
+        output = queue.Queue()
+        assert cauth.prepare_reportdata(output) is True
+
+        records = list(cauth.report_records(output))
+        assert sorted(x[0] for x in records) == list(TestUsers)
+        assert len(records) == len(TestUsers)
+        assert all(e is None for profile, record, e in records)
+        assert dict((x[0], x[1]) for x in records)['developer3']['iam_user'] == 'developer3'
+
+    def test_4_stream_completion_order(self):
+        """
+        results yielded as they complete, exceptions per item
+        """
+        def _wait(x):
+            time.sleep(x / 20)
+            if x == 2:
+                raise ValueError(x)
+            return x
+
+        results = list(stream(_wait, [3, 1, 2], workers=3))
+        assert [x[0] for x in results] == [1, 2, 3]
+        assert isinstance(results[1][2], ValueError)
+
+    def test_5_render_report_rows(self, credentials_file, capsys):
+        """
+        each row printed before the next record is produced
+        """
+        output = queue.Queue()
+        cauth.prepare_reportdata(output)
+        records = list(cauth.report_records(output))
+        printed = []
+
+        def _records():
+            for record in records:
+                yield record
+                printed.append(capsys.readouterr().out)
+
+        assert cauth.render_report(_records()) is True
+        assert len(printed) == len(TestUsers)
+        for (profile, record, e), out in zip(records[1:], printed[1:]):
+            assert len(out.splitlines()) == 1 and profile in out
+
+    def test_6_export_formats(self, credentials_file, tmp_path):
+        """
+        json, jsonl and csv written from a single fetch, without color codes
+        """
+        output = queue.Queue()
+        cauth.prepare_reportdata(output)
+
+        streams = {fmt: open(tmp_path / ('report.' + fmt), 'w', newline='') for fmt in ('json', 'jsonl', 'csv')}
+        writers = [report_export.writer(fmt, stream) for fmt, stream in streams.items()]
+        assert report_export.export_report(cauth.report_records(output), writers) == len(TestUsers)
+        for stream in streams.values():
+            stream.close()
+
+        array = json.loads((tmp_path / 'report.json').read_text())
+        lines = [json.loads(x) for x in (tmp_path / 'report.jsonl').read_text().splitlines()]
+        rows = list(csv.DictReader(open(tmp_path / 'report.csv')))
+
+        assert sorted(x['profile'] for x in array) == list(TestUsers)
+        assert array == lines
+        assert [x['profile'] for x in rows] == [x['profile'] for x in lines]
+        assert all(x['status'] == 'valid' and len(x['access_key_ids']) == 1 for x in lines)
+        assert '\x1b' not in (tmp_path / 'report.csv').read_text()
+
+    def test_7_fleet_credential_report(self, credentials_file, monkeypatch):
+        """
+        every iam user with keys reported from the credential report; rows
+        match those of the per-profile report, including users with two keys
+        """
+        monkeypatch.setattr(cauth, 'REPORT_POLL_INTERVAL', 0)
+        client = boto3.client('iam', aws_access_key_id='testing', aws_secret_access_key='testing')
+        client.create_user(UserName='service1')
+        client.create_access_key(UserName='service1')
+        client.create_user(UserName='nokeys')
+
+        # two keys: original key deactivated, second key reported
+        first = client.list_access_keys(UserName='developer2')['AccessKeyMetadata'][0]['AccessKeyId']
+        client.create_access_key(UserName='developer2')
+        client.update_access_key(UserName='developer2', AccessKeyId=first, Status='Inactive')
+
+        fleet, output = queue.Queue(), queue.Queue()
+        assert cauth.prepare_fleetdata('developer1', fleet) is True
+        cauth.prepare_reportdata(output)
+
+        users = {x[0]: x[1] for x in cauth.report_records(fleet)}
+        profiles = {x[0]: x[1] for x in cauth.report_records(output)}
+        assert sorted(users) == sorted(TestUsers + ('service1',))
+        for user in TestUsers:
+            assert cauth.format_row(user, users[user]) == cauth.format_row(user, profiles[user])
+            assert (users[user]['status'], users[user]['CreateDate']) == (profiles[user]['status'], profiles[user]['CreateDate'])
+        assert profiles['developer2']['status'] == 'Active'
+
+    def test_8_fleet_fallback(self, credentials_file, monkeypatch):
+        """
+        users and keys listed when credential reports are not permitted
+        """
+        def _denied(client):
+            raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'denied'}}, 'GenerateCredentialReport')
+
+        monkeypatch.setattr(cauth, 'credential_report', _denied)
+        fleet = queue.Queue()
+        assert cauth.prepare_fleetdata('developer1', fleet) is True
+
+        records = list(cauth.report_records(fleet))
+        assert sorted(x[0] for x in records) == list(TestUsers)
+        assert all(len(x[1]['access_key_ids']) == 1 for x in records)
+
+    def test_9_default_format(self, monkeypatch):
+        """
+        table on a terminal; json lines when stdout is a pipe or file
+        """
+        from keyup import cli
+
+        monkeypatch.setattr(cli.sys.stdout, 'isatty', lambda: True)
+        assert cli.report_formats(None) == ['table']
+
+        monkeypatch.setattr(cli.sys.stdout, 'isatty', lambda: False)
+        assert cli.report_formats(None) == ['jsonl']
+        assert cli.report_formats(['csv,json', 'csv']) == ['csv', 'json']
+
+        with pytest.raises(SystemExit):
+            cli.report_formats(['xml'])
@@ -0,0 +1,122 @@
+import io
+import os
+import sys
+import json
+import logging
+import subprocess
+
+# test imports
+import pytest
+from tests import environment
+from keyup import logd
+from keyup.logd import ContextFormatter, ProfileAdapter, _format_map
+from keyup.statics import local_config
+
+
+@pytest.fixture()
+def stream_logger():
+    """ isolated logger writing keyup STREAM format records to a buffer """
+    buffer = io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(ContextFormatter(_format_map('stream')))
+    log = logging.getLogger('keyup-test-logd')
+    log.handlers = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    yield log, buffer
+    log.handlers = []
+
+
+class Unformattable():
+    """ fails the test if formatted """
+    def __str__(self):
+        raise AssertionError('message formatted for a disabled level')
+
+
+class TestLogFormat():
+    """
+    Function names and profile context taken from log records
+    """
+    def test_1_function_name(self, stream_logger):
+        log, buffer = stream_logger
+
+        def rotate_profile():
+            log.info('AccessKeyId %s created', 'AKIA0000')
+
+        rotate_profile()
+        assert buffer.getvalue().strip().endswith('[INFO]: rotate_profile: AccessKeyId AKIA0000 created')
+
+    def test_2_profile_context(self, stream_logger):
+        log, buffer = stream_logger
+
+        def profile_keydata():
+            ProfileAdapter(log, 'dev').info('key info found for account %s', '123456789012')
+            log.info('report complete')
+
+        profile_keydata()
+        lines = buffer.getvalue().strip().splitlines()
+        assert lines[0].endswith('profile_keydata: profile dev: key info found for account 123456789012')
+        assert lines[1].endswith('profile_keydata: report complete')
+
+    def test_3_lazy_formatting(self, stream_logger):
+        log, buffer = stream_logger
+        log.debug('not formatted %s', Unformattable())
+        ProfileAdapter(log, 'dev').debug('not formatted %s', Unformattable())
+        assert buffer.getvalue() == ''
+
+
+@pytest.fixture()
+def queue_mode(tmp_path, monkeypatch):
+    """ QUEUE mode, json lines, small rotation size """
+    settings = local_config['LOGGING']
+    for key, value in (
+            ('LOG_MODE', 'QUEUE'), ('LOG_FORMAT', 'JSON'), ('LOG_PATH', str(tmp_path / 'keyup.log')),
+            ('LOG_MAX_BYTES', 4096), ('LOG_BACKUPS', 2)):
+        monkeypatch.setitem(settings, key, value)
+    log = logd.getLogger('keyup-test-' + tmp_path.name)
+    yield log, tmp_path
+    logd.shutdown()
+    log.handlers = []
+
+
+class TestQueueMode():
+    """
+    Background log writer
+    """
+    def test_1_json_lines(self, queue_mode):
+        log, path = queue_mode
+
+        def rotate_profile():
+            ProfileAdapter(log, 'dev').info('AccessKeyId %s created', 'AKIA0000')
+            try:
+                raise ValueError('invalid keyset')
+            except ValueError:
+                log.exception('Problem writing keyset')
+
+        rotate_profile()
+        assert logd.shutdown() is True
+
+        records = [json.loads(x) for x in (path / 'keyup.log').read_text().splitlines()]
+        assert records[0]['function'] == 'rotate_profile'
+        assert records[0]['profile'] == 'dev'
+        assert records[0]['message'] == 'AccessKeyId AKIA0000 created'
+        assert 'ValueError: invalid keyset' in records[1]['exception']
+
+    def test_2_rotation(self, queue_mode):
+        log, path = queue_mode
+        for i in range(200):
+            log.info('record %d', i)
+        logd.shutdown()
+        assert sorted(x.name for x in path.iterdir()) == ['keyup.log', 'keyup.log.1', 'keyup.log.2']
+
+    def test_3_flush_on_exit(self, tmp_path):
+        """ records queued when the interpreter exits are written """
+        script = '\n'.join([
+            'from keyup import logd, statics',
+            'statics.local_config["LOGGING"].update(LOG_MODE="QUEUE", LOG_PATH={!r})'.format(str(tmp_path / 'keyup.log')),
+            'log = logd.getLogger("keyup-test-exit")',
+            '[log.info("record %d", i) for i in range(500)]'
+        ])
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', script], cwd=root, check=True, env=dict(os.environ, PYTHONPATH=root))
+        assert len((tmp_path / 'keyup.log').read_text().splitlines()) == 500
@@ -0,0 +1,58 @@
+import time
+import logging
+
+# test imports
+import pytest
+from tests import environment
+from keyup.pipeline import Pipeline, Step
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def pause(seconds, value=None):
+    """ step standing in for an AWS round trip """
+    time.sleep(seconds)
+    return value
+
+
+class TestPipeline():
+    """
+    Test concurrent execution of rotation steps
+    """
+    def test_1_independent_steps_overlap(self):
+        pipeline = Pipeline()
+        results = pipeline.run(
+            Step('map_identity', lambda: pause(0.2, ('developer1', '123456789012'))),
+            Step('clean_config', lambda: pause(0.2, True))
+        )
+        assert results == {'map_identity': ('developer1', '123456789012'), 'clean_config': True}
+        assert pipeline.elapsed() < 0.35
+
+    def test_2_requirements(self):
+        """ dependent step starts after its requirement; independent step does not wait """
+        pipeline = Pipeline()
+        pipeline.call('write_keyset', pause, 0.05, True)
+        pipeline.run(
+            Step('wait_keyset_enabled', lambda: pause(0.2, True)),
+            Step('write_keyset_backup', lambda: pause(0.05, True)),
+            Step('list_keys (after)', lambda: pause(0.05), requires=('wait_keyset_enabled',))
+        )
+        timings = pipeline.timings
+        assert timings['list_keys (after)'][0] >= timings['wait_keyset_enabled'][1]
+        assert timings['write_keyset_backup'][0] < timings['wait_keyset_enabled'][1]
+
+        path = [name for name, seconds in pipeline.critical_path()]
+        assert path == ['write_keyset', 'wait_keyset_enabled', 'list_keys (after)']
+
+    def test_3_step_exit(self):
+        """ sys.exit in a step ends the rotation """
+        def _exit():
+            raise SystemExit(3)
+
+        with pytest.raises(SystemExit):
+            Pipeline().run(Step('clean_config', _exit), Step('map_identity', lambda: pause(0.05)))
+
+        with pytest.raises(ValueError):
+            Pipeline().run(Step('a', lambda: None), Step('b', lambda: None, requires=('c',)))
@@ -0,0 +1,112 @@
+import time
+import logging
+
+# aws imports
+from botocore.awsrequest import AWSResponse
+
+# test imports
+import pytest
+from tests import environment
+from keyup import map as keymap
+from keyup import ratelimit
+from keyup import sessions
+from keyup.ratelimit import AdaptiveLimiter, RateLimiter
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+THROTTLED = b'''<ErrorResponse xmlns="https://iam.amazonaws.com/doc/2010-05-08/">
+  <Error><Type>Sender</Type><Code>Throttling</Code><Message>Rate exceeded</Message></Error>
+  <RequestId>00000000-0000-0000-0000-000000000000</RequestId>
+</ErrorResponse>'''
+
+
+class RawResponse():
+    """ minimal urllib3 response body """
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, *args, **kwargs):
+        yield self.body
+
+
+@pytest.fixture()
+def profile_user(aws_profiles):
+    """ moto iam user, single profile awscli credentials file, fresh limiters """
+    yield aws_profiles.keys['developer1']
+
+
+class TestRateLimiter():
+    """
+    Test shared, adaptive rate limiting of AWS requests
+    """
+    def test_1_token_bucket(self):
+        """ callers held to the average rate once the burst is spent """
+        limiter = RateLimiter(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+        assert RateLimiter(rate=0).acquire() == 0.0
+
+    def test_2_aimd(self):
+        """
+        unlimited until throttled; configured rate applied on the first
+        throttle, halved on later ones, restored additively up to the ceiling
+        """
+        limiter = AdaptiveLimiter('123456789012 iam-write', rate=4)
+        start = time.monotonic()
+        for _ in range(20):
+            limiter.acquire()
+        limiter.on_success()
+        assert time.monotonic() - start < 0.05 and limiter.rate == 0.0
+
+        limiter.on_throttle()
+        assert limiter.rate == 4.0
+        limiter.on_throttle()
+        limiter.on_throttle()
+        assert limiter.rate == 1.0
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.rate == 4.0
+        assert limiter.counters()['throttled'] == 3
+
+    def test_3_families(self):
+        assert ratelimit.family('iam', 'ListAccessKeys') == 'iam-read'
+        assert ratelimit.family('iam', 'GetUser') == 'iam-read'
+        assert ratelimit.family('iam', 'CreateAccessKey') == 'iam-write'
+        assert ratelimit.family('sts', 'GetCallerIdentity') == 'sts'
+
+    def test_4_pooled_client(self, profile_user):
+        """ requests of pooled clients counted per account and API family """
+        keymap.map_identity('developer1')
+        client = sessions.boto3_session(service='iam', profile='developer1')
+        client.list_access_keys()
+        client.list_access_keys()
+        client.create_access_key()
+
+        counters = ratelimit.counters()
+        assert counters['123456789012 iam-read']['requests'] == 2
+        assert counters['123456789012 iam-write']['requests'] == 1
+        assert counters['profile:developer1 sts']['requests'] == 1
+
+    def test_5_throttled_request_retried(self, profile_user):
+        """ a throttled request is retried rather than raised; rate reduced """
+        keymap.map_identity('developer1')
+        client = sessions.boto3_session(service='iam', profile='developer1')
+        throttled = []
+
+        def _throttle(request=None, **kwargs):
+            if not throttled:
+                throttled.append(request)
+                return AWSResponse(request.url, 400, {}, RawResponse(THROTTLED))
+
+        client.meta.events.register('before-send.iam.ListAccessKeys', _throttle)
+        assert client.list_access_keys()['ResponseMetadata']['RetryAttempts'] == 1
+
+        counters = ratelimit.counters()['123456789012 iam-read']
+        assert counters['throttled'] == 1
+        assert counters['retries'] == 1
+        assert counters['requests'] == 2
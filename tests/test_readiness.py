@@ -0,0 +1,66 @@
+import logging
+
+# test imports
+import pytest
+from tests import environment
+from keyup import readiness
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class TestReadiness():
+    """
+    Test adaptive readiness probing of new access keys
+    """
+    def test_1_backoff_schedule(self):
+        """
+        intervals grow with attempts and never exceed the ceiling
+        """
+        schedule = readiness.backoff_schedule(9)
+        assert sum(schedule) == pytest.approx(9)
+        assert all(x <= readiness.MAX_DELAY for x in schedule)
+        assert schedule[0] <= readiness.BASE_DELAY
+        assert readiness.backoff_schedule(0) == []
+
+    def test_2_probe_ready(self, monkeypatch):
+        """
+        probe returns as soon as keypair authenticates
+        """
+        responses = iter([False, False, True])
+        monkeypatch.setattr(readiness, 'keyset_active', lambda *args: next(responses))
+        attempts = []
+
+        ready, latency, count = readiness.probe_keyset(
+            'AKIA', 'secret', 9, schedule=[0, 0, 0, 0], on_attempt=lambda: attempts.append(1)
+        )
+        assert ready is True
+        assert count == 3
+        assert len(attempts) == 3
+
+    def test_3_probe_ceiling(self, monkeypatch):
+        """
+        probe gives up once the schedule (ceiling) is exhausted
+        """
+        monkeypatch.setattr(readiness, 'keyset_active', lambda *args: False)
+        ready, latency, count = readiness.probe_keyset('AKIA', 'secret', 0, schedule=[0, 0])
+        assert ready is False
+        assert count == 3
+        assert readiness.wait_ready([('AKIA', 'secret')], 0) is False
+
+    def test_4_probe_client_released(self, aws_profiles):
+        """
+        pooled probe sessions and clients discarded once the probe ends;
+        shared loader search paths unchanged by new sessions
+        """
+        from keyup import sessions
+
+        keys = aws_profiles.keys['developer1']
+        paths = list(sessions.shared_loader().search_paths)
+
+        ready, latency, count = readiness.probe_keyset(keys['AccessKeyId'], keys['SecretAccessKey'], 1)
+        assert ready is True and count == 1
+        assert not [k for k in list(sessions.sessions) + list(sessions.clients) if k[1] == keys['AccessKeyId']]
+        assert sessions.shared_loader().search_paths == paths
+        assert len(set(paths)) == len(paths)
@@ -0,0 +1,116 @@
+import os
+import time
+import logging
+import configparser
+
+# test imports
+import pytest
+from tests import environment
+from keyup import batch
+from keyup import cli
+from keyup import retirement
+from keyup.retirement import RetirementLedger
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+# test module globals
+TestUsers = ('developer1', 'developer2')
+
+
+@pytest.fixture()
+def usernames():
+    return TestUsers
+
+
+@pytest.fixture()
+def deferred(aws_profiles, tmp_path, monkeypatch):
+    """
+    moto iam users, matching awscli credentials file, KEY_RETIREMENT DEFERRED
+    and an empty retirement ledger
+    """
+    monkeypatch.setattr(retirement, 'ledger', RetirementLedger(str(tmp_path / 'retirement.json')))
+    cli.source_globals()
+    monkeypatch.setattr(cli, 'KEY_ENABLE_DELAY', 0, raising=False)
+    monkeypatch.setitem(batch.local_config['KEY_BACKUP'], 'BACKUP_ENABLE', False)
+    monkeypatch.setitem(batch.local_config['KEY_METADATA'], 'KEY_RETIREMENT', 'DEFERRED')
+    yield aws_profiles.client, {user: x['AccessKeyId'] for user, x in aws_profiles.keys.items()}
+
+
+def key_status(client, user):
+    """ {AccessKeyId: Status} of an iam user """
+    return {x['AccessKeyId']: x['Status'] for x in client.list_access_keys(UserName=user)['AccessKeyMetadata']}
+
+
+class TestRetirement():
+    """
+    Test deferred retirement of deprecated access keys
+    """
+    def test_1_ledger(self, tmp_path):
+        ledger = RetirementLedger(str(tmp_path / 'ledger' / 'retirement.json'))
+        assert ledger.add('AKIAEXAMPLE1', 'developer1')
+        assert ledger.add('AKIAEXAMPLE2', 'admin', surrogate='service1')
+        assert ledger.get('AKIAEXAMPLE2')['surrogate'] == 'service1'
+        assert ledger.remove('AKIAEXAMPLE1') and not ledger.remove('AKIAEXAMPLE1')
+        assert list(RetirementLedger(ledger.path).entries()) == ['AKIAEXAMPLE2']
+        assert os.listdir(os.path.dirname(ledger.path)) == ['retirement.json']
+        assert oct(os.stat(ledger.path).st_mode & 0o777) == oct(0o600)
+
+    def test_2_rotation_deactivates(self, deferred):
+        """
+        deprecated keys deactivated and queued; deleted after grace period
+        """
+        client, keys = deferred
+        failed = batch.rotate_profiles(list(TestUsers), quiet=True)
+        assert failed == []
+
+        for user in TestUsers:
+            status = key_status(client, user)
+            assert status[keys[user]] == 'Inactive' and len(status) == 2
+        assert set(retirement.ledger.entries()) == set(keys.values())
+
+        # grace period not elapsed
+        assert retirement.retire_due(quiet=True) == []
+        assert len(key_status(client, 'developer1')) == 2
+
+        entries = retirement.ledger.entries()
+        for access_key in entries:
+            entries[access_key]['deactivated'] = time.time() - retirement.grace_period() - 1
+        retirement.ledger._write(entries)
+
+        assert retirement.retire_due(quiet=True) == []
+        for user in TestUsers:
+            assert keys[user] not in key_status(client, user)
+        assert retirement.ledger.entries() == {}
+
+    def test_3_reactivate(self, deferred):
+        """
+        reactivation of a queued key undoes the rotation
+        """
+        client, keys = deferred
+        assert cli.main('up', 'developer1', auto=True, debug=False)
+        assert key_status(client, 'developer1')[keys['developer1']] == 'Inactive'
+
+        assert retirement.reactivate_keyset(keys['developer1'])
+        assert key_status(client, 'developer1')[keys['developer1']] == 'Active'
+        assert retirement.ledger.entries() == {}
+        assert not retirement.reactivate_keyset(keys['developer1'])
+
+    def test_4_next_rotation(self, deferred):
+        """
+        with both key slots in use, the queued key of the earlier rotation is
+        deleted; the key it replaced is queued in turn
+        """
+        client, keys = deferred
+        batch.rotate_profiles(['developer1'], quiet=True)
+        assert batch.rotate_profiles(['developer1'], quiet=True) == []
+
+        status = key_status(client, 'developer1')
+        assert keys['developer1'] not in status and len(status) == 2
+        assert list(retirement.ledger.entries()) == [k for k, v in status.items() if v == 'Inactive']
+
+        parsed = configparser.ConfigParser()
+        parsed.read(os.environ['AWS_SHARED_CREDENTIALS_FILE'])
+        assert status[parsed['developer1']['aws_access_key_id']] == 'Active'
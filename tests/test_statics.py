@@ -0,0 +1,80 @@
+import os
+import json
+import logging
+import subprocess
+import sys
+
+# test imports
+import pytest
+from tests import environment
+from keyup import statics
+from keyup.statics import LocalConfig, seed_config
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@pytest.fixture()
+def config_file(tmp_path):
+    """ local config file lacking sections added by later keyup versions """
+    path = tmp_path / 'config.json'
+    config = json.loads(json.dumps(seed_config))
+    config['KEY_METADATA'].pop('KEY_READINESS')
+    config['KEY_METADATA']['KEY_ENABLE_DELAY'] = 15
+    config.pop('CACHE')
+    path.write_text(json.dumps(config))
+    yield path
+
+
+class TestLocalConfig():
+    """
+    Lazily loaded, mtime cached local configuration
+    """
+    def test_1_lazy_load(self, config_file, monkeypatch):
+        """ file not read until first access; read once per version """
+        reads = []
+        original = statics.read_local_config
+        monkeypatch.setattr(statics, 'read_local_config', lambda cfg: reads.append(cfg) or original(cfg))
+
+        config = LocalConfig(str(config_file), seed_config)
+        assert reads == []
+        assert config['KEY_METADATA']['KEY_ENABLE_DELAY'] == 15
+        assert config['LOGGING']['LOG_MODE'] == seed_config['LOGGING']['LOG_MODE']
+        assert len(reads) == 1
+
+    def test_2_schema_defaults(self, config_file):
+        """ missing sections and keys take seed_config defaults """
+        config = LocalConfig(str(config_file), seed_config)
+        assert config['KEY_METADATA']['KEY_READINESS'] == statics.key_readiness
+        assert config['CACHE'] == seed_config['CACHE']
+        assert 'KEY_READINESS' in seed_config['KEY_METADATA']     # defaults not modified
+
+    def test_3_reload_on_change(self, config_file):
+        """ modified file read again on next access """
+        config = LocalConfig(str(config_file), seed_config)
+        assert config['KEY_METADATA']['KEY_ENABLE_DELAY'] == 15
+
+        contents = json.loads(config_file.read_text())
+        contents['KEY_METADATA']['KEY_ENABLE_DELAY'] = 120
+        config_file.write_text(json.dumps(contents))
+        st = os.stat(str(config_file))
+        os.utime(str(config_file), ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        assert config['KEY_METADATA']['KEY_ENABLE_DELAY'] == 120
+
+    def test_4_missing_file(self, tmp_path):
+        """ defaults used when no config file exists; copies are independent """
+        config = LocalConfig(str(tmp_path / 'absent.json'), seed_config)
+        assert config.copy() == seed_config
+        config.copy()['LOGGING']['LOG_MODE'] = 'SYSLOG'
+        assert config['LOGGING']['LOG_MODE'] == seed_config['LOGGING']['LOG_MODE']
+
+    def test_5_import_side_effects(self, tmp_path):
+        """ importing keyup.statics creates no directories """
+        env = dict(os.environ, HOME=str(tmp_path))
+        subprocess.run(
+            [sys.executable, '-c', 'import keyup.statics'],
+            env=env, check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        assert os.listdir(str(tmp_path)) == []
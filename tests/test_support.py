@@ -14,7 +14,7 @@ from botocore.exceptions import ClientError, ProfileNotFound
 # test imports
 import moto
 import pytest
-import pyaws
+import pyaws.session
 from tests import environment
 from keyup.statics import PACKAGE
 from keyup import cli
@@ -0,0 +1,87 @@
+import datetime
+import logging
+
+# test imports
+import moto
+import pytest
+from tests import environment
+from keyup import sessions
+from keyup import temporary
+from keyup.cache import DiskCache, key_digest
+from keyup.credentials import snapshot
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+CONTENTS = """[expired-role]
+aws_access_key_id = ASIA1
+aws_secret_access_key = SECRET1
+aws_security_token = TOKEN1
+expiration = 2019-01-01T00:00:00Z
+
+[cached-role]
+aws_access_key_id = ASIA2
+aws_secret_access_key = SECRET2
+aws_security_token = TOKEN2
+
+[active-role]
+aws_access_key_id = ASIA3
+aws_secret_access_key = SECRET3
+aws_security_token = TOKEN3
+expiration = {}
+"""
+
+
+@pytest.fixture()
+def parsed(tmp_path, monkeypatch):
+    """ credentials file with expired, cached expired, and active tokens """
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    path = tmp_path / 'credentials'
+    path.write_text(CONTENTS.format(expires.strftime('%Y-%m-%dT%H:%M:%SZ')))
+
+    cache = DiskCache('tokens', ttl=3600, path=str(tmp_path / 'tokens.json'))
+    cache.set(key_digest('TOKEN2'), True)
+    monkeypatch.setattr(temporary, 'token_cache', cache)
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', str(path))
+    sessions.invalidate()
+    yield snapshot(str(path))
+
+
+class TestTemporaryCredentials():
+    """
+    Test classification of temporary credentials in clean_config
+    """
+    def test_1_expiration(self):
+        utc = datetime.timezone.utc
+        assert temporary.expiration({'expiration': '2019-01-01T00:00:00Z'}) == datetime.datetime(2019, 1, 1, tzinfo=utc)
+        assert temporary.expiration({'aws_expiration': '2019-01-01 00:00:00.500+00:00'}).year == 2019
+        assert temporary.expiration({'x_security_token_expires': '1546300800'}) == datetime.datetime(2019, 1, 1, tzinfo=utc)
+        assert temporary.expiration({'expiration': 'never'}) is None
+
+    def test_2_classify(self, parsed):
+        status = temporary.classify(parsed, parsed.temporary_profiles)
+        assert status == {
+            'expired-role': temporary.EXPIRED,
+            'cached-role': temporary.EXPIRED,
+            'active-role': temporary.UNKNOWN
+        }
+
+    def test_3_active_profile(self, parsed, monkeypatch):
+        """
+        only ambiguous profiles probed
+        """
+        probed = []
+
+        def _probe(profile, token=None):
+            probed.append(profile)
+            return True
+
+        monkeypatch.setattr(temporary, 'probe', _probe)
+        assert temporary.active_profile(parsed, parsed.temporary_profiles) == 'active-role'
+        assert probed == ['active-role']
+
+    def test_4_probe_sts(self, parsed):
+        with moto.mock_sts():
+            assert temporary.probe('active-role') is True